@@ -0,0 +1,227 @@
+"""
+Compiled permission resolver
+
+Role, collaboration and ownership permissions compiled into per-user bitsets
+and cached with versions that signal handlers bump on commit.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Permission, UserRoleAssignment
+
+# Project-level permissions stored on AnalysisCollaboration.permissions
+PROJECT_PERMISSIONS = ('edit_project', 'manage_collaborators', 'run_analysis', 'view_results')
+
+
+@dataclass(frozen=True)
+class CompiledPermissions:
+    registry: Mapping[str, int]
+    bits: int = 0
+    project_bits: Mapping[str, int] = field(default_factory=dict)
+    project_extra: Mapping[str, FrozenSet[str]] = field(default_factory=dict)
+    owned: FrozenSet[str] = frozenset()
+    superuser: bool = False
+    valid_until: Optional[float] = None  # Earliest assignment expiry (epoch seconds)
+
+    def has_perm(self, codename: str, project=None) -> bool:
+        if self.superuser:
+            return True
+        if project is None:
+            bit = self.registry.get(codename)
+            return bit is not None and bool(self.bits >> bit & 1)
+
+        project_id = str(getattr(project, 'pk', project))
+        if project_id in self.owned:
+            return True
+        bit = self.registry.get(codename)
+        if bit is not None and self.project_bits.get(project_id, 0) >> bit & 1:
+            return True
+        return codename in self.project_extra.get(project_id, ())
+
+    def has_perms(self, codenames: Iterable[str], project=None) -> bool:
+        return all(self.has_perm(codename, project) for codename in codenames)
+
+    def codenames(self):
+        return sorted(codename for codename, bit in self.registry.items() if self.bits >> bit & 1)
+
+    @property
+    def expired(self) -> bool:
+        return self.valid_until is not None and time.time() >= self.valid_until
+
+
+EMPTY_REGISTRY: Mapping[str, int] = {}
+ANONYMOUS = CompiledPermissions(EMPTY_REGISTRY)
+
+
+class PermissionResolver:
+    """Service for compiling, caching and checking user permissions"""
+
+    GLOBAL_VERSION_KEY = 'perm:version'
+    USER_VERSION_KEY = 'perm:user:{}'
+    COMPILED_KEY = 'perm:compiled:{}'
+    TTL = 60 * 60 * 24
+    MEMO_ATTR = '_compiled_permissions'
+
+    _registries: Dict[Any, Mapping[str, int]] = {}
+
+    @classmethod
+    def has_perm(cls, user, codename: str, project=None) -> bool:
+        return cls.for_user(user).has_perm(codename, project)
+
+    @classmethod
+    def has_perms(cls, user, codenames: Iterable[str], project=None) -> bool:
+        return cls.for_user(user).has_perms(codenames, project)
+
+    @classmethod
+    def for_user(cls, user) -> CompiledPermissions:
+        """Compiled permissions, memoised on the user object for the request"""
+        if user is None or not user.is_authenticated or not user.is_active:
+            return ANONYMOUS
+        compiled = getattr(user, cls.MEMO_ATTR, None)
+        if compiled is None or compiled.expired:
+            compiled = cls._load(user)
+            cls.memoise(user, compiled)
+        return compiled
+
+    @classmethod
+    def _bump(cls, key: str):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    @classmethod
+    def invalidate_user(cls, user_id):
+        cls._bump(cls.USER_VERSION_KEY.format(user_id))
+
+    @classmethod
+    def invalidate_users(cls, user_ids: Iterable):
+        for user_id in set(str(user_id) for user_id in user_ids):
+            cls.invalidate_user(user_id)
+
+    @classmethod
+    def invalidate_all(cls):
+        cls._bump(cls.GLOBAL_VERSION_KEY)
+
+    @classmethod
+    def cache_keys(cls, user_id) -> list:
+        """Version and compiled-entry keys of a user, for callers batching them into their own get_many"""
+        return [cls.GLOBAL_VERSION_KEY, cls.USER_VERSION_KEY.format(user_id), cls.COMPILED_KEY.format(user_id)]
+
+    @classmethod
+    def stamp(cls, user_id, values: Dict[str, Any]) -> Tuple[Any, Any]:
+        """(global version, user version) from prefetched ``cache_keys`` values"""
+        stamp = []
+        for key in (cls.GLOBAL_VERSION_KEY, cls.USER_VERSION_KEY.format(user_id)):
+            version = values.get(key)
+            if version is None:
+                # Unknown (new or evicted) versions start from a fresh value, never from a reused one
+                cache.add(key, time.time_ns(), None)
+                version = cache.get(key)
+            stamp.append(version)
+        return tuple(stamp)
+
+    @classmethod
+    def _load(cls, user) -> CompiledPermissions:
+        values = cache.get_many(cls.cache_keys(user.pk))
+        compiled = cls.cached(user.pk, values)
+        if compiled is None:
+            stamp = cls.stamp(user.pk, values)
+            compiled = cls.compile(user, cls.registry(stamp[0]))
+            cache.set(cls.COMPILED_KEY.format(user.pk), (stamp, cls._pack(compiled)), cls.TTL)
+        return compiled
+
+    @classmethod
+    def cached(cls, user_id, values: Dict[str, Any]) -> Optional[CompiledPermissions]:
+        """The current compiled entry from prefetched ``cache_keys`` values, or None"""
+        stamp = cls.stamp(user_id, values)
+        cached = values.get(cls.COMPILED_KEY.format(user_id))
+        if cached is None or cached[0] != stamp:
+            return None
+        compiled = cls._unpack(cls.registry(stamp[0]), cached[1])
+        return None if compiled.expired else compiled
+
+    @classmethod
+    def memoise(cls, user, compiled: CompiledPermissions):
+        setattr(user, cls.MEMO_ATTR, compiled)
+
+    @classmethod
+    def registry(cls, version=None) -> Mapping[str, int]:
+        """Codename -> bit index; identical in every process for a given global version"""
+        registry = cls._registries.get(version)
+        if registry is None:
+            codenames = set(Permission.objects.filter(is_active=True).values_list('codename', flat=True))
+            codenames.update(PROJECT_PERMISSIONS)
+            registry = {codename: bit for bit, codename in enumerate(sorted(codenames))}
+            cls._registries = {version: registry}  # Only the current version is kept
+        return registry
+
+    @classmethod
+    def compile(cls, user, registry: Mapping[str, int]) -> CompiledPermissions:
+        if user.is_superuser:
+            return CompiledPermissions(registry, superuser=True)
+
+        now = timezone.now()
+        bits, valid_until = 0, None
+        assignments = UserRoleAssignment.objects.filter(
+            user=user, is_active=True, role__is_active=True
+        ).filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+        for role_permissions, expires_at in assignments.values_list('role__permissions', 'expires_at'):
+            for codename in role_permissions or ():
+                bit = registry.get(codename)
+                if bit is not None:
+                    bits |= 1 << bit
+            if expires_at is not None:
+                expiry = expires_at.timestamp()
+                valid_until = expiry if valid_until is None else min(valid_until, expiry)
+
+        project_bits, project_extra, owned = {}, {}, frozenset()
+        try:
+            collaboration_model = apps.get_model('analytics', 'AnalysisCollaboration')
+            project_model = apps.get_model('analytics', 'AnalysisProject')
+        except LookupError:
+            collaboration_model = project_model = None
+        if collaboration_model is not None:
+            collaborations = collaboration_model.objects.filter(user=user, status='active')
+            for project_id, permissions in collaborations.values_list('project_id', 'permissions'):
+                project_id, mask, extra = str(project_id), 0, set()
+                for codename, granted in (permissions or {}).items():
+                    if not granted:
+                        continue
+                    bit = registry.get(codename)
+                    if bit is None:
+                        extra.add(codename)
+                    else:
+                        mask |= 1 << bit
+                project_bits[project_id] = mask
+                if extra:
+                    project_extra[project_id] = frozenset(extra)
+            owned = frozenset(str(pk) for pk in project_model.objects.filter(created_by=user).values_list('pk', flat=True))
+
+        return CompiledPermissions(
+            registry, bits=bits, project_bits=project_bits, project_extra=project_extra,
+            owned=owned, valid_until=valid_until,
+        )
+
+    @staticmethod
+    def _pack(compiled: CompiledPermissions) -> tuple:
+        return (
+            compiled.bits, dict(compiled.project_bits),
+            {project: sorted(extra) for project, extra in compiled.project_extra.items()},
+            sorted(compiled.owned), compiled.superuser, compiled.valid_until,
+        )
+
+    @staticmethod
+    def _unpack(registry: Mapping[str, int], packed: tuple) -> CompiledPermissions:
+        bits, project_bits, project_extra, owned, superuser, valid_until = packed
+        return CompiledPermissions(
+            registry, bits=bits, project_bits=project_bits,
+            project_extra={project: frozenset(extra) for project, extra in project_extra.items()},
+            owned=frozenset(owned), superuser=superuser, valid_until=valid_until,
+        )
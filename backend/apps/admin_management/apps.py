@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class AdminManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.admin_management'
-    verbose_name = 'Admin Management'
\ No newline at end of file
+    verbose_name = 'Admin Management'
+
+    def ready(self):
+        # Register signal handlers that keep the configuration snapshot in sync
+        from . import signals  # noqa: F401
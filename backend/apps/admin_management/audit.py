@@ -0,0 +1,283 @@
+"""
+Asynchronous admin audit logging
+
+Admin actions are queued (a Redis stream, or an in-process queue in
+development) and written to AdminActivity in batches off the request path.
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, close_old_connections, connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AdminActivity
+
+logger = logging.getLogger(__name__)
+
+
+class LocalAuditQueue:
+    """Bounded in-process queue used in development (no Redis cache configured)"""
+
+    drains_in_process = True
+
+    def __init__(self, maxsize: int):
+        self._queue = queue.Queue(maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, record: Dict[str, Any]) -> bool:
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            return False
+
+    def take(self, limit: int, timeout: float = 0) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Up to ``limit`` records, waiting at most ``timeout`` seconds for the first"""
+        try:
+            batch = [(None, self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait())]
+        except queue.Empty:
+            return []
+        while len(batch) < limit:
+            try:
+                batch.append((None, self._queue.get_nowait()))
+            except queue.Empty:
+                break
+        return batch
+
+    def ack(self, tokens):
+        pass
+
+    def start(self, target):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=target, name='admin-audit-writer', daemon=True)
+                self._thread.start()
+
+
+class RedisAuditStream:
+    """Redis stream shared by all processes, drained through a consumer group"""
+
+    drains_in_process = False
+    STREAM_KEY = 'admin:audit:stream'
+    GROUP = 'audit-writers'
+    MAX_LENGTH = 100000
+    CLAIM_IDLE_MS = 60 * 1000  # Re-deliver records a crashed writer never acknowledged
+
+    def __init__(self, client):
+        self.client = client
+        self.consumer = f'{socket.gethostname()}-{os.getpid()}'
+        self._group_ready = False
+
+    def put(self, record: Dict[str, Any]) -> bool:
+        self.client.xadd(
+            self.STREAM_KEY, {'record': json.dumps(record)}, maxlen=self.MAX_LENGTH, approximate=True
+        )
+        return True
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.client.xgroup_create(self.STREAM_KEY, self.GROUP, id='0', mkstream=True)
+        except Exception as exc:
+            if 'BUSYGROUP' not in str(exc):
+                raise
+        self._group_ready = True
+
+    def take(self, limit: int, timeout: float = 0) -> List[Tuple[Any, Dict[str, Any]]]:
+        self._ensure_group()
+        claimed = self.client.xautoclaim(
+            self.STREAM_KEY, self.GROUP, self.consumer, self.CLAIM_IDLE_MS, start_id='0-0', count=limit
+        )[1]
+        entries = claimed or [
+            entry
+            for _, stream_entries in self.client.xreadgroup(
+                self.GROUP, self.consumer, {self.STREAM_KEY: '>'}, count=limit,
+                block=int(timeout * 1000) if timeout else None,
+            ) or []
+            for entry in stream_entries
+        ]
+        return [(entry_id, json.loads(fields[b'record'])) for entry_id, fields in entries if fields]
+
+    def ack(self, tokens):
+        if tokens:
+            self.client.xack(self.STREAM_KEY, self.GROUP, *tokens)
+            self.client.xdel(self.STREAM_KEY, *tokens)
+
+
+class AuditLogService:
+    """Service for queueing admin activity records and writing them in bulk"""
+
+    MAX_PAYLOAD_BYTES = 8 * 1024
+    PREVIEW_KEYS = 25
+    MAX_USER_AGENT = 512
+    QUEUE_SIZE = 10000
+    BATCH_SIZE = 200
+    FLUSH_INTERVAL = 1.0  # seconds the background writer waits for a batch to fill
+    WRITE_RETRIES = 5
+    RETRY_DELAY = 1.0  # seconds, doubled after every failed attempt
+    MAX_RETRY_DELAY = 60.0
+
+    _sink = None
+    _content_types: Dict[str, int] = {}
+
+    @classmethod
+    def get_sink(cls):
+        if cls._sink is None:
+            try:
+                from django_redis import get_redis_connection
+                cls._sink = RedisAuditStream(get_redis_connection('default'))
+            except (ImportError, NotImplementedError):
+                cls._sink = LocalAuditQueue(cls.QUEUE_SIZE)
+                atexit.register(cls.flush)
+        return cls._sink
+
+    @classmethod
+    def content_type_id(cls, model_label: str) -> Optional[int]:
+        """ContentType id for ``'app_label.ModelName'``, looked up once per process"""
+        if model_label not in cls._content_types:
+            try:
+                model = apps.get_model(model_label)
+            except (LookupError, ValueError):
+                return None
+            cls._content_types[model_label] = ContentType.objects.get_for_model(model).pk
+        return cls._content_types[model_label]
+
+    @classmethod
+    def compact(cls, value: Any) -> Any:
+        """JSON-safe payload, or a size/hash summary when it is too large to store"""
+        encoded = json.dumps(value, cls=DjangoJSONEncoder, default=str)
+        if len(encoded) <= cls.MAX_PAYLOAD_BYTES:
+            return json.loads(encoded)
+
+        summary = {
+            'truncated': True,
+            'size': len(encoded),
+            'sha256': hashlib.sha256(encoded.encode('utf-8')).hexdigest(),
+        }
+        if isinstance(value, dict):
+            summary['keys'] = sorted(str(key) for key in value)[:cls.PREVIEW_KEYS]
+        elif isinstance(value, (list, tuple)):
+            summary['items'] = len(value)
+        return summary
+
+    @classmethod
+    def record(cls, admin_user, action_type: str, description: str, content_type_id: int = None,
+               object_id: str = None, details: Dict[str, Any] = None, ip_address: str = None,
+               user_agent: str = '') -> Dict[str, Any]:
+        """Plain activity record, as queued by ``log`` and written by ``write``"""
+        return {
+            'admin_user_id': str(getattr(admin_user, 'pk', admin_user)),
+            'action_type': action_type,
+            'description': description,
+            'content_type_id': content_type_id,
+            'object_id': object_id,
+            'details': {key: cls.compact(value) for key, value in (details or {}).items()},
+            'ip_address': ip_address,
+            'user_agent': (user_agent or '')[:cls.MAX_USER_AGENT],
+            'created_at': timezone.now().isoformat(),
+        }
+
+    @classmethod
+    def log(cls, admin_user, action_type: str, description: str, content_type_id: int = None,
+            object_id: str = None, details: Dict[str, Any] = None, ip_address: str = None,
+            user_agent: str = ''):
+        """Queue one activity record; written by the background writer"""
+        record = cls.record(admin_user, action_type, description, content_type_id, object_id,
+                            details, ip_address, user_agent)
+
+        sink = cls.get_sink()
+        if not sink.put(record):
+            # Queue full: write inline rather than lose an audit record
+            cls.write([record])
+            return
+        if sink.drains_in_process and getattr(settings, 'ADMIN_AUDIT_BACKGROUND_WRITER', True):
+            sink.start(cls._run)
+
+    @classmethod
+    def write(cls, records: List[Dict[str, Any]]) -> int:
+        activities = []
+        for record in records:
+            record = dict(record, created_at=parse_datetime(record['created_at']))
+            activities.append(AdminActivity(**record))
+        AdminActivity.objects.bulk_create(activities, batch_size=cls.BATCH_SIZE)
+        return len(activities)
+
+    @classmethod
+    def flush(cls, timeout: float = 0) -> int:
+        """Write everything currently queued; returns number of records written"""
+        sink = cls.get_sink()
+        written = 0
+        while True:
+            batch = sink.take(cls.BATCH_SIZE, timeout)
+            if not batch:
+                return written
+            cls.write([record for _, record in batch])
+            sink.ack([token for token, _ in batch if token is not None])
+            written += len(batch)
+            if len(batch) < cls.BATCH_SIZE:
+                return written
+
+    @classmethod
+    def _run(cls):
+        """Background writer loop for the in-process queue"""
+        sink = cls.get_sink()
+        while True:
+            batch = sink.take(cls.BATCH_SIZE, cls.FLUSH_INTERVAL)
+            if batch:
+                cls._write_batch([record for _, record in batch])
+
+    @classmethod
+    def _write_batch(cls, records: List[Dict[str, Any]]) -> int:
+        """
+        Write one batch for the background writer, retrying with backoff.
+
+        After ``WRITE_RETRIES`` failed attempts with the database reachable,
+        the records are written one by one and only those that still fail on
+        their own are logged in full and dropped. While the database is
+        unreachable the batch keeps being retried every ``MAX_RETRY_DELAY``.
+        """
+        delay = cls.RETRY_DELAY
+        attempt = 0
+        while True:
+            try:
+                close_old_connections()
+                return cls.write(records)
+            except Exception:
+                attempt += 1
+                logger.warning("Writing %d admin activity records failed (attempt %d)",
+                               len(records), attempt, exc_info=True)
+
+            if attempt >= cls.WRITE_RETRIES and cls._database_available():
+                written = 0
+                for record in records:
+                    try:
+                        written += cls.write([record])
+                    except Exception:
+                        logger.exception("Dropping unwritable admin activity record: %s", json.dumps(record))
+                return written
+            time.sleep(delay)
+            delay = min(delay * 2, cls.MAX_RETRY_DELAY)
+
+    @staticmethod
+    def _database_available() -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except DatabaseError:
+            return False
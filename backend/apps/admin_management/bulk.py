@@ -0,0 +1,211 @@
+"""
+Set-based bulk user operations
+
+Bulk status, subscription and role changes run as one statement per chunk,
+with the audit records written in a single batch.
+"""
+import uuid
+from typing import Any, Dict, List, Sequence, Tuple
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .access import PermissionResolver
+from .audit import AuditLogService
+from .models import UserRole, UserRoleAssignment
+
+User = get_user_model()
+
+# operation -> (field values applied, audit action type, description verb)
+STATUS_OPERATIONS = {
+    'suspend': ({'is_active': False}, 'user_suspended', 'Suspended'),
+    'activate': ({'is_active': True}, 'user_activated', 'Activated'),
+    'delete': ({'is_active': False}, 'user_deleted', 'Deleted'),  # Soft delete by deactivating
+}
+
+
+class BulkOperationError(ValueError):
+    """The operation or its parameters are invalid (nothing was changed)"""
+
+
+class BulkUserOperationService:
+    """Service for applying admin operations to many users at once"""
+
+    CHUNK_SIZE = 1000
+    OPERATIONS = tuple(STATUS_OPERATIONS) + ('change_subscription', 'assign_role')
+
+    @classmethod
+    def run(cls, user_ids: Sequence[Any], operation: str, admin_user, **params) -> Dict[str, Any]:
+        """
+        Apply ``operation`` to ``user_ids``; returns counts, processed users
+        and per-id errors. Raises BulkOperationError for an unknown operation
+        or missing/invalid parameters.
+        """
+        if operation not in cls.OPERATIONS:
+            raise BulkOperationError(f'Unknown operation: {operation}')
+        handler, options = cls._prepare(operation, params)
+
+        results = {
+            'success_count': 0,
+            'error_count': 0,
+            'errors': [],
+            'skipped': [],
+            'processed_users': [],
+        }
+        ids = cls._parse_ids(user_ids, results)
+        audit_records = []
+
+        with transaction.atomic():
+            for start in range(0, len(ids), cls.CHUNK_SIZE):
+                chunk = ids[start:start + cls.CHUNK_SIZE]
+                rows = {
+                    str(row[0]): row
+                    for row in User.objects.filter(id__in=chunk).values_list('id', 'email', *options['fields'])
+                }
+                for user_id in chunk:
+                    if str(user_id) not in rows:
+                        cls._error(results, user_id, None, 'User not found')
+                processed = handler(list(rows.values()), admin_user, options, results, audit_records)
+                for user_id, email in processed:
+                    results['success_count'] += 1
+                    results['processed_users'].append({'user_id': user_id, 'email': email, 'status': 'success'})
+
+            AuditLogService.write(audit_records)
+        return results
+
+    @classmethod
+    def assign_role(cls, role_id, user_ids: Sequence[Any], admin_user) -> Dict[str, Any]:
+        """Role assignment in the ``UserRoleService.assign_role_to_users`` result format"""
+        results = cls.run(user_ids, 'assign_role', admin_user, role_id=role_id)
+        assignments = [dict(entry, status='assigned') for entry in results['processed_users']]
+        assignments += [
+            {'user_id': entry['user_id'], 'email': entry['email'], 'status': 'already_assigned'}
+            for entry in results['skipped']
+        ]
+        assignments += [dict(entry, status='error') for entry in results['errors']]
+        return {
+            'success_count': results['success_count'],
+            'error_count': results['error_count'],
+            'already_assigned': len(results['skipped']),
+            'assignments': assignments,
+        }
+
+    @staticmethod
+    def _parse_ids(user_ids, results) -> List[uuid.UUID]:
+        ids, seen = [], set()
+        for value in user_ids:
+            try:
+                user_id = value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+            except ValueError:
+                BulkUserOperationService._error(results, value, None, 'Invalid user id')
+                continue
+            if user_id not in seen:
+                seen.add(user_id)
+                ids.append(user_id)
+        return ids
+
+    @staticmethod
+    def _error(results, user_id, email, message):
+        results['error_count'] += 1
+        results['errors'].append({'user_id': str(user_id), 'email': email, 'error': message})
+
+    @classmethod
+    def _prepare(cls, operation: str, params: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+        """Validate parameters once; returns the chunk handler and its options"""
+        if operation in STATUS_OPERATIONS:
+            values, action_type, verb = STATUS_OPERATIONS[operation]
+            return cls._update_status, {
+                'fields': (), 'values': values, 'action_type': action_type, 'verb': verb,
+            }
+
+        if operation == 'change_subscription':
+            subscription_type = params.get('subscription_type')
+            choices = {value for value, _ in User._meta.get_field('subscription_type').choices}
+            if subscription_type not in choices:
+                raise BulkOperationError(f'subscription_type must be one of: {", ".join(sorted(choices))}')
+            return cls._change_subscription, {
+                'fields': ('subscription_type',), 'subscription_type': subscription_type,
+            }
+
+        role_id = params.get('role_id')
+        try:
+            role = UserRole.objects.get(id=role_id)
+        except (UserRole.DoesNotExist, ValidationError, ValueError, TypeError):
+            raise BulkOperationError('role_id must reference an existing role')
+        return cls._assign_role, {'fields': (), 'role': role}
+
+    # Chunk handlers take [(id, email, *fields)] and return the [(id, email)] rows they changed
+    @staticmethod
+    def _update_status(rows, admin_user, options, results, audit_records):
+        User.objects.filter(id__in=[row[0] for row in rows]).update(
+            updated_at=timezone.now(), **options['values']
+        )
+        # update() sends no post_save; drop the users' cached principals
+        user_ids = [row[0] for row in rows]
+        transaction.on_commit(lambda: PermissionResolver.invalidate_users(user_ids))
+        processed = []
+        for user_id, email in rows:
+            audit_records.append(AuditLogService.record(
+                admin_user, options['action_type'], f"{options['verb']} user {email}",
+                details={'user_id': str(user_id), 'user_email': email},
+            ))
+            processed.append((str(user_id), email))
+        return processed
+
+    @staticmethod
+    def _change_subscription(rows, admin_user, options, results, audit_records):
+        new_subscription = options['subscription_type']
+        User.objects.filter(id__in=[row[0] for row in rows]).update(
+            subscription_type=new_subscription, updated_at=timezone.now()
+        )
+        user_ids = [row[0] for row in rows]
+        transaction.on_commit(lambda: PermissionResolver.invalidate_users(user_ids))
+        processed = []
+        for user_id, email, old_subscription in rows:
+            audit_records.append(AuditLogService.record(
+                admin_user, 'user_updated', f'Changed subscription for {email}',
+                details={
+                    'user_id': str(user_id),
+                    'user_email': email,
+                    'old_subscription': old_subscription,
+                    'new_subscription': new_subscription,
+                },
+            ))
+            processed.append((str(user_id), email))
+        return processed
+
+    @staticmethod
+    def _assign_role(rows, admin_user, options, results, audit_records):
+        role = options['role']
+        assigned = set(
+            UserRoleAssignment.objects.filter(role=role, user_id__in=[row[0] for row in rows])
+            .values_list('user_id', flat=True)
+        )
+        new_rows = [row for row in rows if row[0] not in assigned]
+        results['skipped'].extend(
+            {'user_id': str(user_id), 'email': email, 'reason': 'already_assigned'}
+            for user_id, email in rows if user_id in assigned
+        )
+        # ignore_conflicts covers assignments made concurrently since the check above
+        UserRoleAssignment.objects.bulk_create(
+            [UserRoleAssignment(user_id=user_id, role=role, assigned_by=admin_user) for user_id, _ in new_rows],
+            ignore_conflicts=True,
+        )
+        # bulk_create sends no post_save; recompile the new assignees' permissions
+        new_ids = [user_id for user_id, _ in new_rows]
+        transaction.on_commit(lambda: PermissionResolver.invalidate_users(new_ids))
+        processed = []
+        for user_id, email in new_rows:
+            audit_records.append(AuditLogService.record(
+                admin_user, 'user_role_changed', f'Assigned role {role.name} to {email}',
+                details={
+                    'user_id': str(user_id),
+                    'user_email': email,
+                    'role_id': str(role.id),
+                    'role_name': role.name,
+                },
+            ))
+            processed.append((str(user_id), email))
+        return processed
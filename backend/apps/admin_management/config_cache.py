@@ -0,0 +1,211 @@
+"""
+In-process snapshot of SystemConfiguration and BrandConfiguration
+
+Lookups are dict reads; each process reloads its snapshot when the
+configuration version changes (see signals.py).
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .models import BrandConfiguration, SystemConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy of a JSON value"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def coerce(value: Any, data_type: str) -> Any:
+    """Config value as its declared type; left unchanged if it does not convert"""
+    try:
+        if data_type == 'integer':
+            return int(value)
+        if data_type == 'float':
+            return float(value)
+        if data_type == 'boolean':
+            if isinstance(value, str):
+                return value.strip().lower() in ('1', 'true', 'yes', 'on')
+            return bool(value)
+        if data_type == 'string' and not isinstance(value, (dict, list)):
+            return '' if value is None else str(value)
+    except (TypeError, ValueError):
+        logger.warning("Config value %r is not a valid %s", value, data_type)
+    return freeze(value)
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    version: Any
+    values: Mapping[str, Any]
+    categories: Mapping[str, str]
+    brand: Optional[Mapping[str, Any]]
+
+    def get(self, key: str, default=None):
+        return self.values.get(key, default)
+
+    def category(self, category: str) -> Mapping[str, Any]:
+        return MappingProxyType({
+            key: value for key, value in self.values.items() if self.categories[key] == category
+        })
+
+
+class ConfigCache:
+    """Service for the per-process configuration snapshot"""
+
+    VERSION_KEY = 'config:version'
+    CHANNEL = 'config:changed'
+    POLL_INTERVAL = 5.0  # seconds between version checks
+
+    _snapshot: Optional[ConfigSnapshot] = None
+    _checked_at = 0.0
+    _stale = False
+    _lock = threading.Lock()
+    _client = None
+    _client_pid = None
+    _batch = threading.local()
+
+    @classmethod
+    def snapshot(cls) -> ConfigSnapshot:
+        snapshot = cls._snapshot
+        if snapshot is None or cls._stale or time.monotonic() - cls._checked_at >= cls.POLL_INTERVAL:
+            snapshot = cls._refresh(snapshot)
+        return snapshot
+
+    @classmethod
+    def get(cls, key: str, default=None):
+        return cls.snapshot().get(key, default)
+
+    @classmethod
+    def active_brand(cls) -> Optional[BrandConfiguration]:
+        """Copy of the active brand configuration, built without a query"""
+        brand = cls.snapshot().brand
+        if brand is None:
+            return None
+        instance = BrandConfiguration(**copy.deepcopy(dict(brand)))
+        instance._state.adding = False
+        return instance
+
+    @classmethod
+    def redis(cls):
+        """Redis client for this process (None without django-redis); starts the subscriber"""
+        if cls._client_pid != os.getpid():
+            # First use in this process (or after a fork): the parent's subscriber thread is gone
+            try:
+                from django_redis import get_redis_connection
+                cls._client = get_redis_connection('default')
+            except (ImportError, NotImplementedError):
+                cls._client = None
+            cls._client_pid = os.getpid()
+            if cls._client is not None:
+                threading.Thread(target=cls._listen, name='config-cache-listener', daemon=True).start()
+        return cls._client
+
+    @classmethod
+    def current_version(cls):
+        client = cls.redis()
+        if client is not None:
+            return int(client.get(cls.VERSION_KEY) or 0)
+        configs = SystemConfiguration.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+        brands = BrandConfiguration.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+        return (configs['updated'], configs['count'], brands['updated'], brands['count'])
+
+    @classmethod
+    def bump(cls):
+        """Announce a configuration change to every process"""
+        cls._stale = True
+        client = cls.redis()
+        if client is not None:
+            version = client.incr(cls.VERSION_KEY)
+            client.publish(cls.CHANNEL, version)
+
+    @classmethod
+    def changed(cls):
+        """Bump once the current transaction commits (inside batch(): once for the batch)"""
+        if not getattr(cls._batch, 'depth', 0):
+            transaction.on_commit(cls.bump)
+
+    @classmethod
+    @contextmanager
+    def batch(cls):
+        """Run the block in one transaction that bumps the version once on commit"""
+        cls._batch.depth = getattr(cls._batch, 'depth', 0) + 1
+        try:
+            with transaction.atomic():
+                yield
+                if cls._batch.depth == 1:
+                    transaction.on_commit(cls.bump)
+        finally:
+            cls._batch.depth -= 1
+
+    @classmethod
+    def _listen(cls):
+        while True:
+            try:
+                pubsub = cls._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        cls._stale = True
+            except Exception:
+                logger.exception("Config cache subscriber disconnected; retrying")
+                cls._stale = True
+                time.sleep(cls.POLL_INTERVAL)
+
+    @classmethod
+    def _refresh(cls, snapshot: Optional[ConfigSnapshot]) -> ConfigSnapshot:
+        with cls._lock:
+            if cls._snapshot is not snapshot:
+                return cls._snapshot  # Another thread reloaded meanwhile
+            # A change announced to this process reloads even if the version looks the same
+            forced, cls._stale = cls._stale, False
+            version = cls.current_version()
+            if snapshot is None or forced or snapshot.version != version:
+                snapshot = cls.load(version)
+                cls._snapshot = snapshot
+            cls._checked_at = time.monotonic()
+            return snapshot
+
+    @classmethod
+    def load(cls, version=None) -> ConfigSnapshot:
+        values, categories = {}, {}
+        for key, value, data_type, category in SystemConfiguration.objects.filter(is_active=True).values_list(
+            'key', 'value', 'data_type', 'category'
+        ):
+            values[key] = coerce(value, data_type)
+            categories[key] = category
+
+        brand = BrandConfiguration.objects.filter(is_active=True).first()
+        if brand is not None:
+            brand = MappingProxyType({
+                field.attname: getattr(brand, field.attname) for field in brand._meta.concrete_fields
+            })
+
+        return ConfigSnapshot(
+            version=version,
+            values=MappingProxyType(values),
+            categories=MappingProxyType(categories),
+            brand=brand,
+        )
+
+    @classmethod
+    def reset(cls):
+        """Drop this process's snapshot (tests, management commands)"""
+        with cls._lock:
+            cls._snapshot = None
+            cls._stale = False
@@ -0,0 +1,256 @@
+"""
+Streaming and background tabular exports
+
+Exports are streamed as CSV chunk by chunk, or written to a file by a
+resumable background job.
+"""
+import csv
+import json
+import logging
+import os
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = 64 * 1024
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+class TableExport:
+    """Header plus rows, from a queryset projection or any iterable"""
+
+    def __init__(self, header: Sequence[str], queryset=None, fields: Sequence[str] = (),
+                 format_row: Callable[[tuple], Sequence[Any]] = None, rows: Iterable[Sequence[Any]] = None,
+                 chunk_size: int = 2000):
+        if (queryset is None) == (rows is None):
+            raise ValueError('Pass either a queryset or rows')
+        self.header = list(header)
+        self.queryset = queryset
+        self.fields = list(fields)
+        self.format_row = format_row or (lambda values: values)
+        self.rows = rows
+        self.chunk_size = chunk_size
+
+    @property
+    def resumable(self) -> bool:
+        return self.queryset is not None
+
+    def iter_rows(self) -> Iterator[Sequence[Any]]:
+        if self.rows is not None:
+            yield from self.rows
+            return
+        for values in self.queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size):
+            yield self.format_row(values)
+
+    def iter_batches(self, after=None) -> Iterator[tuple]:
+        """(last_pk, rows) batches in primary-key order, starting after ``after``"""
+        queryset = self.queryset.order_by('pk')
+        while True:
+            page = queryset.filter(pk__gt=after) if after is not None else queryset
+            batch = list(page.values_list('pk', *self.fields)[:self.chunk_size])
+            if not batch:
+                return
+            after = batch[-1][0]
+            yield after, [self.format_row(values[1:]) for values in batch]
+
+
+def csv_chunks(header: Sequence[str], rows: Iterable[Sequence[Any]], include_header: bool = True) -> Iterator[str]:
+    """CSV text in chunks of roughly CHUNK_BYTES"""
+    writer = csv.writer(Echo())
+    buffer, size = [], 0
+    if include_header:
+        buffer.append(writer.writerow(header))
+    for row in rows:
+        line = writer.writerow(row)
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def encode_chunks(chunks: Iterable[str], compress: bool = False) -> Iterator[bytes]:
+    """UTF-8 encode, optionally as a gzip stream"""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def streaming_csv_response(export: TableExport, filename: str, compress: bool = False) -> StreamingHttpResponse:
+    chunks = encode_chunks(csv_chunks(export.header, export.iter_rows()), compress)
+    return streaming_chunks_response(chunks, filename, compress)
+
+
+def streaming_chunks_response(chunks: Iterable[bytes], filename: str, compress: bool = False) -> StreamingHttpResponse:
+    """Download response for CSV chunks that are already encoded (gzip when ``compress``)"""
+    if compress:
+        response = StreamingHttpResponse(chunks, content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(chunks, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def resolve_factory(path: str) -> Callable[..., TableExport]:
+    """``module.function`` or ``module.Class.method``"""
+    try:
+        return import_string(path)
+    except ImportError:
+        owner, name = path.rsplit('.', 1)
+        return getattr(import_string(owner), name)
+
+
+class ExportJobService:
+    """Service for background, resumable exports to files"""
+
+    @classmethod
+    def export_dir(cls) -> Path:
+        return Path(getattr(settings, 'EXPORT_DIR', Path(settings.BASE_DIR) / 'exports'))
+
+    @classmethod
+    def _job_path(cls, job_id: str) -> Path:
+        return cls.export_dir() / f'{job_id}.json'
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            uuid.UUID(job_id)
+            return json.loads(cls._job_path(job_id).read_text())
+        except (ValueError, FileNotFoundError):
+            return None
+
+    @classmethod
+    def _save(cls, job: Dict[str, Any]):
+        path = cls._job_path(job['id'])
+        temporary = path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(job))
+        os.replace(temporary, path)
+
+    @classmethod
+    def unfinished(cls) -> List[Dict[str, Any]]:
+        """Jobs that are pending, were interrupted or failed"""
+        jobs = []
+        for path in sorted(cls.export_dir().glob('*.json')):
+            job = cls.get(path.stem)
+            if job is not None and job['state'] != 'complete':
+                jobs.append(job)
+        return jobs
+
+    @classmethod
+    def create(cls, factory: str, params: Dict[str, Any], filename: str, owner_id=None,
+               compress: bool = True) -> Dict[str, Any]:
+        """Register a job and queue it; returns the job record"""
+        from .tasks import run_export_job
+
+        cls.export_dir().mkdir(parents=True, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'factory': factory,
+            'params': params,
+            'filename': filename + ('.gz' if compress else ''),
+            'output': str(cls.export_dir() / (job_id + ('.csv.gz' if compress else '.csv'))),
+            'compress': compress,
+            'owner_id': str(owner_id) if owner_id is not None else None,
+            'state': 'pending',
+            'rows': 0,
+            'last_pk': None,
+            'offset': 0,
+            'created_at': timezone.now().isoformat(),
+            'finished_at': None,
+            'error': None,
+        }
+        cls._save(job)
+        run_export_job.delay(job_id)
+        return job
+
+    @classmethod
+    def run(cls, job_id: str) -> Dict[str, Any]:
+        """Run (or resume) a job until the export is complete"""
+        job = cls.get(job_id)
+        if job is None or job['state'] == 'complete':
+            return job
+
+        export = resolve_factory(job['factory'])(**job['params'])
+        output = Path(job['output'])
+        job['state'] = 'running'
+        cls._save(job)
+
+        try:
+            # Drop anything written after the last recorded batch
+            with open(output, 'ab') as handle:
+                handle.truncate(job['offset'])
+
+            if export.resumable:
+                batches = export.iter_batches(after=job['last_pk'])
+            else:
+                # Plain iterables cannot be resumed and restart from the beginning
+                job.update(rows=0, offset=0, last_pk=None)
+                with open(output, 'wb'):
+                    pass
+                batches = ((None, rows) for rows in _batched(export.iter_rows(), export.chunk_size))
+
+            include_header = job['offset'] == 0
+            for last_pk, rows in batches:
+                cls._append(job, output, export.header, rows, include_header,
+                            last_pk=str(last_pk) if last_pk is not None else None)
+                include_header = False
+            if include_header:
+                cls._append(job, output, export.header, [], include_header)
+
+            job.update(state='complete', finished_at=timezone.now().isoformat())
+        except Exception as exc:
+            logger.exception("Export job %s failed", job_id)
+            job.update(state='failed', error=str(exc))
+            cls._save(job)
+            raise
+        cls._save(job)
+        return job
+
+    @classmethod
+    def _append(cls, job, output: Path, header, rows, include_header: bool, last_pk: str = None):
+        """Write one batch, then record how far the output and the keyset got"""
+        with open(output, 'ab') as handle:
+            for data in encode_chunks(csv_chunks(header, rows, include_header), job['compress']):
+                handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+            job['offset'] = handle.tell()
+        job['rows'] += len(rows)
+        job['last_pk'] = last_pk
+        cls._save(job)
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,171 @@
+"""
+Request hot-path instrumentation
+
+Request, database, cache and R client metrics exposed in the Prometheus text
+format at /metrics, aggregated across gunicorn workers.
+"""
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by view',
+    ['method', 'view', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request',
+    ['view'], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+DB_TIME = Histogram(
+    'http_request_db_seconds', 'Total database time per request',
+    ['view'], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total', 'Cache lookups by result',
+    ['cache', 'result'],
+)
+R_CLIENT_LATENCY = Histogram(
+    'r_client_request_duration_seconds', 'R analysis server call latency',
+    ['endpoint', 'outcome'], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+R_CLIENT_PAYLOAD = Histogram(
+    'r_client_payload_bytes', 'R analysis server payload size',
+    ['endpoint', 'direction'], buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8),
+)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+
+class QueryRecorder:
+    """``execute_wrapper`` callable counting queries and their total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+def view_label(request) -> str:
+    """URL name of the matched view, else its pattern (bounded label values, unlike the path)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """Records latency and database usage of every request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = view_label(request)
+        REQUEST_LATENCY.labels(request.method, view, str(response.status_code)).observe(elapsed)
+        DB_QUERIES.labels(view).observe(recorder.count)
+        DB_TIME.labels(view).observe(recorder.duration)
+        return response
+
+    async def __acall__(self, request):
+        # Under ASGI the ORM runs on sync_to_async threads, out of reach of
+        # execute_wrapper here: only latency is recorded
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        REQUEST_LATENCY.labels(request.method, view_label(request), str(response.status_code)).observe(
+            time.perf_counter() - start
+        )
+        return response
+
+
+class InstrumentedCacheMixin:
+    """Counts hits and misses of get/get_many, labelled with the cache's METRICS_NAME"""
+
+    _MISSING = object()
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._metric_name = params.get('METRICS_NAME', 'default')
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, self._MISSING, version, **kwargs)
+        if value is self._MISSING:
+            CACHE_REQUESTS.labels(self._metric_name, 'miss').inc()
+            return default
+        CACHE_REQUESTS.labels(self._metric_name, 'hit').inc()
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        values = super().get_many(keys, version, **kwargs)
+        if values:
+            CACHE_REQUESTS.labels(self._metric_name, 'hit').inc(len(values))
+        if len(keys) > len(values):
+            CACHE_REQUESTS.labels(self._metric_name, 'miss').inc(len(keys) - len(values))
+        return values
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:
+    pass
+else:
+    class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+        pass
+
+
+def observe_r_call(endpoint: str, seconds: float, outcome: str, request_bytes: int = 0, response_bytes: int = 0):
+    R_CLIENT_LATENCY.labels(endpoint, outcome).observe(seconds)
+    R_CLIENT_PAYLOAD.labels(endpoint, 'request').observe(request_bytes)
+    if response_bytes:
+        R_CLIENT_PAYLOAD.labels(endpoint, 'response').observe(response_bytes)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint guarded by METRICS_TOKEN (Bearer); open only with DEBUG and no token"""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=404)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=403)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,94 @@
+"""
+Query layer for the admin user listing
+
+A page of users with their roles, recent activities and login IPs is loaded
+in a fixed number of queries.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Prefetch, Subquery, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from apps.authentication.models import UserActivity
+
+from .models import UserLoginHistory, UserRoleAssignment
+
+User = get_user_model()
+
+
+class UserListingService:
+    """Service for building admin user listings with bounded related data"""
+
+    RECENT_ACTIVITIES = 5
+    RECENT_IPS = 5
+
+    @classmethod
+    def queryset(cls, queryset=None):
+        """Users with login counts annotated and bounded prefetches attached"""
+        queryset = User.objects.all() if queryset is None else queryset
+        login_counts = (
+            UserLoginHistory.objects.filter(user=OuterRef('pk'), is_successful=True)
+            .order_by().values('user').annotate(total=Count('pk')).values('total')
+        )
+        recent_activities = (
+            UserActivity.objects.only('user_id', 'activity_type', 'description', 'created_at')
+            .annotate(rank=Window(RowNumber(), partition_by=F('user_id'), order_by=F('created_at').desc()))
+            .filter(rank__lte=cls.RECENT_ACTIVITIES)
+            .order_by('user_id', 'rank')
+        )
+        return queryset.annotate(
+            total_logins=Coalesce(Subquery(login_counts, output_field=IntegerField()), Value(0)),
+        ).prefetch_related(
+            Prefetch('role_assignments', queryset=UserRoleAssignment.objects.select_related('role', 'assigned_by')),
+            Prefetch('activities', queryset=recent_activities, to_attr='recent_activity_list'),
+        )
+
+    @classmethod
+    def attach_recent_ips(cls, users: Iterable) -> List:
+        """Set ``recent_ips`` on every user of a page with one query"""
+        users = list(users)
+        ips = cls.recent_ips([user.pk for user in users])
+        for user in users:
+            user.recent_ips = ips.get(str(user.pk), [])
+        return users
+
+    @classmethod
+    def recent_ips(cls, user_ids: List) -> Dict:
+        """``{str(user_id): [ip, ...]}``, most recently used distinct IPs first"""
+        if not user_ids:
+            return {}
+        if connection.vendor == 'postgresql':
+            rows = cls._recent_ips_lateral(user_ids)
+        else:
+            rows = (
+                UserLoginHistory.objects.filter(user_id__in=user_ids, is_successful=True)
+                .values('user_id', 'ip_address')
+                .annotate(last_seen=Max('login_at'))
+                .annotate(rank=Window(RowNumber(), partition_by=F('user_id'), order_by=F('last_seen').desc()))
+                .filter(rank__lte=cls.RECENT_IPS)
+                .order_by('user_id', 'rank')
+                .values_list('user_id', 'ip_address')
+            )
+        result = defaultdict(list)
+        for user_id, ip_address in rows:
+            result[str(user_id)].append(ip_address)
+        return result
+
+    @classmethod
+    def _recent_ips_lateral(cls, user_ids: List):
+        """Per-user LIMIT through LATERAL, served by the (user, -login_at) index"""
+        table = UserLoginHistory._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT u.id, ips.ip_address FROM unnest(%s::uuid[]) AS u(id) '
+                f'CROSS JOIN LATERAL ('
+                f'  SELECT h.ip_address, MAX(h.login_at) AS last_seen FROM "{table}" h '
+                f'  WHERE h.user_id = u.id AND h.is_successful '
+                f'  GROUP BY h.ip_address ORDER BY last_seen DESC LIMIT %s'
+                f') ips ORDER BY u.id, ips.last_seen DESC',
+                [[str(user_id) for user_id in user_ids], cls.RECENT_IPS],
+            )
+            return cursor.fetchall()
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.admin_management.retention import AuditRetentionService
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming audit partitions and archive months older than AUDIT_RETENTION_MONTHS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='List expired months without archiving')
+        parser.add_argument('--restore', nargs=2, metavar=('TABLE', 'YYYY-MM'),
+                            help='Load an archived month back into its table')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            table, month = options['restore']
+            try:
+                start = datetime.strptime(month, '%Y-%m').replace(tzinfo=timezone.utc)
+                rows = AuditRetentionService.restore(table, start)
+            except (ValueError, LookupError, FileNotFoundError) as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(f'Restored {rows} rows into {table} for {month}'))
+            return
+
+        if not options['dry_run']:
+            AuditRetentionService.ensure_partitions()
+        results = AuditRetentionService.archive(dry_run=options['dry_run'])
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        for result in results:
+            target = f" -> {result['path']}" if result['path'] else ''
+            self.stdout.write(f"{verb} {result['rows']} rows of {result['table']} for {result['month']}{target}")
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} months processed'))
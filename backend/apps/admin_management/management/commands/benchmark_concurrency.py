@@ -0,0 +1,104 @@
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent requests at one or more running deployments (e.g. the sync and the '
+        'SERVER_MODE=asgi gunicorn) and report throughput and latency percentiles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='Base URLs, e.g. http://localhost:8000 http://localhost:8001')
+        parser.add_argument('--path', default='/api/analytics/r/descriptive/')
+        parser.add_argument('--method', default='POST', choices=['GET', 'POST'])
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--token', help='JWT access token sent as Bearer')
+        parser.add_argument(
+            '--fake-r-server', type=int, metavar='PORT',
+            help='Also run a fake R server on PORT (point the deployments at it with R_ANALYSIS_URL)',
+        )
+        parser.add_argument('--r-delay', type=float, default=0.5, help='Fake R server response delay, seconds')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        runner = None
+        if options['fake_r_server']:
+            runner = await self.start_fake_r_server(options['fake_r_server'], options['r_delay'])
+        try:
+            for target in options['targets']:
+                self.report(target, options, await self.load(target, options))
+        finally:
+            if runner is not None:
+                await runner.cleanup()
+
+    async def load(self, target, options):
+        url = target.rstrip('/') + options['path']
+        headers = {'Content-Type': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f"Bearer {options['token']}"
+        body = json.dumps({'data': [[1, 2], [3, 4]], 'variables': {}, 'parameters': {}})
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        latencies, statuses = [], {}
+
+        async def one(session):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with session.request(options['method'], url, data=body, headers=headers) as response:
+                        await response.read()
+                        status = response.status
+                except aiohttp.ClientError as exc:
+                    status = type(exc).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        connector = aiohttp.TCPConnector(limit=options['concurrency'])
+        async with aiohttp.ClientSession(connector=connector) as session:
+            started = time.perf_counter()
+            await asyncio.gather(*(one(session) for _ in range(options['requests'])))
+            elapsed = time.perf_counter() - started
+        return elapsed, sorted(latencies), statuses
+
+    def report(self, target, options, result):
+        elapsed, latencies, statuses = result
+
+        def percentile(fraction):
+            return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] * 1000
+
+        self.stdout.write(
+            f"{target}: {options['requests']} requests, concurrency {options['concurrency']}, "
+            f"{elapsed:.2f} s, {options['requests'] / elapsed:.1f} req/s"
+        )
+        self.stdout.write(
+            f"  latency ms: p50 {percentile(0.5):.1f}, p95 {percentile(0.95):.1f}, "
+            f"p99 {percentile(0.99):.1f}, max {latencies[-1] * 1000:.1f}, "
+            f"mean {statistics.mean(latencies) * 1000:.1f}"
+        )
+        self.stdout.write(f"  statuses: {', '.join(f'{status}={count}' for status, count in sorted(statuses.items(), key=str))}")
+
+    async def start_fake_r_server(self, port, delay):
+        """Answers every analysis after ``delay`` seconds, like a busy R server"""
+        async def analysis(request):
+            await request.read()
+            await asyncio.sleep(delay)
+            return web.json_response({'status': 'success', 'results': {}})
+
+        app = web.Application()
+        app.router.add_post('/{endpoint:.*}', analysis)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        self.stdout.write(f'Fake R server on http://127.0.0.1:{port} ({delay:.2f} s per analysis)')
+        return runner
@@ -0,0 +1,45 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.admin_management.access import PermissionResolver
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Time N permission checks for one user as a single request would run them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='User to check')
+        parser.add_argument('--checks', type=int, default=10000)
+        parser.add_argument('--project', help='Analysis project id for project-level checks')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        # Cold: versions + cached entry (or compilation), as on the first check of a request
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            compiled = PermissionResolver.for_user(user)
+            cold = time.perf_counter() - started
+        codenames = sorted(compiled.registry) or ['view_results']
+
+        granted = 0
+        started = time.perf_counter()
+        for index in range(options['checks']):
+            if PermissionResolver.has_perm(user, codenames[index % len(codenames)], project=options['project']):
+                granted += 1
+        warm = time.perf_counter() - started
+
+        self.stdout.write(f'Resolve: {cold * 1000:.2f} ms, {len(queries)} queries')
+        self.stdout.write(
+            f"{options['checks']} checks: {warm * 1000:.2f} ms "
+            f"({warm / options['checks'] * 1e6:.2f} us/check), {granted} granted"
+        )
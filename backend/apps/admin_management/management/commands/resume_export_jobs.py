@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.admin_management.exports import ExportJobService
+
+
+class Command(BaseCommand):
+    help = 'Resume background CSV exports that are pending, were interrupted or failed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', help='Only these jobs (default: every unfinished job)')
+
+    def handle(self, *args, **options):
+        job_ids = options['job_ids'] or [job['id'] for job in ExportJobService.unfinished()]
+        for job_id in job_ids:
+            job = ExportJobService.run(job_id)
+            if job is None:
+                self.stderr.write(f'{job_id}: not found')
+                continue
+            self.stdout.write(f"{job_id}: {job['state']}, {job['rows']} rows")
+        self.stdout.write(self.style.SUCCESS(f'{len(job_ids)} export jobs processed'))
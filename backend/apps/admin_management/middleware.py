@@ -1,7 +1,10 @@
 import json
+import logging
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.contenttypes.models import ContentType
-from .models import AdminActivity
+from .audit import AuditLogService
+
+logger = logging.getLogger(__name__)
 
 
 class AdminActivityMiddleware(MiddlewareMixin):
@@ -51,9 +54,9 @@ class AdminActivityMiddleware(MiddlewareMixin):
         
         try:
             self._log_admin_activity(request, response)
-        except Exception as e:
+        except Exception:
             # Don't break the request if logging fails
-            print(f"Failed to log admin activity: {e}")
+            logger.exception("Failed to log admin activity")
         
         return response
     
@@ -76,14 +79,14 @@ class AdminActivityMiddleware(MiddlewareMixin):
         description = self._create_description(request, action_type, details)
         
         # Get target object info if available
-        content_type, object_id = self._extract_target_object(request, details)
+        content_type_id, object_id = self._extract_target_object(request, details)
         
-        # Create admin activity record
-        AdminActivity.objects.create(
+        # Queue the admin activity record (written in batches off the request path)
+        AuditLogService.log(
             admin_user=request.user,
             action_type=action_type,
             description=description,
-            content_type=content_type,
+            content_type_id=content_type_id,
             object_id=object_id,
             details=details,
             ip_address=ip_address,
@@ -239,23 +242,14 @@ class AdminActivityMiddleware(MiddlewareMixin):
                 object_id = part
                 break
         
-        # Try to determine content type from path
-        content_type = None
+        # Try to determine content type from path (ids are cached per process)
+        content_type_id = None
         if '/users/' in request.path:
-            try:
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                content_type = ContentType.objects.get_for_model(User)
-            except:
-                pass
+            content_type_id = AuditLogService.content_type_id(settings.AUTH_USER_MODEL)
         elif '/campaigns/' in request.path:
-            try:
-                from apps.surveys.models import SurveyCampaign
-                content_type = ContentType.objects.get_for_model(SurveyCampaign)
-            except:
-                pass
+            content_type_id = AuditLogService.content_type_id('surveys.SurveyCampaign')
         
-        return content_type, object_id
+        return content_type_id, object_id
     
     def _is_uuid(self, value):
         """Check if value is a UUID"""
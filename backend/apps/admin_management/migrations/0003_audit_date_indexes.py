@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:42
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_management', '0002_adminactivity_created_at'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userloginhistory',
+            name='login_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='adminactivity',
+            index=models.Index(fields=['-created_at'], name='admin_activ_created_d945cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userloginhistory',
+            index=models.Index(fields=['-login_at'], name='user_login__login_a_0805c6_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+AUDIT_TABLES = (
+    ('admin_management', 'AdminActivity', 'created_at'),
+    ('admin_management', 'UserLoginHistory', 'login_at'),
+    ('authentication', 'UserActivity', 'created_at'),
+)
+MONTHS_AHEAD = 3
+
+
+def month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def convert_to_partitioned(schema_editor, model, date_field):
+    """
+    Rebuild the table as a monthly range-partitioned table.
+
+    The primary key becomes ``(id, <date column>)`` because every unique
+    constraint on a partitioned table must include the partition key; Django
+    keeps addressing rows by ``id`` alone.
+    """
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    column = model._meta.get_field(date_field).column
+    legacy = f'{table}_legacy'
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+            [table],
+        )
+        if cursor.fetchone() is not None:
+            return
+
+        schema_editor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        schema_editor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE ({qn(column)})'
+        )
+        schema_editor.execute(
+            f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_part_pkey")} '
+            f'PRIMARY KEY ({qn(model._meta.pk.column)}, {qn(column)})'
+        )
+        schema_editor.execute(f'CREATE TABLE {qn(table + "_pdefault")} PARTITION OF {qn(table)} DEFAULT')
+
+        cursor.execute(f'SELECT MIN({qn(column)}) FROM {qn(legacy)}')
+        oldest = cursor.fetchone()[0]
+        month = month_start(oldest or timezone.now())
+        last = add_months(month_start(timezone.now()), MONTHS_AHEAD)
+        while month <= last:
+            schema_editor.execute(
+                f'CREATE TABLE IF NOT EXISTS {qn(f"{table}_p{month:%Y%m}")} PARTITION OF {qn(table)} '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+
+        schema_editor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}')
+        schema_editor.execute(f'DROP TABLE {qn(legacy)}')
+
+    # Indexes and foreign keys went with the legacy table; recreate them on the parent
+    for field in model._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            remote = field.remote_field.model._meta
+            target = remote.get_field(field.remote_field.field_name).column
+            schema_editor.execute(
+                f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f"{table}_{field.column}_fk")} '
+                f'FOREIGN KEY ({qn(field.column)}) REFERENCES {qn(remote.db_table)} ({qn(target)}) '
+                f'DEFERRABLE INITIALLY DEFERRED'
+            )
+        if field.db_index and not field.primary_key:
+            schema_editor.execute(f'CREATE INDEX {qn(f"{table}_{field.column}_idx")} ON {qn(table)} ({qn(field.column)})')
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def partition_audit_tables(apps, schema_editor):
+    """Monthly range partitions on PostgreSQL; other databases keep plain tables"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for app_label, model_name, date_field in AUDIT_TABLES:
+        convert_to_partitioned(schema_editor, apps.get_model(app_label, model_name), date_field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_management', '0003_audit_date_indexes'),
+        ('authentication', '0003_useractivity_indexes'),
+    ]
+
+    operations = [
+        # Partitioned tables stay usable as-is, so reversing leaves them in place
+        migrations.RunPython(partition_audit_tables, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.utils import timezone
 import uuid
 
 
@@ -70,8 +71,8 @@ class AdminActivity(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     
-    # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Timestamps (set when the action happened; records are written in batches later)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'admin_activities'
@@ -82,6 +83,7 @@ class AdminActivity(models.Model):
             models.Index(fields=['admin_user', '-created_at']),
             models.Index(fields=['action_type', '-created_at']),
             models.Index(fields=['content_type', 'object_id']),
+            models.Index(fields=['-created_at']),
         ]
     
     def __str__(self):
@@ -159,12 +161,9 @@ class SystemConfiguration(models.Model):
     
     @classmethod
     def get_config(cls, key, default=None):
-        """Get configuration value by key"""
-        try:
-            config = cls.objects.get(key=key, is_active=True)
-            return config.value
-        except cls.DoesNotExist:
-            return default
+        """Get configuration value by key (from the per-process snapshot)"""
+        from .config_cache import ConfigCache
+        return ConfigCache.get(key, default)
     
     @classmethod
     def set_config(cls, key, value, user=None, **kwargs):
@@ -246,16 +245,19 @@ class BrandConfiguration(models.Model):
     
     @classmethod
     def get_active_config(cls):
-        """Get the currently active brand configuration"""
-        return cls.objects.filter(is_active=True).first()
+        """Get the currently active brand configuration (from the per-process snapshot)"""
+        from .config_cache import ConfigCache
+        return ConfigCache.active_brand()
     
     def activate(self):
         """Activate this brand configuration"""
-        # Deactivate all other configs
-        self.__class__.objects.update(is_active=False)
-        # Activate this one
-        self.is_active = True
-        self.save()
+        from .config_cache import ConfigCache
+        with ConfigCache.batch():
+            # Deactivate all other configs
+            self.__class__.objects.update(is_active=False)
+            # Activate this one
+            self.is_active = True
+            self.save()
 
 
 class UserRole(models.Model):
@@ -402,7 +404,7 @@ class UserLoginHistory(models.Model):
     
     # Session tracking
     session_key = models.CharField(max_length=255, blank=True)
-    login_at = models.DateTimeField(auto_now_add=True)
+    login_at = models.DateTimeField(default=timezone.now, editable=False)
     logout_at = models.DateTimeField(null=True, blank=True)
     session_duration = models.DurationField(null=True, blank=True)
     
@@ -419,6 +421,7 @@ class UserLoginHistory(models.Model):
             models.Index(fields=['user', '-login_at']),
             models.Index(fields=['ip_address', '-login_at']),
             models.Index(fields=['is_successful', '-login_at']),
+            models.Index(fields=['-login_at']),
         ]
     
     def __str__(self):
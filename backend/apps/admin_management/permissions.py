@@ -0,0 +1,40 @@
+from rest_framework import permissions
+
+from .access import PermissionResolver
+
+
+class HasRolePermission(permissions.BasePermission):
+    """
+    Grants access when the user holds every codename the view requires
+    through their roles. ``required_permissions`` on the view is a list of
+    codenames, or a dict of them per action (``'default'`` for the rest).
+    """
+    
+    def has_permission(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return False
+        return PermissionResolver.has_perms(request.user, self.required(view))
+    
+    @staticmethod
+    def required(view):
+        required = getattr(view, 'required_permissions', ())
+        if isinstance(required, dict):
+            return required.get(getattr(view, 'action', None), required.get('default', ()))
+        return required
+
+
+class HasProjectPermission(HasRolePermission):
+    """
+    Object-level check for analysis projects: the user owns the project or
+    their collaboration grants ``project_permissions`` (list, or dict per action).
+    """
+    
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated)
+    
+    def has_object_permission(self, request, view, obj):
+        required = getattr(view, 'project_permissions', ())
+        if isinstance(required, dict):
+            required = required.get(getattr(view, 'action', None), required.get('default', ()))
+        project = getattr(obj, 'project', obj)
+        return PermissionResolver.has_perms(request.user, required, project=project)
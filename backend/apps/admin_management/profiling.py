@@ -0,0 +1,212 @@
+"""
+SQL profiler for development and staging
+
+Per-endpoint reports of slow and repeated (N+1) statements, and query
+budgets for tests.
+"""
+import json
+import logging
+import re
+import time
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from django.utils.html import escape
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+STACK_DEPTH = 8
+
+
+def fingerprint(sql: str) -> str:
+    """Statement shape: literals become ``?``, IN lists ``IN (...)``"""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST.sub('IN (...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def project_stack() -> List[str]:
+    """Innermost project frames (outside site-packages and this module)"""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        f'{frame.filename[len(base_dir) + 1:]}:{frame.lineno} in {frame.name}'
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+        and frame.filename != __file__
+    ]
+    return frames[-STACK_DEPTH:]
+
+
+def endpoint_name(request) -> str:
+    """File-system safe ``<METHOD>_<view name or path>`` for per-endpoint reports"""
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match is not None and match.view_name else request.path
+    return f"{request.method}_{re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')}"
+
+
+class QueryCapture:
+    """``execute_wrapper`` callable recording statements, durations and stacks"""
+
+    def __init__(self, with_stacks: bool = True):
+        self.with_stacks = with_stacks
+        self.queries: List[Dict[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'duration_ms': (time.perf_counter() - start) * 1000,
+                'database': context['connection'].alias,
+                'stack': project_stack() if self.with_stacks else [],
+            })
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def __len__(self):
+        return len(self.queries)
+
+    def analyze(self, repeat_threshold: int = None, slow_ms: float = None) -> Dict[str, Any]:
+        repeat_threshold = repeat_threshold or getattr(settings, 'QUERY_PROFILER_REPEAT_THRESHOLD', 3)
+        slow_ms = getattr(settings, 'QUERY_PROFILER_SLOW_MS', 100) if slow_ms is None else slow_ms
+
+        groups = defaultdict(list)
+        for query in self.queries:
+            groups[fingerprint(query['sql'])].append(query)
+
+        repeated = [
+            {
+                'fingerprint': shape,
+                'count': len(queries),
+                'total_ms': round(sum(query['duration_ms'] for query in queries), 3),
+                'example': queries[0]['sql'],
+                'stack': queries[0]['stack'],
+            }
+            for shape, queries in groups.items() if len(queries) >= repeat_threshold
+        ]
+        repeated.sort(key=lambda group: group['count'], reverse=True)
+        slow = [dict(query, duration_ms=round(query['duration_ms'], 3))
+                for query in self.queries if query['duration_ms'] >= slow_ms]
+        return {
+            'query_count': len(self.queries),
+            'total_ms': round(sum(query['duration_ms'] for query in self.queries), 3),
+            'distinct_fingerprints': len(groups),
+            'repeated': repeated,
+            'slow': slow,
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A test or block ran more statements than its budget"""
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    """Fail when the block runs more than ``max_queries`` statements; also usable as a decorator"""
+    with QueryCapture().capture() as capture:
+        yield capture
+    if len(capture) > max_queries:
+        report = capture.analyze(repeat_threshold=2)
+        lines = [f'{len(capture)} queries run, budget is {max_queries}']
+        for group in report['repeated']:
+            lines.append(f"  {group['count']}x {group['fingerprint']}")
+            lines.extend(f'      {frame}' for frame in group['stack'][-3:])
+        raise QueryBudgetExceeded('\n'.join(lines))
+
+
+class QueryReportWriter:
+    """Writes per-endpoint JSON and HTML reports"""
+
+    @classmethod
+    def report_dir(cls) -> Path:
+        return Path(getattr(settings, 'QUERY_PROFILER_DIR', Path(settings.BASE_DIR) / 'logs' / 'queries'))
+
+    @classmethod
+    def write(cls, request, report: Dict[str, Any]) -> Path:
+        report = dict(
+            report, method=request.method, path=request.get_full_path(),
+            recorded_at=timezone.now().isoformat(),
+        )
+        directory = cls.report_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        name = endpoint_name(request)
+        (directory / f'{name}.json').write_text(json.dumps(report, indent=2))
+        (directory / f'{name}.html').write_text(cls.render_html(report))
+        return directory / name
+
+    @staticmethod
+    def render_html(report: Dict[str, Any]) -> str:
+        def rows(entries, columns):
+            return ''.join(
+                '<tr>' + ''.join(f'<td>{escape(value(entry))}</td>' for value in columns)
+                + '<td><pre>' + escape('\n'.join(entry['stack'])) + '</pre></td></tr>'
+                for entry in entries
+            )
+
+        return (
+            '<!DOCTYPE html><html><head><meta charset="utf-8">'
+            f"<title>Queries: {escape(report['method'])} {escape(report['path'])}</title>"
+            '<style>body{font-family:sans-serif}td{vertical-align:top;border-top:1px solid #ccc;padding:4px}'
+            'pre{margin:0;font-size:12px}code{white-space:pre-wrap}</style></head><body>'
+            f"<h1>{escape(report['method'])} {escape(report['path'])}</h1>"
+            f"<p>{report['query_count']} queries, {report['total_ms']} ms, "
+            f"{report['distinct_fingerprints']} distinct; recorded {escape(report['recorded_at'])}</p>"
+            '<h2>Repeated statements (N+1)</h2>'
+            '<table><tr><th>Count</th><th>Total ms</th><th>Statement</th><th>Stack</th></tr>'
+            + rows(report['repeated'], (
+                lambda entry: entry['count'], lambda entry: entry['total_ms'], lambda entry: entry['fingerprint'],
+            ))
+            + '</table><h2>Slow statements</h2>'
+            '<table><tr><th>ms</th><th>Database</th><th>Statement</th><th>Stack</th></tr>'
+            + rows(report['slow'], (
+                lambda entry: entry['duration_ms'], lambda entry: entry['database'], lambda entry: entry['sql'],
+            ))
+            + '</table></body></html>'
+        )
+
+
+class QueryProfilerMiddleware:
+    """Profiles each request's SQL and reports N+1 patterns and slow statements"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCapture().capture() as capture:
+            response = self.get_response(request)
+
+        report = capture.analyze()
+        response['X-Query-Count'] = str(report['query_count'])
+        if report['repeated'] or report['slow']:
+            try:
+                path = QueryReportWriter.write(request, report)
+                logger.warning(
+                    "%s %s: %d queries, %d repeated fingerprints, %d slow (report: %s.html)",
+                    request.method, request.path, report['query_count'], len(report['repeated']),
+                    len(report['slow']), path,
+                )
+            except OSError:
+                logger.exception("Could not write query report for %s", request.path)
+        return response
@@ -0,0 +1,26 @@
+"""
+pytest plugin for query budgets (with pytest-django)
+
+Enable with ``-p apps.admin_management.pytest_plugin`` and mark tests with
+``@pytest.mark.query_budget(n)`` (see ``profiling.query_budget``).
+"""
+import pytest
+
+from .profiling import query_budget
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'query_budget(max_queries): fail the test if it runs more than max_queries SQL statements'
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    with query_budget(*marker.args, **marker.kwargs):
+        outcome = yield
+        outcome.get_result()  # The test's own failure takes precedence over the budget
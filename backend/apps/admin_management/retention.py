@@ -0,0 +1,232 @@
+"""
+Retention for the append-only audit tables
+
+Monthly partitions (PostgreSQL) or row ranges of the audit tables are
+archived to compressed files after the retention period and can be restored.
+"""
+import gzip
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AuditTable:
+    model_label: str
+    date_field: str
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def db_table(self) -> str:
+        return self.model._meta.db_table
+
+
+AUDIT_TABLES = (
+    AuditTable('admin_management.AdminActivity', 'created_at'),
+    AuditTable('admin_management.UserLoginHistory', 'login_at'),
+    AuditTable('authentication.UserActivity', 'created_at'),
+)
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f'{table}_p{month:%Y%m}'
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = %s",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table: str) -> List[str]:
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %s ORDER BY c.relname",
+        [table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(cursor, table: str, month: datetime):
+    """Monthly partition [month, next month); dates are generated, never user input"""
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, month)}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+class AuditRetentionService:
+    """Service for audit table partitions, archival and restore"""
+
+    DEFAULT_RETENTION_MONTHS = 12
+    MONTHS_AHEAD = 3
+    EXPORT_CHUNK = 2000
+
+    @classmethod
+    def retention_months(cls) -> int:
+        return getattr(settings, 'AUDIT_RETENTION_MONTHS', cls.DEFAULT_RETENTION_MONTHS)
+
+    @classmethod
+    def archive_dir(cls) -> Path:
+        return Path(getattr(settings, 'AUDIT_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archives' / 'audit'))
+
+    @classmethod
+    def archive_path(cls, table: AuditTable, month: datetime) -> Path:
+        return cls.archive_dir() / table.db_table / f'{month:%Y-%m}.jsonl.gz'
+
+    @staticmethod
+    def uses_partitions() -> bool:
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def table(cls, name: str) -> AuditTable:
+        for table in AUDIT_TABLES:
+            if name in (table.model_label, table.db_table):
+                return table
+        raise LookupError(f'Unknown audit table: {name}')
+
+    @classmethod
+    def month_rows(cls, table: AuditTable, month: datetime):
+        """Rows of one month; the range filter lets PostgreSQL prune to one partition"""
+        return table.model.objects.filter(**{
+            f'{table.date_field}__gte': month,
+            f'{table.date_field}__lt': add_months(month, 1),
+        })
+
+    @classmethod
+    def ensure_partitions(cls, now: datetime = None) -> int:
+        """Create this month's and the next MONTHS_AHEAD partitions; returns tables touched"""
+        if not cls.uses_partitions():
+            return 0
+        current = month_start(now or timezone.now())
+        touched = 0
+        with connection.cursor() as cursor:
+            for table in AUDIT_TABLES:
+                if not is_partitioned(cursor, table.db_table):
+                    continue
+                for offset in range(cls.MONTHS_AHEAD + 1):
+                    month = add_months(current, offset)
+                    try:
+                        with transaction.atomic():
+                            create_partition(cursor, table.db_table, month)
+                    except DatabaseError:
+                        # Rows for that month already landed in the default partition
+                        logger.exception("Could not create %s partition", partition_name(table.db_table, month))
+                touched += 1
+        return touched
+
+    @classmethod
+    def expired_months(cls, table: AuditTable, now: datetime = None) -> List[datetime]:
+        cutoff = add_months(month_start(now or timezone.now()), -cls.retention_months())
+        months = table.model.objects.filter(**{f'{table.date_field}__lt': cutoff}).datetimes(
+            table.date_field, 'month', tzinfo=dt_timezone.utc
+        )
+        return [month_start(month) for month in months]
+
+    @classmethod
+    def archive(cls, now: datetime = None, dry_run: bool = False) -> List[Dict]:
+        """Archive and remove every month older than the retention period"""
+        results = []
+        for table in AUDIT_TABLES:
+            for month in cls.expired_months(table, now):
+                if dry_run:
+                    rows = cls.month_rows(table, month).count()
+                    results.append({'table': table.db_table, 'month': f'{month:%Y-%m}', 'rows': rows, 'path': None})
+                else:
+                    results.append(cls.archive_month(table, month))
+        return results
+
+    @classmethod
+    def archive_month(cls, table: AuditTable, month: datetime) -> Dict:
+        path = cls.archive_path(table, month)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+
+        rows = 0
+        with gzip.open(temporary, 'wt', encoding='utf-8') as archive:
+            for row in cls.month_rows(table, month).order_by().values().iterator(chunk_size=cls.EXPORT_CHUNK):
+                archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                rows += 1
+        # Only a complete export replaces an earlier file for the same month
+        os.replace(temporary, path)
+
+        cls._drop_month(table, month)
+        logger.info("Archived %d rows of %s for %s to %s", rows, table.db_table, f'{month:%Y-%m}', path)
+        return {'table': table.db_table, 'month': f'{month:%Y-%m}', 'rows': rows, 'path': str(path)}
+
+    @classmethod
+    def _drop_month(cls, table: AuditTable, month: datetime):
+        name = partition_name(table.db_table, month)
+        with transaction.atomic():
+            if cls.uses_partitions():
+                with connection.cursor() as cursor:
+                    if name in list_partitions(cursor, table.db_table):
+                        cursor.execute(f'ALTER TABLE "{table.db_table}" DETACH PARTITION "{name}"')
+                        cursor.execute(f'DROP TABLE "{name}"')
+                        return
+            # No dedicated partition (default partition or portable mode): delete the range
+            cls.month_rows(table, month).delete()
+
+    @classmethod
+    def read_archive(cls, table: AuditTable, month: datetime) -> Iterator[Dict]:
+        with gzip.open(cls.archive_path(table, month), 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                yield json.loads(line)
+
+    @classmethod
+    def restore(cls, table_name: str, month: datetime, batch_size: int = 1000) -> int:
+        """Load an archived month back into its table; returns rows restored"""
+        table = cls.table(table_name)
+        model = table.model
+        if cls.uses_partitions():
+            with connection.cursor() as cursor:
+                if is_partitioned(cursor, table.db_table):
+                    create_partition(cursor, table.db_table, month)
+
+        restored = 0
+        batch = []
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        for row in cls.read_archive(table, month):
+            values = {name: fields[name].to_python(value) for name, value in row.items() if name in fields}
+            batch.append(model(**values))
+            if len(batch) >= batch_size:
+                restored += len(model.objects.bulk_create(batch, ignore_conflicts=True))
+                batch = []
+        if batch:
+            restored += len(model.objects.bulk_create(batch, ignore_conflicts=True))
+        return restored
+
+    @classmethod
+    def maintain(cls, now: Optional[datetime] = None) -> Dict:
+        return {
+            'partitions': cls.ensure_partitions(now),
+            'archived': cls.archive(now),
+        }
@@ -0,0 +1,274 @@
+"""
+Opt-in sampling profiler for individual requests
+
+Stack samples of profiled requests are stored per endpoint as collapsed
+stacks and speedscope JSON, listed at /api/admin/profiles/.
+"""
+import json
+import logging
+import os
+import random
+import re
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils import timezone
+
+from .profiling import endpoint_name
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Counts the stacks of one thread, sampled at a fixed interval"""
+
+    _active = False  # SIGPROF has one handler per process: one signal sampler at a time
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.mode = None
+        self.started_at = self.duration = 0.0
+        self._labels: Dict[Any, str] = {}
+        self._previous_handler = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        if (hasattr(signal, 'setitimer') and not StackSampler._active
+                and threading.current_thread() is threading.main_thread()):
+            StackSampler._active = True
+            self.mode = 'signal'
+            self._previous_handler = signal.signal(signal.SIGPROF, self._on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.mode = 'thread'
+            target = threading.get_ident()
+            self._thread = threading.Thread(
+                target=self._poll, args=(target,), name='stack-sampler', daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self.mode == 'signal':
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+            StackSampler._active = False
+        elif self.mode == 'thread':
+            self._stop.set()
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _on_signal(self, signum, frame):
+        self._record(frame)
+
+    def _poll(self, target: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is not None:
+                self._record(frame)
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = self._label(code)
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        self.samples[tuple(stack)] += 1
+
+    @staticmethod
+    def _label(code) -> str:
+        filename = code.co_filename
+        base_dir = str(settings.BASE_DIR)
+        if filename.startswith(base_dir):
+            filename = filename[len(base_dir) + 1:]
+        elif 'site-packages' in filename:
+            filename = filename.split('site-packages' + os.sep, 1)[1]
+        name = getattr(code, 'co_qualname', code.co_name)
+        # ';' separates frames in collapsed stacks
+        return f'{name} ({filename}:{code.co_firstlineno})'.replace(';', ',')
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def collapsed(self) -> str:
+        """One ``frame;frame;frame count`` line per distinct stack"""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in self.samples.most_common())
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frames, index = [], {}
+        samples, weights = [], []
+        for stack, count in self.samples.items():
+            indices = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({'name': label})
+                indices.append(index[label])
+            samples.append(indices)
+            weights.append(round(count * self.interval, 6))
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': round(sum(weights), 6),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'exporter': 'ncskit sampling profiler',
+        }
+
+
+class ProfileStore:
+    """Per-endpoint profile files: <id>.json (metadata), .collapsed, .speedscope.json"""
+
+    OUTPUTS = {
+        'collapsed': ('.collapsed', 'text/plain'),
+        'speedscope': ('.speedscope.json', 'application/json'),
+    }
+    NAME_PATTERN = re.compile(r'[A-Za-z0-9_.-]+')
+
+    @classmethod
+    def profile_dir(cls) -> Path:
+        return Path(getattr(settings, 'SAMPLING_PROFILER_DIR', Path(settings.BASE_DIR) / 'logs' / 'profiles'))
+
+    @classmethod
+    def save(cls, request, sampler: StackSampler, status_code: int = None) -> Dict[str, Any]:
+        endpoint = endpoint_name(request)
+        profile_id = f"{timezone.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        meta = {
+            'id': profile_id,
+            'endpoint': endpoint,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': status_code,
+            'mode': sampler.mode,
+            'interval': sampler.interval,
+            'samples': sampler.sample_count,
+            'distinct_stacks': len(sampler.samples),
+            'duration': round(sampler.duration, 6),
+            'recorded_at': timezone.now().isoformat(),
+        }
+        directory = cls.profile_dir() / endpoint
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f'{profile_id}.collapsed').write_text(sampler.collapsed())
+        (directory / f'{profile_id}.speedscope.json').write_text(
+            json.dumps(sampler.speedscope(f"{request.method} {meta['path']}"))
+        )
+        (directory / f'{profile_id}.json').write_text(json.dumps(meta))
+        cls._prune(directory)
+        return meta
+
+    @classmethod
+    def _prune(cls, directory: Path):
+        keep = getattr(settings, 'SAMPLING_PROFILER_KEEP', 20)
+        metas = sorted(path for path in directory.glob('*.json') if not path.name.endswith('.speedscope.json'))
+        for meta_path in metas[:-keep] if len(metas) > keep else ():
+            profile_id = meta_path.stem
+            for suffix in ('.json', '.collapsed', '.speedscope.json'):
+                (directory / f'{profile_id}{suffix}').unlink(missing_ok=True)
+
+    @classmethod
+    def valid_name(cls, name: Optional[str]) -> bool:
+        """Endpoint names and profile ids are single path components of ``[A-Za-z0-9_.-]``"""
+        return bool(name) and name not in ('.', '..') and cls.NAME_PATTERN.fullmatch(name) is not None
+
+    @classmethod
+    def _contained(cls, path: Path) -> bool:
+        return path.resolve().is_relative_to(cls.profile_dir().resolve())
+
+    @classmethod
+    def list(cls, endpoint: str = None) -> List[Dict[str, Any]]:
+        """Profile metadata, newest first; nothing for an invalid endpoint name"""
+        if endpoint and not cls.valid_name(endpoint):
+            return []
+        pattern = f'{endpoint}/*.json' if endpoint else '*/*.json'
+        profiles = []
+        for path in cls.profile_dir().glob(pattern):
+            if path.name.endswith('.speedscope.json') or not cls._contained(path):
+                continue
+            try:
+                profiles.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda profile: profile['id'], reverse=True)
+
+    @classmethod
+    def get(cls, profile_id: str) -> Optional[Tuple[Dict[str, Any], Path]]:
+        """(metadata, directory) of a profile, or None"""
+        if not cls.valid_name(profile_id):
+            return None
+        for path in cls.profile_dir().glob(f'*/{profile_id}.json'):
+            if not cls._contained(path):
+                continue
+            try:
+                return json.loads(path.read_text()), path.parent
+            except (OSError, ValueError):
+                return None
+        return None
+
+
+class SamplingProfilerMiddleware:
+    """Samples the stacks of requests that ask for it (or are picked at random)"""
+
+    HEADER = 'X-Profile'
+    QUERY_PARAM = '_profile'
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SAMPLING_PROFILER_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.interval = getattr(settings, 'SAMPLING_PROFILER_INTERVAL', 0.005)
+        self.rate = getattr(settings, 'SAMPLING_PROFILER_RATE', 0.0)
+        self.token = getattr(settings, 'SAMPLING_PROFILER_TOKEN', '')
+
+    def __call__(self, request):
+        if not self.wants_profile(request):
+            return self.get_response(request)
+
+        sampler = StackSampler(self.interval).start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        try:
+            profile = ProfileStore.save(request, sampler, response.status_code)
+            response['X-Profile-Id'] = profile['id']
+        except OSError:
+            logger.exception("Could not store profile for %s", request.path)
+        return response
+
+    def wants_profile(self, request) -> bool:
+        requested = request.headers.get(self.HEADER) or request.GET.get(self.QUERY_PARAM)
+        if requested:
+            if self.token:
+                return requested == self.token
+            return settings.DEBUG
+        return self.rate > 0 and random.random() < self.rate
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from .listing import UserListingService
 from .models import (
     AdminActivity, SystemConfiguration, BrandConfiguration,
     UserRole, Permission, UserRoleAssignment, UserLoginHistory
@@ -234,6 +236,14 @@ class UserLoginHistorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'login_at']
 
 
+class UserManagementListSerializer(serializers.ListSerializer):
+    """Loads recent login IPs for the whole page in one query"""
+    
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        return super().to_representation(UserListingService.attach_recent_ips(iterable))
+
+
 class UserManagementSerializer(serializers.ModelSerializer):
     """Extended user serializer for admin management"""
     full_name = serializers.ReadOnlyField()
@@ -253,10 +263,13 @@ class UserManagementSerializer(serializers.ModelSerializer):
             'recent_activities', 'login_stats'
         ]
         read_only_fields = ['id', 'date_joined', 'created_at', 'updated_at']
+        list_serializer_class = UserManagementListSerializer
     
     def get_recent_activities(self, obj):
         """Get recent user activities"""
-        activities = obj.activities.all()[:5]
+        activities = getattr(obj, 'recent_activity_list', None)
+        if activities is None:
+            activities = obj.activities.all()[:UserListingService.RECENT_ACTIVITIES]
         return [{
             'activity_type': activity.activity_type,
             'description': activity.description,
@@ -265,14 +278,16 @@ class UserManagementSerializer(serializers.ModelSerializer):
     
     def get_login_stats(self, obj):
         """Get user login statistics"""
-        login_history = obj.login_history.filter(is_successful=True)
+        total_logins = getattr(obj, 'total_logins', None)
+        if total_logins is None:
+            total_logins = obj.login_history.filter(is_successful=True).count()
+        recent_ips = getattr(obj, 'recent_ips', None)
+        if recent_ips is None:
+            recent_ips = UserListingService.recent_ips([obj.pk]).get(str(obj.pk), [])
         return {
-            'total_logins': login_history.count(),
+            'total_logins': total_logins,
             'last_login': obj.last_login,
-            'recent_ips': list(
-                login_history.values_list('ip_address', flat=True)
-                .distinct()[:5]
-            )
+            'recent_ips': recent_ips
         }
 
 
@@ -292,4 +307,6 @@ class SystemMetricsSerializer(serializers.Serializer):
     active_campaigns = serializers.IntegerField()
     total_revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
     system_health = SystemHealthSerializer()
-    performance_metrics = serializers.DictField()
\ No newline at end of file
+    performance_metrics = serializers.DictField()
+    computed_at = serializers.DateTimeField()
+    age_seconds = serializers.FloatField()
\ No newline at end of file
@@ -2,9 +2,9 @@ from django.contrib.auth import get_user_model
 from django.db.models import Count, Q, Avg
 from django.utils import timezone
 from datetime import datetime, timedelta
-from .models import UserLoginHistory, AdminActivity, UserRoleAssignment
-import csv
-import io
+from .bulk import BulkUserOperationService
+from .exports import TableExport
+from .models import UserLoginHistory, AdminActivity
 
 User = get_user_model()
 
@@ -95,160 +95,65 @@ class UserManagementService:
     
     @staticmethod
     def bulk_user_operation(user_ids, operation, admin_user, **kwargs):
-        """Perform bulk operations on users"""
-        users = User.objects.filter(id__in=user_ids)
-        results = {
-            'success_count': 0,
-            'error_count': 0,
-            'errors': [],
-            'processed_users': []
-        }
-        
-        for user in users:
-            try:
-                if operation == 'suspend':
-                    user.is_active = False
-                    user.save()
-                    
-                    # Log admin activity
-                    AdminActivity.objects.create(
-                        admin_user=admin_user,
-                        action_type='user_suspended',
-                        description=f'Suspended user {user.email}',
-                        details={'user_id': str(user.id), 'user_email': user.email}
-                    )
-                
-                elif operation == 'activate':
-                    user.is_active = True
-                    user.save()
-                    
-                    AdminActivity.objects.create(
-                        admin_user=admin_user,
-                        action_type='user_activated',
-                        description=f'Activated user {user.email}',
-                        details={'user_id': str(user.id), 'user_email': user.email}
-                    )
-                
-                elif operation == 'delete':
-                    # Soft delete by deactivating
-                    user.is_active = False
-                    user.save()
-                    
-                    AdminActivity.objects.create(
-                        admin_user=admin_user,
-                        action_type='user_deleted',
-                        description=f'Deleted user {user.email}',
-                        details={'user_id': str(user.id), 'user_email': user.email}
-                    )
-                
-                elif operation == 'change_subscription':
-                    subscription_type = kwargs.get('subscription_type')
-                    if subscription_type:
-                        old_subscription = user.subscription_type
-                        user.subscription_type = subscription_type
-                        user.save()
-                        
-                        AdminActivity.objects.create(
-                            admin_user=admin_user,
-                            action_type='user_updated',
-                            description=f'Changed subscription for {user.email}',
-                            details={
-                                'user_id': str(user.id),
-                                'user_email': user.email,
-                                'old_subscription': old_subscription,
-                                'new_subscription': subscription_type
-                            }
-                        )
-                
-                elif operation == 'assign_role':
-                    role_id = kwargs.get('role_id')
-                    if role_id:
-                        from .models import UserRole
-                        role = UserRole.objects.get(id=role_id)
-                        
-                        assignment, created = UserRoleAssignment.objects.get_or_create(
-                            user=user,
-                            role=role,
-                            defaults={'assigned_by': admin_user}
-                        )
-                        
-                        if created:
-                            AdminActivity.objects.create(
-                                admin_user=admin_user,
-                                action_type='user_role_changed',
-                                description=f'Assigned role {role.name} to {user.email}',
-                                details={
-                                    'user_id': str(user.id),
-                                    'user_email': user.email,
-                                    'role_id': str(role.id),
-                                    'role_name': role.name
-                                }
-                            )
-                
-                results['success_count'] += 1
-                results['processed_users'].append({
-                    'user_id': str(user.id),
-                    'email': user.email,
-                    'status': 'success'
-                })
-                
-            except Exception as e:
-                results['error_count'] += 1
-                results['errors'].append({
-                    'user_id': str(user.id),
-                    'email': user.email,
-                    'error': str(e)
-                })
-        
-        return results
+        """Perform bulk operations on users (set-based, see bulk.BulkUserOperationService)"""
+        return BulkUserOperationService.run(user_ids, operation, admin_user, **kwargs)
+    
+    EXPORT_HEADER = [
+        'ID', 'Email', 'First Name', 'Last Name', 'Institution',
+        'Subscription Type', 'Is Active', 'Is Staff', 'Date Joined',
+        'Last Login', 'Research Domains'
+    ]
+    EXPORT_FIELDS = [
+        'id', 'email', 'first_name', 'last_name', 'institution',
+        'subscription_type', 'is_active', 'is_staff', 'date_joined',
+        'last_login', 'research_domains'
+    ]
     
     @staticmethod
-    def export_users_csv(filters=None):
-        """Export users to CSV format"""
+    def _export_row(values):
+        (user_id, email, first_name, last_name, institution, subscription_type,
+         is_active, is_staff, date_joined, last_login, research_domains) = values
+        return [
+            str(user_id),
+            email,
+            first_name,
+            last_name,
+            institution or '',
+            subscription_type,
+            is_active,
+            is_staff,
+            date_joined.isoformat(),
+            last_login.isoformat() if last_login else '',
+            ', '.join(research_domains) if research_domains else ''
+        ]
+    
+    @staticmethod
+    def users_export(is_active=None, subscription_type=None, date_joined_after=None,
+                     date_joined_before=None):
+        """User export as a values_list projection (see exports.TableExport)"""
         queryset = User.objects.all()
         
-        # Apply filters
-        if filters:
-            if filters.get('is_active') is not None:
-                queryset = queryset.filter(is_active=filters['is_active'])
-            
-            if filters.get('subscription_type'):
-                queryset = queryset.filter(subscription_type=filters['subscription_type'])
-            
-            if filters.get('date_joined_after'):
-                queryset = queryset.filter(date_joined__gte=filters['date_joined_after'])
-            
-            if filters.get('date_joined_before'):
-                queryset = queryset.filter(date_joined__lte=filters['date_joined_before'])
+        # Apply filters (query string values arrive as 'true'/'false')
+        if isinstance(is_active, str):
+            is_active = is_active.lower() in ('1', 'true', 'yes')
+        if is_active is not None:
+            queryset = queryset.filter(is_active=is_active)
         
-        # Create CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
+        if subscription_type:
+            queryset = queryset.filter(subscription_type=subscription_type)
         
-        # Write header
-        writer.writerow([
-            'ID', 'Email', 'First Name', 'Last Name', 'Institution',
-            'Subscription Type', 'Is Active', 'Is Staff', 'Date Joined',
-            'Last Login', 'Research Domains'
-        ])
+        if date_joined_after:
+            queryset = queryset.filter(date_joined__gte=date_joined_after)
         
-        # Write data
-        for user in queryset:
-            writer.writerow([
-                str(user.id),
-                user.email,
-                user.first_name,
-                user.last_name,
-                user.institution or '',
-                user.subscription_type,
-                user.is_active,
-                user.is_staff,
-                user.date_joined.isoformat(),
-                user.last_login.isoformat() if user.last_login else '',
-                ', '.join(user.research_domains) if user.research_domains else ''
-            ])
+        if date_joined_before:
+            queryset = queryset.filter(date_joined__lte=date_joined_before)
         
-        return output.getvalue()
+        return TableExport(
+            UserManagementService.EXPORT_HEADER,
+            queryset=queryset.order_by(),
+            fields=UserManagementService.EXPORT_FIELDS,
+            format_row=UserManagementService._export_row,
+        )
     
     @staticmethod
     def get_user_security_info(user_id):
@@ -324,61 +229,4 @@ class UserRoleService:
     @staticmethod
     def assign_role_to_users(role_id, user_ids, admin_user):
         """Assign a role to multiple users"""
-        from .models import UserRole
-        
-        role = UserRole.objects.get(id=role_id)
-        users = User.objects.filter(id__in=user_ids)
-        
-        results = {
-            'success_count': 0,
-            'error_count': 0,
-            'already_assigned': 0,
-            'assignments': []
-        }
-        
-        for user in users:
-            try:
-                assignment, created = UserRoleAssignment.objects.get_or_create(
-                    user=user,
-                    role=role,
-                    defaults={'assigned_by': admin_user}
-                )
-                
-                if created:
-                    results['success_count'] += 1
-                    results['assignments'].append({
-                        'user_id': str(user.id),
-                        'email': user.email,
-                        'status': 'assigned'
-                    })
-                    
-                    # Log admin activity
-                    AdminActivity.objects.create(
-                        admin_user=admin_user,
-                        action_type='user_role_changed',
-                        description=f'Assigned role {role.name} to {user.email}',
-                        details={
-                            'user_id': str(user.id),
-                            'user_email': user.email,
-                            'role_id': str(role.id),
-                            'role_name': role.name
-                        }
-                    )
-                else:
-                    results['already_assigned'] += 1
-                    results['assignments'].append({
-                        'user_id': str(user.id),
-                        'email': user.email,
-                        'status': 'already_assigned'
-                    })
-                    
-            except Exception as e:
-                results['error_count'] += 1
-                results['assignments'].append({
-                    'user_id': str(user.id),
-                    'email': user.email,
-                    'status': 'error',
-                    'error': str(e)
-                })
-        
-        return results
\ No newline at end of file
+        return BulkUserOperationService.assign_role(role_id, user_ids, admin_user)
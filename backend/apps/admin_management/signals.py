@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .access import PermissionResolver
+from .config_cache import ConfigCache
+from .models import BrandConfiguration, Permission, SystemConfiguration, UserRole, UserRoleAssignment
+
+
+@receiver([post_save, post_delete], sender=SystemConfiguration)
+@receiver([post_save, post_delete], sender=BrandConfiguration)
+def configuration_changed(sender, **kwargs):
+    """Every process reloads its configuration snapshot after the change commits"""
+    ConfigCache.changed()
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+@receiver([post_save, post_delete], sender=Permission)
+def roles_changed(sender, **kwargs):
+    """Role permission lists or the codename registry changed: recompile everyone"""
+    transaction.on_commit(PermissionResolver.invalidate_all)
+
+
+@receiver([post_save, post_delete], sender=UserRoleAssignment)
+@receiver([post_save, post_delete], sender='analytics.AnalysisCollaboration')
+def user_access_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: PermissionResolver.invalidate_user(user_id))
+
+
+@receiver([post_save, post_delete], sender='analytics.AnalysisProject')
+def project_owner_changed(sender, instance, **kwargs):
+    user_id = instance.created_by_id
+    transaction.on_commit(lambda: PermissionResolver.invalidate_user(user_id))
@@ -0,0 +1,35 @@
+from celery import shared_task
+
+from .audit import AuditLogService
+from .dashboard import DashboardMetricsService
+from .exports import ExportJobService
+from .retention import AuditRetentionService
+
+
+@shared_task
+def flush_admin_activity():
+    """Write queued admin activity records (Redis stream) to AdminActivity"""
+    return AuditLogService.flush()
+
+
+@shared_task
+def maintain_audit_partitions():
+    """Create upcoming audit partitions and archive expired months"""
+    result = AuditRetentionService.maintain()
+    return {'partitions': result['partitions'], 'archived': len(result['archived'])}
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def run_export_job(self, job_id):
+    """Write (or resume) a background export to its file"""
+    try:
+        job = ExportJobService.run(job_id)
+    except Exception as exc:
+        raise self.retry(exc=exc)
+    return job and {'state': job['state'], 'rows': job['rows']}
+
+
+@shared_task
+def refresh_dashboard_metrics():
+    """Recompute the materialized dashboard snapshots"""
+    return {name: computed_at.isoformat() for name, computed_at in DashboardMetricsService.refresh().items()}
@@ -1,3 +1,659 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from apps.authentication.models import UserActivity
+
+from .access import PermissionResolver
+from .audit import AuditLogService, LocalAuditQueue
+from .bulk import BulkOperationError, BulkUserOperationService
+from .config_cache import ConfigCache
+from .dashboard import DashboardMetricsService
+from .exports import ExportJobService, TableExport, streaming_csv_response
+from .instrumentation import CACHE_REQUESTS, REQUEST_LATENCY
+from .middleware import AdminActivityMiddleware
+from .profiling import QueryBudgetExceeded, QueryProfilerMiddleware, fingerprint, query_budget
+from .models import (
+    AdminActivity, BrandConfiguration, Permission, SystemConfiguration, UserLoginHistory, UserRole,
+    UserRoleAssignment
+)
+from .retention import AUDIT_TABLES, AuditRetentionService
+from .sampling import SamplingProfilerMiddleware
+from .services import UserManagementService
+
+User = get_user_model()
+
+
+@override_settings(ADMIN_AUDIT_BACKGROUND_WRITER=False)
+class AuditLogServiceTests(TestCase):
+    """Test cases for queued admin activity logging"""
+
+    def setUp(self):
+        AuditLogService._sink = LocalAuditQueue(AuditLogService.QUEUE_SIZE)
+        self.addCleanup(setattr, AuditLogService, '_sink', None)
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+
+    def test_middleware_queues_instead_of_writing(self):
+        """The request path only enqueues; flush writes the batch"""
+        request = RequestFactory().post('/api/users/', {'email': 'new@example.com'})
+        request.user = self.admin
+        middleware = AdminActivityMiddleware(lambda request: None)
+
+        with self.assertNumQueries(1):  # Content type lookup, cached afterwards
+            middleware.process_response(request, Response({'id': 1}, status=201))
+        with self.assertNumQueries(0):
+            middleware.process_response(request, Response({'id': 2}, status=201))
+        self.assertFalse(AdminActivity.objects.exists())
+
+        self.assertEqual(AuditLogService.flush(), 2)
+        activity = AdminActivity.objects.order_by('created_at').first()
+        self.assertEqual(activity.action_type, 'user_created')
+        self.assertEqual(activity.admin_user, self.admin)
+        self.assertEqual(activity.content_type.model, 'user')
+        self.assertEqual(activity.details['response_data'], {'id': 1})
+
+    def test_oversized_payload_is_summarized(self):
+        """Large payloads keep their size, hash and top-level keys only"""
+        payload = {'items': ['x' * 100] * 200, 'note': 'bulk'}
+        AuditLogService.log(self.admin, 'bulk_rewards_processed', 'Processed bulk rewards',
+                            details={'request_data': payload, 'method': 'POST'})
+        AuditLogService.flush()
+
+        details = AdminActivity.objects.get().details
+        self.assertTrue(details['request_data']['truncated'])
+        self.assertEqual(details['request_data']['keys'], ['items', 'note'])
+        self.assertEqual(len(details['request_data']['sha256']), 64)
+        self.assertEqual(details['method'], 'POST')
+
+    def test_failed_batches_are_retried_not_dropped(self):
+        """The background writer backs off and retries; only records failing on their own are dropped"""
+        records = [AuditLogService.record(self.admin, 'config_updated', f'Change {index}') for index in range(3)]
+        write = AuditLogService.write
+        calls = []
+
+        def flaky(batch):
+            calls.append(len(batch))
+            if len(calls) <= 2:
+                raise RuntimeError('database unavailable')
+            return write(batch)
+
+        with patch.object(AuditLogService, 'write', side_effect=flaky), \
+                patch('apps.admin_management.audit.time.sleep') as sleep:
+            self.assertEqual(AuditLogService._write_batch(records), 3)
+        self.assertEqual(AdminActivity.objects.count(), 3)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [1.0, 2.0])
+
+        poisoned = records[1]
+
+        def reject_poisoned(batch):
+            if poisoned in batch:
+                raise RuntimeError('invalid record')
+            return write(batch)
+
+        with patch.object(AuditLogService, 'write', side_effect=reject_poisoned), \
+                patch('apps.admin_management.audit.time.sleep'):
+            self.assertEqual(AuditLogService._write_batch(records), 2)
+        self.assertEqual(AdminActivity.objects.count(), 5)
+
+
+class AuditRetentionServiceTests(TestCase):
+    """Test cases for audit archival (portable, non-partitioned mode)"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, ignore_errors=True)
+        settings_override = override_settings(AUDIT_ARCHIVE_DIR=self.archive_dir, AUDIT_RETENTION_MONTHS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.now = datetime(2024, 6, 15, tzinfo=timezone.utc)
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+        for months_ago in (0, 1, 3, 3, 5):
+            AdminActivity.objects.create(
+                admin_user=self.admin, action_type='config_updated', description='Changed',
+                created_at=self.now - timedelta(days=30 * months_ago), details={'key': 'value'}
+            )
+        UserLoginHistory.objects.create(
+            user=self.admin, ip_address='127.0.0.1', user_agent='test',
+            login_at=self.now - timedelta(days=200), session_duration=timedelta(minutes=5)
+        )
+
+    def test_expired_months_are_archived_and_removed(self):
+        """Only months past the retention window leave the tables"""
+        results = AuditRetentionService.archive(self.now)
+
+        self.assertEqual(
+            sorted((result['table'], result['month'], result['rows']) for result in results),
+            [('admin_activities', '2024-01', 1), ('admin_activities', '2024-03', 2),
+             ('user_login_history', '2023-11', 1)]
+        )
+        self.assertEqual(AdminActivity.objects.count(), 2)
+        self.assertFalse(UserLoginHistory.objects.exists())
+
+    def test_archived_month_can_be_restored(self):
+        """Restored rows keep their ids, timestamps and JSON details"""
+        original = list(AdminActivity.objects.filter(created_at__month=3).values('id', 'created_at', 'details'))
+        AuditRetentionService.archive(self.now)
+
+        month = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        self.assertEqual(AuditRetentionService.restore('admin_activities', month), 2)
+        restored = list(AdminActivity.objects.filter(created_at__month=3).values('id', 'created_at', 'details'))
+        self.assertCountEqual(restored, original)
+
+        login_table = next(table for table in AUDIT_TABLES if table.db_table == 'user_login_history')
+        AuditRetentionService.restore(login_table.model_label, datetime(2023, 11, 1, tzinfo=timezone.utc))
+        self.assertEqual(UserLoginHistory.objects.get().session_duration, timedelta(minutes=5))
+
+
+@override_settings(ADMIN_AUDIT_BACKGROUND_WRITER=False)
+class ConfigCacheTests(TestCase):
+    """Test cases for the per-process configuration snapshot"""
+
+    def setUp(self):
+        ConfigCache.reset()
+        self.addCleanup(ConfigCache.reset)
+        AuditLogService._sink = LocalAuditQueue(AuditLogService.QUEUE_SIZE)
+        self.addCleanup(setattr, AuditLogService, '_sink', None)
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+        SystemConfiguration.objects.create(key='max_projects', value='5', data_type='integer')
+        SystemConfiguration.objects.create(key='beta', value='true', data_type='boolean', category='features')
+        SystemConfiguration.objects.create(key='limits', value={'files': [1, 2]}, data_type='json')
+
+    def test_lookups_are_typed_dict_reads(self):
+        """After the first load, lookups do not query; changes reload on commit"""
+        self.assertEqual(SystemConfiguration.get_config('max_projects'), 5)
+        with self.assertNumQueries(0):
+            self.assertIs(SystemConfiguration.get_config('beta'), True)
+            self.assertEqual(SystemConfiguration.get_config('missing', 'fallback'), 'fallback')
+            limits = SystemConfiguration.get_config('limits')
+        self.assertEqual(limits['files'], (1, 2))
+        with self.assertRaises(TypeError):
+            limits['files'] = ()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SystemConfiguration.set_config('max_projects', 8, user=self.admin)
+        self.assertEqual(SystemConfiguration.get_config('max_projects'), 8)
+
+    def test_bulk_update_and_brand_activation_bump_once(self):
+        """Bulk update is one transaction with a single version bump"""
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with patch.object(ConfigCache, 'bump', wraps=ConfigCache.bump) as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post('/api/admin/config/bulk_update/', {'configurations': [
+                    {'key': 'max_projects', 'value': 12}, {'key': 'beta', 'value': False}, {'key': 'unknown'},
+                ]}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['updated_configs']), 2)
+            self.assertEqual(bump.call_count, 1)
+
+            brand = BrandConfiguration.objects.create(platform_title='NCSKIT Research')
+            with self.captureOnCommitCallbacks(execute=True):
+                brand.activate()
+            self.assertEqual(bump.call_count, 2)
+
+        self.assertEqual(SystemConfiguration.get_config('max_projects'), 12)
+        self.assertIs(SystemConfiguration.get_config('beta'), False)
+        with self.assertNumQueries(0):
+            active = BrandConfiguration.get_active_config()
+        self.assertEqual((active.pk, active.platform_title), (brand.pk, 'NCSKIT Research'))
+
+
+class DashboardMetricsTests(TestCase):
+    """Test cases for materialized dashboard metrics"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        AuditLogService._sink = LocalAuditQueue(AuditLogService.QUEUE_SIZE)
+        self.addCleanup(setattr, AuditLogService, '_sink', None)
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+        UserLoginHistory.objects.create(user=self.admin, ip_address='10.0.0.1', user_agent='test')
+
+    def test_snapshot_is_served_until_stale(self):
+        """Reads come from the cache; only a stale snapshot is recomputed"""
+        snapshot = DashboardMetricsService.get('system')
+        self.assertEqual(snapshot['data']['user_count'], 1)
+        self.assertEqual(snapshot['data']['active_users_today'], 1)
+
+        User.objects.create_user(
+            username='user', email='user@example.com', password='testpass123',
+            first_name='Test', last_name='User'
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(DashboardMetricsService.get('system'), snapshot)
+
+        stale = dict(snapshot, computed_at=snapshot['computed_at'] - timedelta(seconds=DashboardMetricsService.MAX_AGE + 1))
+        cache.set(DashboardMetricsService.KEY.format('system'), stale)
+        self.assertEqual(DashboardMetricsService.get('system')['data']['user_count'], 2)
+
+    def test_cold_snapshot_is_computed_once(self):
+        """With the lock taken, a missing snapshot is awaited instead of recomputed"""
+        compute = Mock(return_value={'user_count': 7})
+        cache.add(DashboardMetricsService.LOCK_KEY.format('system'), 1, DashboardMetricsService.LOCK_TIMEOUT)
+
+        def other_request_stores(_):
+            cache.set(DashboardMetricsService.KEY.format('system'),
+                      {'data': {'user_count': 3}, 'computed_at': datetime.now(timezone.utc)})
+
+        with patch.dict('apps.admin_management.dashboard.METRICS', system=compute), \
+                patch('apps.admin_management.dashboard.time.sleep', side_effect=other_request_stores):
+            self.assertEqual(DashboardMetricsService.get('system')['data'], {'user_count': 3})
+        compute.assert_not_called()
+
+    def test_endpoints_report_freshness(self):
+        """Dashboards include computed_at; ?refresh=1 recomputes"""
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/admin/monitoring/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user_count'], 1)
+        self.assertIn('computed_at', response.data)
+
+        compute = Mock(return_value={'total_activities': 0})
+        with patch.dict('apps.admin_management.dashboard.METRICS', admin_activity=compute):
+            for params in ({}, {}, {'refresh': '1'}):
+                response = client.get('/api/admin/activities/stats/', params)
+                self.assertEqual(response.data['total_activities'], 0)
+                self.assertLess(response.data['age_seconds'], DashboardMetricsService.MAX_AGE)
+        self.assertEqual(compute.call_count, 2)
+
+
+class InstrumentationTests(TestCase):
+    """Test cases for request metrics and the /metrics endpoint"""
+
+    def setUp(self):
+        AuditLogService._sink = LocalAuditQueue(AuditLogService.QUEUE_SIZE)
+        self.addCleanup(setattr, AuditLogService, '_sink', None)
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requests_and_cache_lookups_are_recorded(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        view = 'user-roles-list'
+        before = REQUEST_LATENCY.labels('GET', view, '200')._sum.get()
+        misses = CACHE_REQUESTS.labels('default', 'miss')._value.get()
+
+        self.assertEqual(client.get('/api/admin/roles/').status_code, 200)
+        cache.get('instrumentation:missing')
+
+        self.assertGreater(REQUEST_LATENCY.labels('GET', view, '200')._sum.get(), before)
+        self.assertEqual(CACHE_REQUESTS.labels('default', 'miss')._value.get(), misses + 1)
+        body = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').content.decode()
+        self.assertIn(f'http_request_db_queries_count{{view="{view}"}}', body)
+        self.assertIn('cache_requests_total{cache="default",result="miss"}', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token_guards_endpoint(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_endpoint_without_token_is_served_only_in_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+
+class QueryProfilerTests(TestCase):
+    """Test cases for the N+1 profiler and query budgets"""
+
+    def setUp(self):
+        for index in range(4):
+            UserRole.objects.create(name=f'Role {index}')
+
+    @staticmethod
+    def n_plus_one_view(request):
+        names = [UserRole.objects.get(pk=role.pk).name for role in UserRole.objects.all()]
+        return Response(names)
+
+    def test_repeated_statements_are_reported_per_endpoint(self):
+        report_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, report_dir)
+        with override_settings(QUERY_PROFILER_ENABLED=True, QUERY_PROFILER_DIR=report_dir):
+            middleware = QueryProfilerMiddleware(self.n_plus_one_view)
+            response = middleware(RequestFactory().get('/api/admin/roles/'))
+
+        self.assertEqual(response['X-Query-Count'], '5')
+        with open(f'{report_dir}/GET_api_admin_roles.json') as handle:
+            report = json.load(handle)
+        self.assertEqual(len(report['repeated']), 1)
+        self.assertEqual(report['repeated'][0]['count'], 4)
+        self.assertTrue(any('in n_plus_one_view' in frame for frame in report['repeated'][0]['stack']))
+        self.assertTrue(os.path.exists(f'{report_dir}/GET_api_admin_roles.html'))
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND name = 'x' LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?',
+        )
+
+    def test_query_budget(self):
+        with query_budget(1):
+            list(UserRole.objects.all())
+        with self.assertRaisesMessage(QueryBudgetExceeded, '5 queries run, budget is 2'):
+            with query_budget(2):
+                self.n_plus_one_view(None)
+
+
+def busy_view(request):
+    deadline = time.process_time() + 0.2
+    while time.process_time() < deadline:
+        sum(range(1000))
+    return Response({'ok': True})
+
+
+class SamplingProfilerTests(TestCase):
+    """Test cases for the opt-in request sampling profiler"""
+
+    def setUp(self):
+        AuditLogService._sink = LocalAuditQueue(AuditLogService.QUEUE_SIZE)
+        self.addCleanup(setattr, AuditLogService, '_sink', None)
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+
+    def test_disabled_middleware_is_removed(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SamplingProfilerMiddleware(busy_view)
+
+    def test_requested_profile_is_stored_and_downloadable(self):
+        with override_settings(SAMPLING_PROFILER_ENABLED=True, SAMPLING_PROFILER_TOKEN='secret',
+                               SAMPLING_PROFILER_DIR=self.profile_dir):
+            middleware = SamplingProfilerMiddleware(busy_view)
+            self.assertFalse(middleware(RequestFactory().get('/api/busy/')).has_header('X-Profile-Id'))
+            self.assertFalse(middleware(RequestFactory().get('/api/busy/', HTTP_X_PROFILE='guess')).has_header('X-Profile-Id'))
+            response = middleware(RequestFactory().get('/api/busy/', HTTP_X_PROFILE='secret'))
+
+            admin = User.objects.create_user(
+                username='admin', email='admin@example.com', password='testpass123',
+                first_name='Site', last_name='Admin', is_staff=True
+            )
+            client = APIClient()
+            client.force_authenticate(admin)
+            profiles = client.get('/api/admin/profiles/').data
+            self.assertEqual([profile['id'] for profile in profiles], [response['X-Profile-Id']])
+            self.assertGreater(profiles[0]['samples'], 0)
+
+            download = client.get(f"/api/admin/profiles/{response['X-Profile-Id']}/", {'output': 'collapsed'})
+            collapsed = b''.join(download.streaming_content).decode()
+            self.assertIn('busy_view (apps/admin_management/tests.py', collapsed)
+            download = client.get(f"/api/admin/profiles/{response['X-Profile-Id']}/", {'output': 'speedscope'})
+            speedscope = json.loads(b''.join(download.streaming_content))
+            self.assertEqual(len(speedscope['profiles'][0]['samples']), len(collapsed.splitlines()))
+
+    def test_profile_lookups_stay_inside_the_profile_dir(self):
+        """Wildcards and traversal are rejected; a missing profile file is a 404, not a 500"""
+        directory = os.path.join(self.profile_dir, 'GET_busy')
+        os.makedirs(directory)
+        with open(os.path.join(directory, '20240101T000000-abc.json'), 'w') as meta:
+            json.dump({'id': '20240101T000000-abc', 'endpoint': 'GET_busy'}, meta)
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        with override_settings(SAMPLING_PROFILER_DIR=self.profile_dir):
+            self.assertEqual(len(client.get('/api/admin/profiles/', {'endpoint': 'GET_busy'}).data), 1)
+            for endpoint in ('*', '..', '../GET_busy', 'GET_*'):
+                response = client.get('/api/admin/profiles/', {'endpoint': endpoint})
+                self.assertEqual(response.status_code, 400, endpoint)
+            for profile_id in ('*', '2024*', '..'):
+                self.assertEqual(client.get(f'/api/admin/profiles/{profile_id}/').status_code, 404, profile_id)
+
+            response = client.get('/api/admin/profiles/20240101T000000-abc/')
+            self.assertEqual(response.data['endpoint'], 'GET_busy')
+            response = client.get('/api/admin/profiles/20240101T000000-abc/', {'output': 'collapsed'})
+            self.assertEqual(response.status_code, 404)
+
+
+class PermissionResolverTests(TestCase):
+    """Test cases for compiled role and project permissions"""
+
+    def setUp(self):
+        cache.clear()
+        for codename in ('view_users', 'edit_users', 'manage_rewards'):
+            Permission.objects.create(name=codename, codename=codename, category='users')
+        self.role = UserRole.objects.create(name='Support', permissions=['view_users', 'edit_users'])
+        self.user = User.objects.create_user(
+            username='support', email='support@example.com', password='testpass123',
+            first_name='Support', last_name='Agent'
+        )
+        UserRoleAssignment.objects.create(user=self.user, role=self.role)
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_checks_are_memoised_and_cached(self):
+        """10k checks in a request cost no queries; the next request reads the cache"""
+        user = self.fresh_user()
+        self.assertTrue(PermissionResolver.has_perm(user, 'view_users'))
+        with self.assertNumQueries(0):
+            granted = sum(
+                PermissionResolver.has_perm(user, codename)
+                for codename in ['view_users', 'edit_users', 'manage_rewards', 'unknown'] * 2500
+            )
+        self.assertEqual(granted, 5000)
+
+        next_request_user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertFalse(PermissionResolver.has_perm(next_request_user, 'manage_rewards'))
+
+    def test_assignment_changes_invalidate(self):
+        """Role edits and new assignments are visible to the next request"""
+        other_role = UserRole.objects.create(name='Rewards', permissions=['manage_rewards'])
+        self.assertFalse(PermissionResolver.has_perm(self.fresh_user(), 'manage_rewards'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserRoleAssignment.objects.create(user=self.user, role=other_role)
+        self.assertTrue(PermissionResolver.has_perm(self.fresh_user(), 'manage_rewards'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.role.permissions = ['view_users']
+            self.role.save()
+        user = self.fresh_user()
+        self.assertEqual(PermissionResolver.for_user(user).codenames(), ['manage_rewards', 'view_users'])
+
+
+class BulkUserOperationTests(TestCase):
+    """Test cases for set-based bulk user operations"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+        User.objects.bulk_create([
+            User(username=f'user{index}', email=f'user{index}@example.com', first_name='Test',
+                 last_name=f'User {index}', password='!')
+            for index in range(250)
+        ])
+        self.user_ids = [str(pk) for pk in User.objects.exclude(pk=self.admin.pk).values_list('pk', flat=True)]
+
+    def test_status_change_is_one_update_per_chunk(self):
+        """Query count does not grow with the number of users; bad ids are reported"""
+        ids = self.user_ids + ['not-a-uuid', '00000000-0000-0000-0000-000000000000']
+        with patch.object(BulkUserOperationService, 'CHUNK_SIZE', 100):
+            with CaptureQueriesContext(connection) as queries:
+                results = BulkUserOperationService.run(ids, 'suspend', self.admin)
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertEqual((statements.count('SELECT'), statements.count('UPDATE')), (3, 3))
+
+        self.assertEqual(results['success_count'], 250)
+        self.assertEqual(
+            sorted(error['error'] for error in results['errors']), ['Invalid user id', 'User not found']
+        )
+        self.assertFalse(User.objects.filter(pk__in=self.user_ids, is_active=True).exists())
+        self.assertEqual(AdminActivity.objects.filter(action_type='user_suspended').count(), 250)
+
+        with self.assertRaises(BulkOperationError):
+            BulkUserOperationService.run(ids, 'change_subscription', self.admin, subscription_type='gold')
+
+    def test_role_assignment_skips_existing(self):
+        """Existing assignments are skipped, the rest created in bulk"""
+        role = UserRole.objects.create(name='Reviewer')
+        UserRoleAssignment.objects.create(user_id=self.user_ids[0], role=role, assigned_by=self.admin)
+
+        results = BulkUserOperationService.assign_role(role.id, self.user_ids[:10], self.admin)
+
+        self.assertEqual((results['success_count'], results['already_assigned']), (9, 1))
+        self.assertEqual(UserRoleAssignment.objects.filter(role=role).count(), 10)
+        self.assertEqual(AdminActivity.objects.filter(action_type='user_role_changed').count(), 9)
+
+
+@override_settings(ADMIN_AUDIT_BACKGROUND_WRITER=False)
+class UserListingTests(TestCase):
+    """Test cases for the admin user listing query budget"""
+
+    def setUp(self):
+        AuditLogService._sink = LocalAuditQueue(AuditLogService.QUEUE_SIZE)
+        self.addCleanup(setattr, AuditLogService, '_sink', None)
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123',
+            first_name='Site', last_name='Admin', is_staff=True
+        )
+        self.role = UserRole.objects.create(name='Reviewer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.now = datetime(2024, 6, 15, tzinfo=timezone.utc)
+
+    def add_users(self, count, offset=0):
+        for index in range(offset, offset + count):
+            user = User.objects.create_user(
+                username=f'user{index}', email=f'user{index}@example.com', password='testpass123',
+                first_name='Test', last_name=f'User {index}'
+            )
+            UserRoleAssignment.objects.create(user=user, role=self.role, assigned_by=self.admin)
+            UserActivity.objects.bulk_create([
+                UserActivity(user=user, activity_type='login', description=f'Login {day}',
+                             created_at=self.now - timedelta(days=day))
+                for day in range(8)
+            ])
+            UserLoginHistory.objects.bulk_create([
+                UserLoginHistory(user=user, ip_address=f'10.0.0.{day % 7}', user_agent='test',
+                                 login_at=self.now - timedelta(hours=day), is_successful=day != 3)
+                for day in range(12)
+            ])
+
+    def list_users(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/admin/users/', {'is_active': 'true'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], len(queries)
+
+    def test_query_count_is_constant_per_page(self):
+        """Adding users (and their history) does not add queries"""
+        self.add_users(2)
+        results, small_page = self.list_users()
+        self.assertEqual(len(results), 3)
+
+        self.add_users(6, offset=2)
+        results, large_page = self.list_users()
+        self.assertEqual(len(results), 9)
+        self.assertEqual(large_page, small_page)
+
+        user = next(result for result in results if result['email'] == 'user0@example.com')
+        self.assertEqual([activity['description'] for activity in user['recent_activities']],
+                         [f'Login {day}' for day in range(5)])
+        self.assertEqual(user['login_stats']['total_logins'], 11)
+        self.assertEqual(user['login_stats']['recent_ips'],
+                         ['10.0.0.0', '10.0.0.1', '10.0.0.2', '10.0.0.4', '10.0.0.5'])
+        self.assertEqual(user['role_assignments'][0]['role_name'], 'Reviewer')
+
+
+class CsvExportTests(TestCase):
+    """Test cases for streaming and background CSV exports"""
+
+    def setUp(self):
+        self.export_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_dir, ignore_errors=True)
+        settings_override = override_settings(EXPORT_DIR=self.export_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for index in range(5):
+            User.objects.create_user(
+                username=f'user{index}', email=f'user{index}@example.com', password='testpass123',
+                first_name='Test', last_name=f'User {index}', research_domains=['psychology', 'education'],
+                is_active=index != 4
+            )
+
+    def test_streamed_export_matches_rows(self):
+        """Streaming (plain and gzip) yields the header and every filtered user"""
+        export = UserManagementService.users_export(is_active='true')
+        response = streaming_csv_response(export, 'users_export.csv', compress=True)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users_export.csv.gz"')
+
+        rows = list(csv.reader(io.StringIO(gzip.decompress(b''.join(response.streaming_content)).decode())))
+        self.assertEqual(rows[0], UserManagementService.EXPORT_HEADER)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[1][10], 'psychology, education')
+
+        plain = b''.join(streaming_csv_response(TableExport(['a'], rows=[[1], [2]]), 'x.csv').streaming_content)
+        self.assertEqual(plain.decode().splitlines(), ['a', '1', '2'])
+
+    def test_interrupted_background_export_resumes(self):
+        """A job that fails mid-way continues after the last written batch"""
+        factory = 'apps.admin_management.tests.small_batch_users_export'
+        with patch('apps.admin_management.tasks.run_export_job.delay'):
+            job = ExportJobService.create(factory, {}, 'users_export.csv')
+
+        original = ExportJobService._append.__func__
+        calls = []
+
+        def failing_append(cls, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise OSError('disk full')
+            return original(cls, *args, **kwargs)
+
+        with patch.object(ExportJobService, '_append', classmethod(failing_append)):
+            with self.assertRaises(OSError):
+                ExportJobService.run(job['id'])
+        self.assertEqual(ExportJobService.get(job['id'])['state'], 'failed')
+        self.assertEqual(ExportJobService.get(job['id'])['rows'], 2)
+
+        job = ExportJobService.run(job['id'])
+        self.assertEqual((job['state'], job['rows']), ('complete', 5))
+        with gzip.open(job['output'], 'rt') as output:
+            rows = list(csv.reader(output))
+        self.assertEqual(rows[0], UserManagementService.EXPORT_HEADER)
+        self.assertCountEqual([row[1] for row in rows[1:]], [f'user{index}@example.com' for index in range(5)])
+
+
+def small_batch_users_export():
+    export = UserManagementService.users_export()
+    export.chunk_size = 2
+    return export
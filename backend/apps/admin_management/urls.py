@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     AdminActivityViewSet, SystemConfigurationViewSet, BrandConfigurationViewSet,
-    UserRoleViewSet, PermissionViewSet, UserManagementViewSet, SystemMonitoringViewSet
+    UserRoleViewSet, PermissionViewSet, UserManagementViewSet, SystemMonitoringViewSet,
+    ProfileViewSet
 )
 
 router = DefaultRouter()
@@ -13,6 +14,7 @@ router.register(r'roles', UserRoleViewSet, basename='user-roles')
 router.register(r'permissions', PermissionViewSet, basename='permissions')
 router.register(r'users', UserManagementViewSet, basename='user-management')
 router.register(r'monitoring', SystemMonitoringViewSet, basename='system-monitoring')
+router.register(r'profiles', ProfileViewSet, basename='profiles')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,17 +2,14 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.db.models import Q, Count, Sum
+from django.db.models import Q
 from django.utils import timezone
-from django.core.cache import cache
-from django.db import connection
-from datetime import datetime, timedelta
-import psutil
-import os
+from django.http import FileResponse
+from datetime import datetime
 
 from .models import (
     AdminActivity, SystemConfiguration, BrandConfiguration,
-    UserRole, Permission, UserRoleAssignment, UserLoginHistory
+    UserRole, Permission, UserRoleAssignment
 )
 from .serializers import (
     AdminActivitySerializer, AdminActivityCreateSerializer,
@@ -21,6 +18,12 @@ from .serializers import (
     UserLoginHistorySerializer, UserManagementSerializer,
     SystemHealthSerializer, SystemMetricsSerializer
 )
+from .bulk import BulkOperationError, BulkUserOperationService
+from .config_cache import ConfigCache
+from .dashboard import DashboardMetricsService, admin_activity_stats, system_health
+from .exports import ExportJobService, streaming_csv_response
+from .listing import UserListingService
+from .sampling import ProfileStore
 from .services import UserManagementService, UserRoleService
 
 User = get_user_model()
@@ -31,6 +34,7 @@ class AdminActivityViewSet(viewsets.ModelViewSet):
     
     queryset = AdminActivity.objects.all()
     permission_classes = [permissions.IsAdminUser]
+    FILTER_PARAMS = ('admin_user', 'action_type', 'start_date', 'end_date')
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -72,33 +76,12 @@ class AdminActivityViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        """Get admin activity statistics"""
-        queryset = self.get_queryset()
-        
-        # Activity counts by type
-        activity_counts = queryset.values('action_type').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        # Activity counts by admin user
-        admin_counts = queryset.values(
-            'admin_user__first_name', 'admin_user__last_name', 'admin_user__email'
-        ).annotate(count=Count('id')).order_by('-count')
-        
-        # Daily activity trend (last 30 days)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        daily_activities = queryset.filter(
-            created_at__gte=thirty_days_ago
-        ).extra(
-            select={'day': 'date(created_at)'}
-        ).values('day').annotate(count=Count('id')).order_by('day')
+        """Get admin activity statistics (unfiltered: from the dashboard snapshot)"""
+        if not any(request.query_params.get(name) for name in self.FILTER_PARAMS):
+            snapshot = DashboardMetricsService.get('admin_activity', refresh=_wants_refresh(request))
+            return Response({**snapshot['data'], **DashboardMetricsService.freshness(snapshot)})
         
-        return Response({
-            'total_activities': queryset.count(),
-            'activity_by_type': activity_counts,
-            'activity_by_admin': admin_counts,
-            'daily_trend': daily_activities
-        })
+        return Response(admin_activity_stats(self.get_queryset()))
 
 
 class SystemConfigurationViewSet(viewsets.ModelViewSet):
@@ -156,21 +139,25 @@ class SystemConfigurationViewSet(viewsets.ModelViewSet):
     def bulk_update(self, request):
         """Bulk update multiple configurations"""
         configs_data = request.data.get('configurations', [])
-        updated_configs = []
-        
-        for config_data in configs_data:
-            config_key = config_data.get('key')
-            if not config_key:
-                continue
-            
-            try:
-                config = SystemConfiguration.objects.get(key=config_key)
-                config.value = config_data.get('value', config.value)
+        values = {
+            config_data['key']: config_data
+            for config_data in configs_data
+            if config_data.get('key')
+        }
+        
+        # One transaction and one configuration version bump for the whole batch
+        with ConfigCache.batch():
+            updated_configs = list(
+                SystemConfiguration.objects.select_for_update().filter(key__in=values)
+            )
+            now = timezone.now()
+            for config in updated_configs:
+                config.value = values[config.key].get('value', config.value)
                 config.updated_by = request.user
-                config.save()
-                updated_configs.append(config)
-            except SystemConfiguration.DoesNotExist:
-                continue
+                config.updated_at = now  # bulk_update skips auto_now
+            SystemConfiguration.objects.bulk_update(
+                updated_configs, ['value', 'updated_by', 'updated_at']
+            )
         
         return Response({
             'message': f'Updated {len(updated_configs)} configurations',
@@ -284,22 +271,14 @@ class UserRoleViewSet(viewsets.ModelViewSet):
         role = self.get_object()
         user_ids = request.data.get('user_ids', [])
         
-        assignments = []
-        for user_id in user_ids:
-            try:
-                user = User.objects.get(id=user_id)
-                assignment, created = UserRoleAssignment.objects.get_or_create(
-                    user=user,
-                    role=role,
-                    defaults={'assigned_by': request.user}
-                )
-                if created:
-                    assignments.append(assignment)
-            except User.DoesNotExist:
-                continue
+        results = BulkUserOperationService.run(user_ids, 'assign_role', request.user, role_id=role.id)
+        assigned_ids = [entry['user_id'] for entry in results['processed_users']]
+        assignments = UserRoleAssignment.objects.filter(
+            role=role, user_id__in=assigned_ids
+        ).select_related('user', 'role', 'assigned_by')
         
         return Response({
-            'message': f'Assigned {len(assignments)} users to role {role.name}',
+            'message': f'Assigned {len(assigned_ids)} users to role {role.name}',
             'assignments': UserRoleAssignmentSerializer(assignments, many=True).data
         })
     
@@ -376,9 +355,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser]
     
     def get_queryset(self):
-        queryset = User.objects.select_related('profile').prefetch_related(
-            'role_assignments__role', 'activities', 'login_history'
-        ).all()
+        queryset = UserListingService.queryset().order_by('-date_joined')
         
         # Filter by active status
         is_active = self.request.query_params.get('is_active')
@@ -433,12 +410,19 @@ class UserManagementViewSet(viewsets.ModelViewSet):
             )
         
         # Use service for bulk operations
-        results = UserManagementService.bulk_user_operation(
-            user_ids=user_ids,
-            operation=action,
-            admin_user=request.user,
-            **request.data
-        )
+        params = {
+            key: value for key, value in request.data.items()
+            if key in ('subscription_type', 'role_id')
+        }
+        try:
+            results = UserManagementService.bulk_user_operation(
+                user_ids=user_ids,
+                operation=action,
+                admin_user=request.user,
+                **params
+            )
+        except BulkOperationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(results)
     
@@ -486,7 +470,11 @@ class UserManagementViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
-        """Export users to CSV"""
+        """
+        Export users to CSV, streamed row by row (?gzip=1 compresses on the fly).
+        ?background=1 writes the file in a resumable background job instead;
+        poll export_job for its state and download.
+        """
         filters = {
             'is_active': request.query_params.get('is_active'),
             'subscription_type': request.query_params.get('subscription_type'),
@@ -496,12 +484,37 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         
         # Remove None values
         filters = {k: v for k, v in filters.items() if v is not None}
+        compress = request.query_params.get('gzip') in ('1', 'true')
         
-        csv_data = UserManagementService.export_users_csv(filters)
+        if request.query_params.get('background') in ('1', 'true'):
+            job = ExportJobService.create(
+                'apps.admin_management.services.UserManagementService.users_export',
+                filters, 'users_export.csv', owner_id=request.user.pk, compress=compress
+            )
+            return Response(self._export_job_data(job), status=status.HTTP_202_ACCEPTED)
         
-        response = Response(csv_data, content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="users_export.csv"'
-        return response
+        export = UserManagementService.users_export(**filters)
+        return streaming_csv_response(export, 'users_export.csv', compress=compress)
+    
+    @action(detail=False, methods=['get'])
+    def export_job(self, request):
+        """State of a background export; ?download=1 returns the finished file"""
+        job = ExportJobService.get(request.query_params.get('job_id', ''))
+        if job is None or job['owner_id'] != str(request.user.pk):
+            return Response({'error': 'Export job not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.query_params.get('download') in ('1', 'true'):
+            if job['state'] != 'complete':
+                return Response({'error': 'Export is not complete'}, status=status.HTTP_409_CONFLICT)
+            return FileResponse(
+                open(job['output'], 'rb'), as_attachment=True, filename=job['filename'],
+                content_type='application/gzip' if job['compress'] else 'text/csv'
+            )
+        return Response(self._export_job_data(job))
+    
+    @staticmethod
+    def _export_job_data(job):
+        return {key: job[key] for key in ('id', 'state', 'rows', 'filename', 'created_at', 'finished_at', 'error')}
 
 
 class SystemMonitoringViewSet(viewsets.ViewSet):
@@ -511,118 +524,60 @@ class SystemMonitoringViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def health(self, request):
-        """Get system health status"""
-        health_status = {
-            'database': self._check_database_health(),
-            'cache': self._check_cache_health(),
-            'storage': self._check_storage_health(),
-            'api': 'healthy',  # If we're responding, API is healthy
-            'timestamp': timezone.now()
-        }
-        
-        serializer = SystemHealthSerializer(data=health_status)
+        """Get system health status (checked live)"""
+        serializer = SystemHealthSerializer(data=system_health())
         serializer.is_valid(raise_exception=True)
         
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def metrics(self, request):
-        """Get comprehensive system metrics"""
-        metrics = {
-            'user_count': User.objects.count(),
-            'active_users_today': self._get_active_users_today(),
-            'active_campaigns': self._get_active_campaigns(),
-            'total_revenue': self._get_total_revenue(),
-            'system_health': {
-                'database': self._check_database_health(),
-                'cache': self._check_cache_health(),
-                'storage': self._check_storage_health(),
-                'api': 'healthy',
-                'timestamp': timezone.now()
-            },
-            'performance_metrics': self._get_performance_metrics()
-        }
+        """Get comprehensive system metrics from the dashboard snapshot (?refresh=1 recomputes)"""
+        snapshot = DashboardMetricsService.get('system', refresh=_wants_refresh(request))
         
-        serializer = SystemMetricsSerializer(data=metrics)
+        serializer = SystemMetricsSerializer(data={**snapshot['data'], **DashboardMetricsService.freshness(snapshot)})
         serializer.is_valid(raise_exception=True)
         
         return Response(serializer.data)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """ViewSet for listing and downloading request profiles (see sampling.py)"""
     
-    def _check_database_health(self):
-        """Check database connectivity and performance"""
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                return 'healthy'
-        except Exception:
-            return 'error'
-    
-    def _check_cache_health(self):
-        """Check cache connectivity"""
-        try:
-            cache.set('health_check', 'ok', 10)
-            if cache.get('health_check') == 'ok':
-                return 'healthy'
-            else:
-                return 'warning'
-        except Exception:
-            return 'error'
-    
-    def _check_storage_health(self):
-        """Check storage availability"""
-        try:
-            # Check if we can write to media directory
-            from django.conf import settings
-            media_root = getattr(settings, 'MEDIA_ROOT', '/tmp')
-            test_file = os.path.join(media_root, 'health_check.txt')
-            
-            with open(test_file, 'w') as f:
-                f.write('health check')
-            
-            os.remove(test_file)
-            return 'healthy'
-        except Exception:
-            return 'error'
-    
-    def _get_active_users_today(self):
-        """Get count of users active today"""
-        today = timezone.now().date()
-        return UserLoginHistory.objects.filter(
-            login_at__date=today,
-            is_successful=True
-        ).values('user').distinct().count()
-    
-    def _get_active_campaigns(self):
-        """Get count of active campaigns"""
-        try:
-            from apps.surveys.models import SurveyCampaign
-            return SurveyCampaign.objects.filter(status='active').count()
-        except ImportError:
-            return 0
+    permission_classes = [permissions.IsAdminUser]
     
-    def _get_total_revenue(self):
-        """Get total revenue from campaigns"""
-        try:
-            from apps.surveys.models import SurveyCampaign
-            return SurveyCampaign.objects.aggregate(
-                total=Sum('admin_fee_collected')
-            )['total'] or 0
-        except ImportError:
-            return 0
-    
-    def _get_performance_metrics(self):
-        """Get system performance metrics"""
+    def list(self, request):
+        """Stored profiles, newest first (?endpoint= filters)"""
+        endpoint = request.query_params.get('endpoint')
+        if endpoint and not ProfileStore.valid_name(endpoint):
+            return Response({'error': 'Invalid endpoint name'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ProfileStore.list(endpoint))
+    
+    def retrieve(self, request, pk=None):
+        """Profile metadata; ?output=collapsed|speedscope downloads the profile"""
+        found = ProfileStore.get(pk)
+        if found is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        meta, directory = found
+        
+        output = request.query_params.get('output')
+        if not output:
+            return Response(meta)
+        if output not in ProfileStore.OUTPUTS:
+            return Response(
+                {'error': f'output must be one of: {", ".join(ProfileStore.OUTPUTS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        suffix, content_type = ProfileStore.OUTPUTS[output]
         try:
-            return {
-                'cpu_usage': psutil.cpu_percent(),
-                'memory_usage': psutil.virtual_memory().percent,
-                'disk_usage': psutil.disk_usage('/').percent,
-                'load_average': os.getloadavg()[0] if hasattr(os, 'getloadavg') else 0
-            }
-        except Exception:
-            return {
-                'cpu_usage': 0,
-                'memory_usage': 0,
-                'disk_usage': 0,
-                'load_average': 0
-            }
\ No newline at end of file
+            profile = open(directory / f'{pk}{suffix}', 'rb')
+        except FileNotFoundError:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            profile, as_attachment=True,
+            filename=f"{meta['endpoint']}-{pk}{suffix}", content_type=content_type
+        )
+
+
+def _wants_refresh(request):
+    return request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
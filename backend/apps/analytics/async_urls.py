@@ -0,0 +1,13 @@
+"""
+URL configuration mounted at /api/analytics/: the native async analytics
+views (see async_views.py) and the streaming data export
+"""
+
+from django.urls import path
+from . import async_views, export_views
+
+urlpatterns = [
+    path('r/<str:analysis_type>/', async_views.r_analysis, name='r-analysis'),
+    path('results/<uuid:result_id>/wait/', async_views.wait_for_result, name='wait-for-result'),
+    path('projects/<uuid:project_id>/data/export/', export_views.export_project_data, name='export-project-data'),
+]
@@ -0,0 +1,108 @@
+"""
+Native async analytics views
+
+Endpoints that wait on the R server or on a running result, served without
+blocking a worker under ASGI.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+
+from apps.admin_management.access import PermissionResolver
+from apps.authentication.async_auth import async_login_required
+
+from .models import AnalysisResult
+from .services.r_client import RAnalysisClient
+
+logger = logging.getLogger(__name__)
+
+# analysis type -> RAnalysisClient method
+R_ANALYSES = {
+    'descriptive': 'descriptive_analysis',
+    'reliability': 'reliability_analysis',
+    'efa': 'exploratory_factor_analysis',
+    'cfa': 'confirmatory_factor_analysis',
+    'sem': 'structural_equation_modeling',
+    'regression': 'regression_analysis',
+    'anova': 'anova_analysis',
+    'ttest': 'ttest_analysis',
+    'correlation': 'correlation_analysis',
+    'mediation': 'mediation_analysis',
+    'moderation': 'moderation_analysis',
+}
+
+WAIT_TIMEOUT = 25.0  # seconds; below typical proxy idle timeouts
+WAIT_POLL_INTERVAL = 0.5
+
+
+@require_POST
+@async_login_required
+async def r_analysis(request, analysis_type):
+    """Run one analysis on the R server: {"data": [[...]], "variables": {...}, "parameters": {...}}"""
+    method = R_ANALYSES.get(analysis_type)
+    if method is None:
+        return JsonResponse({'error': f'Unknown analysis type: {analysis_type}'}, status=404)
+    try:
+        payload = json.loads(request.body or b'{}')
+        data, variables = payload['data'], payload.get('variables', {})
+        parameters = payload.get('parameters', {})
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'error': 'Body must be JSON with "data", "variables" and "parameters"'}, status=400)
+
+    client = RAnalysisClient.shared()
+    try:
+        result = await getattr(client, method)(data, variables, parameters)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    except Exception:
+        return JsonResponse({'error': 'R analysis failed'}, status=502)
+    finally:
+        if not hasattr(request, 'scope'):
+            # WSGI: this request's event loop ends with it, so does the client's session
+            await client.close()
+    return JsonResponse(result)
+
+
+@require_GET
+@async_login_required
+async def wait_for_result(request, result_id):
+    """Result status once it is no longer running, or after ?timeout= seconds (max WAIT_TIMEOUT)"""
+    try:
+        timeout = min(float(request.GET.get('timeout', WAIT_TIMEOUT)), WAIT_TIMEOUT)
+    except ValueError:
+        return JsonResponse({'error': 'timeout must be a number of seconds'}, status=400)
+
+    try:
+        result = await AnalysisResult.objects.select_related('project').aget(pk=result_id)
+    except AnalysisResult.DoesNotExist:
+        return JsonResponse({'error': 'Result not found'}, status=404)
+    if not await sync_to_async(PermissionResolver.has_perm)(request.user, 'view_results', result.project):
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    deadline = time.monotonic() + timeout
+    while result.status == 'running' and time.monotonic() < deadline:
+        await asyncio.sleep(min(WAIT_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+        result = await AnalysisResult.objects.only(
+            'id', 'analysis_type', 'status', 'completed_at', 'error_message', 'statistical_output'
+        ).aget(pk=result_id)
+
+    return JsonResponse(result_payload(result))
+
+
+def result_payload(result):
+    payload = {
+        'id': str(result.id),
+        'analysis_type': result.analysis_type,
+        'status': result.status,
+        'completed_at': result.completed_at.isoformat() if result.completed_at else None,
+    }
+    if result.status == 'completed':
+        payload['statistical_output'] = result.statistical_output
+    elif result.status == 'failed':
+        payload['error_message'] = result.error_message
+    return payload
@@ -0,0 +1,39 @@
+"""
+Streaming export of an analysis project's survey data
+"""
+from rest_framework import status
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from apps.admin_management.access import PermissionResolver
+from apps.admin_management.exports import streaming_chunks_response
+
+from .models import AnalysisProject
+
+
+@api_view(['GET'])
+def export_project_data(request, project_id):
+    """Processed survey data of the project as CSV (?gzip=1 compresses)"""
+    try:
+        project = AnalysisProject.objects.get(pk=project_id)
+    except AnalysisProject.DoesNotExist:
+        return Response({'error': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
+    if not PermissionResolver.has_perm(request.user, 'view_results', project):
+        return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
+
+    campaign_id = (project.data_configuration or {}).get('campaign_id')
+    if project.data_source != 'survey_campaign' or not campaign_id:
+        return Response({'error': 'Project is not connected to a survey campaign'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    from .services import DataPipelineService
+
+    pipeline = DataPipelineService()
+    try:
+        processed = pipeline.survey_processor.process_campaign_data(campaign_id)
+    except ValueError as exc:  # The campaign no longer exists
+        return Response({'error': str(exc)}, status=status.HTTP_404_NOT_FOUND)
+    compress = request.query_params.get('gzip') in ('1', 'true')
+    return streaming_chunks_response(
+        pipeline.stream_export(processed, compress), f'project_{project.pk}_data.csv', compress
+    )
@@ -1,11 +1,18 @@
-from .statistical_validation import StatisticalValidationService
-from .statistical_analysis import StatisticalAnalysisService
-from .data_pipeline import DataPipelineService
-from .project_management import AnalysisProjectService
-
-__all__ = [
-    'StatisticalValidationService',
-    'StatisticalAnalysisService', 
-    'DataPipelineService',
-    'AnalysisProjectService'
-]
\ No newline at end of file
+# Loaded on first access so that light modules (e.g. r_client, used by the async
+# views) can be imported without the numerical stack.
+from importlib import import_module
+
+_EXPORTS = {
+    'StatisticalValidationService': '.statistical_validation',
+    'StatisticalAnalysisService': '.statistical_analysis',
+    'DataPipelineService': '.data_pipeline',
+    'AnalysisProjectService': '.project_management',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
@@ -9,12 +9,13 @@ import pandas as pd
 import numpy as np
 import json
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from django.core.files.uploadedfile import UploadedFile
 from django.db import transaction
 
 from ..models import AnalysisProject
+from apps.admin_management.exports import TableExport, csv_chunks, encode_chunks
 from apps.surveys.models import SurveyCampaign, SurveyResponse
 
 logger = logging.getLogger(__name__)
@@ -634,15 +635,16 @@ class DataPipelineService:
     def export_data(
         self, 
         processed_data: ProcessedData, 
-        format: str = 'csv'
+        format: str = 'excel'
     ) -> bytes:
-        """Export processed data in specified format"""
+        """Export processed data as an Excel or JSON file (CSV streams through stream_export)"""
+        
+        if format == 'csv':
+            raise ValueError("CSV exports are streamed, use stream_export")
         
         df = pd.DataFrame(processed_data.data[1:], columns=processed_data.data[0])
         
-        if format == 'csv':
-            return df.to_csv(index=False).encode('utf-8')
-        elif format == 'excel':
+        if format == 'excel':
             import io
             buffer = io.BytesIO()
             df.to_excel(buffer, index=False)
@@ -652,6 +654,11 @@ class DataPipelineService:
         else:
             raise ValueError(f"Unsupported export format: {format}")
     
+    def stream_export(self, processed_data: ProcessedData, compress: bool = False) -> Iterator[bytes]:
+        """CSV export in chunks, served by apps.analytics.export_views.export_project_data"""
+        export = TableExport(processed_data.data[0], rows=processed_data.data[1:])
+        return encode_chunks(csv_chunks(export.header, export.iter_rows()), compress)
+    
     def get_data_summary(self, processed_data: ProcessedData) -> Dict[str, Any]:
         """Get comprehensive data summary"""
         
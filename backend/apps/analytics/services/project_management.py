@@ -13,6 +13,8 @@ from django.db import transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from apps.admin_management.access import PermissionResolver
+
 from ..models import (
     AnalysisProject, AnalysisCollaboration, AnalysisTemplate,
     AnalysisResult, AnalysisComment
@@ -320,9 +322,14 @@ class CollaborationService:
         """Check if user has specific permission on project"""
         
         # Project owner has all permissions
-        if project.created_by == user:
+        if project.created_by_id == user.pk:
             return True
         
+        # Active collaborations grant theirs (compiled per user, see admin_management.access)
+        if user.is_active and not user.is_superuser:
+            return PermissionResolver.has_perm(user, permission, project=project)
+        
+        # The compiled entry carries neither: superusers get no bypass here, inactive users keep their grants
         try:
             collaboration = AnalysisCollaboration.objects.get(
                 project=project, user=user, status='active'
@@ -8,15 +8,31 @@ import asyncio
 import aiohttp
 import json
 import logging
+import time
+import weakref
 from typing import Dict, List, Any, Optional
 from django.conf import settings
 
+from apps.admin_management.instrumentation import observe_r_call
+
 logger = logging.getLogger(__name__)
 
 
 class RAnalysisClient:
     """Client for communicating with R analysis server"""
     
+    # One client (and connection pool) per event loop; aiohttp sessions are bound to their loop
+    _shared = weakref.WeakKeyDictionary()
+    
+    @classmethod
+    def shared(cls) -> 'RAnalysisClient':
+        """Client shared by every caller on the running event loop"""
+        loop = asyncio.get_running_loop()
+        client = cls._shared.get(loop)
+        if client is None:
+            client = cls._shared[loop] = cls()
+        return client
+    
     def __init__(self):
         self.base_url = getattr(settings, 'R_ANALYSIS_URL', 'http://localhost:8000')
         self.timeout = getattr(settings, 'R_ANALYSIS_TIMEOUT', 300)  # 5 minutes
@@ -33,24 +49,34 @@ class RAnalysisClient:
         """Make request to R analysis server"""
         session = await self._get_session()
         url = f"{self.base_url}{endpoint}"
+        body = json.dumps(data).encode('utf-8')
+        response_size = 0
+        outcome = 'error'
+        start = time.perf_counter()
         
         try:
-            async with session.post(url, json=data) as response:
+            async with session.post(url, data=body, headers={'Content-Type': 'application/json'}) as response:
+                payload = await response.read()
+                response_size = len(payload)
                 if response.status == 200:
-                    result = await response.json()
+                    result = json.loads(payload)
                     if result.get('status') == 'success':
+                        outcome = 'success'
                         return result
                     else:
                         raise Exception(f"R analysis error: {result.get('message', 'Unknown error')}")
                 else:
-                    error_text = await response.text()
+                    error_text = payload.decode('utf-8', errors='replace')
                     raise Exception(f"HTTP {response.status}: {error_text}")
         
         except asyncio.TimeoutError:
+            outcome = 'timeout'
             raise Exception("R analysis timeout - analysis took too long to complete")
         except Exception as e:
             logger.error(f"R analysis request failed: {str(e)}")
             raise
+        finally:
+            observe_r_call(endpoint, time.perf_counter() - start, outcome, len(body), response_size)
     
     async def descriptive_analysis(
         self, 
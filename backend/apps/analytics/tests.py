@@ -1,3 +1,101 @@
-from django.test import TestCase
+from unittest.mock import AsyncMock, Mock, patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import AnalysisProject, AnalysisResult
+
+User = get_user_model()
+
+
+class AsyncAnalyticsViewTests(TestCase):
+    """Test cases for the native async R analysis and result endpoints"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='testpass123',
+            first_name='Project', last_name='Owner'
+        )
+        self.project = AnalysisProject.objects.create(
+            title='Survey analysis', data_source='external_file', created_by=self.owner
+        )
+        self.client = Client()
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_r_analysis_proxies_to_shared_client(self):
+        """JWT-authenticated requests reach the R client; unknown types and anonymous users do not"""
+        client = Mock(close=AsyncMock())
+        client.descriptive_analysis = AsyncMock(return_value={'status': 'success', 'results': {'n': 2}})
+        body = '{"data": [[1, 2], [3, 4]], "variables": {"x": "a"}}'
+
+        with patch('apps.analytics.async_views.RAnalysisClient.shared', return_value=client):
+            response = self.client.post('/api/analytics/r/descriptive/', body, content_type='application/json',
+                                        **self.bearer(self.owner))
+            unknown = self.client.post('/api/analytics/r/bogus/', body, content_type='application/json',
+                                       **self.bearer(self.owner))
+            anonymous = self.client.post('/api/analytics/r/descriptive/', body, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], {'n': 2})
+        client.descriptive_analysis.assert_awaited_once_with([[1, 2], [3, 4]], {'x': 'a'}, {})
+        client.close.assert_awaited()  # WSGI request: the per-request loop's session is closed
+        self.assertEqual(unknown.status_code, 404)
+        self.assertEqual(anonymous.status_code, 401)
+
+    def test_wait_for_result_returns_finished_result(self):
+        """Finished results return at once; running ones after the timeout; others are denied"""
+        done = AnalysisResult.objects.create(
+            project=self.project, analysis_type='descriptive', analysis_name='Descriptives',
+            status='completed', statistical_output={'mean': 2.5}
+        )
+        running = AnalysisResult.objects.create(
+            project=self.project, analysis_type='efa', analysis_name='EFA'
+        )
+        stranger = User.objects.create_user(
+            username='stranger', email='stranger@example.com', password='testpass123',
+            first_name='Other', last_name='User'
+        )
+
+        response = self.client.get(f'/api/analytics/results/{done.pk}/wait/', **self.bearer(self.owner))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['statistical_output'], {'mean': 2.5})
+
+        response = self.client.get(f'/api/analytics/results/{running.pk}/wait/?timeout=0.1',
+                                   **self.bearer(self.owner))
+        self.assertEqual(response.json()['status'], 'running')
+
+        response = self.client.get(f'/api/analytics/results/{done.pk}/wait/', **self.bearer(stranger))
+        self.assertEqual(response.status_code, 403)
+
+
+class ProjectDataExportTests(TestCase):
+    """Test cases for the streaming project data export"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner', email='owner@example.com', password='testpass123',
+            first_name='Project', last_name='Owner'
+        )
+        self.project = AnalysisProject.objects.create(
+            title='Survey analysis', data_source='survey_campaign',
+            data_configuration={'campaign_id': 'c0ffee'}, created_by=self.owner
+        )
+        self.url = f'/api/analytics/projects/{self.project.pk}/data/export/'
+
+    def bearer(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_export_is_refused_without_access_or_campaign(self):
+        stranger = User.objects.create_user(
+            username='stranger', email='stranger@example.com', password='testpass123',
+            first_name='Other', last_name='User'
+        )
+        self.assertEqual(self.client.get(self.url, **self.bearer(stranger)).status_code, 403)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        self.project.data_source = 'external_file'
+        self.project.save()
+        self.assertEqual(self.client.get(self.url, **self.bearer(self.owner)).status_code, 400)
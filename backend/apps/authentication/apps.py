@@ -7,5 +7,4 @@ class AuthenticationConfig(AppConfig):
     verbose_name = 'Authentication'
     
     def ready(self):
-        # Import signals here if needed
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 import uuid
 
 
@@ -138,13 +139,17 @@ class UserActivity(models.Model):
     project_id = models.UUIDField(blank=True, null=True)
     document_id = models.UUIDField(blank=True, null=True)
     
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'user_activities'
         verbose_name = 'User Activity'
         verbose_name_plural = 'User Activities'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['-created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.full_name} - {self.get_activity_type_display()}"
\ No newline at end of file
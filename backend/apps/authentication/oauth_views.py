@@ -8,6 +8,9 @@ from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.db import transaction, IntegrityError
 from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from .serializers import UserSerializer
 import logging
 import re
@@ -32,13 +35,13 @@ class OAuthErrorCodes:
     VALIDATION_ERROR = 'validation_error'
     RATE_LIMIT_EXCEEDED = 'rate_limit_exceeded'
 
-def create_error_response(
+def error_data(
     error_code: str, 
     message: str, 
     details: Optional[str] = None,
     status_code: int = status.HTTP_400_BAD_REQUEST
-) -> Response:
-    """Create standardized error response"""
+) -> Dict[str, Any]:
+    """Build (and log) the standardized error body"""
     error_data = {
         'error': error_code,
         'message': message,
@@ -55,7 +58,34 @@ def create_error_response(
         'status_code': status_code
     })
     
-    return Response(error_data, status=status_code)
+    return error_data
+
+def create_error_response(
+    error_code: str, 
+    message: str, 
+    details: Optional[str] = None,
+    status_code: int = status.HTTP_400_BAD_REQUEST
+) -> Response:
+    """Create standardized error response"""
+    return Response(error_data(error_code, message, details, status_code), status=status_code)
+
+def create_json_error_response(
+    error_code: str, 
+    message: str, 
+    details: Optional[str] = None,
+    status_code: int = status.HTTP_400_BAD_REQUEST
+) -> JsonResponse:
+    """Standardized error response for the plain (async) Django views"""
+    return JsonResponse(error_data(error_code, message, details, status_code), status=status_code)
+
+def parse_request_data(request) -> Dict[str, Any]:
+    """JSON or form body as a dict (what DRF's parsers accept for these views)"""
+    if request.content_type == 'application/json':
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Request body must be a JSON object')
+        return data
+    return request.POST.dict()
 
 def validate_oauth_data(data: Dict[str, Any]) -> Dict[str, str]:
     """Validate OAuth callback data"""
@@ -130,32 +160,41 @@ def sanitize_user_data(data: Dict[str, Any]) -> Dict[str, Any]:
     return sanitized
 
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def oauth_callback(request):
+@csrf_exempt
+@require_POST
+async def oauth_callback(request):
     """
     Enhanced OAuth callback handler with comprehensive error handling
     Create or update user based on OAuth data
+    
+    Native async view (async ORM) so it does not hold a worker under ASGI.
     """
     # Log the incoming request for debugging
     logger.info(f"OAuth callback received from IP: {request.META.get('REMOTE_ADDR')}")
+    raw_data = None
     
     try:
         # Validate request data
-        if not request.data:
-            return create_error_response(
+        try:
+            raw_data = parse_request_data(request)
+        except ValueError:
+            return create_json_error_response(
+                OAuthErrorCodes.VALIDATION_ERROR,
+                'Request body is not valid JSON'
+            )
+        if not raw_data:
+            return create_json_error_response(
                 OAuthErrorCodes.MISSING_REQUIRED_FIELD,
                 'No data provided in request'
             )
         
         # Sanitize input data
-        raw_data = request.data
         sanitized_data = sanitize_user_data(raw_data)
         
         # Validate required fields
         validation_errors = validate_oauth_data(sanitized_data)
         if validation_errors:
-            return create_error_response(
+            return create_json_error_response(
                 OAuthErrorCodes.VALIDATION_ERROR,
                 'Validation failed',
                 details=json.dumps(validation_errors)
@@ -174,95 +213,94 @@ def oauth_callback(request):
         first_name = name_parts[0] if len(name_parts) > 0 else ''
         last_name = name_parts[1] if len(name_parts) > 1 else ''
         
-        # Use database transaction for data consistency
-        with transaction.atomic():
-            try:
-                # Check if user exists
-                user, created = User.objects.get_or_create(
-                    email=email,
-                    defaults={
-                        'username': email,
-                        'first_name': first_name,
-                        'last_name': last_name,
-                        'oauth_provider': provider,
-                        'oauth_id': provider_id,
-                        'profile_image': image,
-                        'email_verified': True,
-                        'is_active': True,
-                        'orcid_id': orcid if provider == 'orcid' else None,
-                        'last_login': timezone.now(),
-                    }
-                )
+        # get_or_create runs its insert in its own transaction; the update below is a single save
+        try:
+            # Check if user exists
+            user, created = await User.objects.aget_or_create(
+                email=email,
+                defaults={
+                    'username': email,
+                    'first_name': first_name,
+                    'last_name': last_name,
+                    'oauth_provider': provider,
+                    'oauth_id': provider_id,
+                    'profile_image': image,
+                    'email_verified': True,
+                    'is_active': True,
+                    'orcid_id': orcid if provider == 'orcid' else None,
+                    'last_login': timezone.now(),
+                }
+            )
+            
+            if not created:
+                # Check if account is active
+                if not user.is_active:
+                    logger.warning(f"Inactive user attempted OAuth login: {email} via {provider}")
+                    return create_json_error_response(
+                        OAuthErrorCodes.ACCOUNT_DEACTIVATED,
+                        'Your account has been deactivated. Please contact support.',
+                        status_code=status.HTTP_403_FORBIDDEN
+                    )
                 
-                if not created:
-                    # Check if account is active
-                    if not user.is_active:
-                        logger.warning(f"Inactive user attempted OAuth login: {email} via {provider}")
-                        return create_error_response(
-                            OAuthErrorCodes.ACCOUNT_DEACTIVATED,
-                            'Your account has been deactivated. Please contact support.',
-                            status_code=status.HTTP_403_FORBIDDEN
-                        )
-                    
-                    # Update existing user
-                    update_fields = []
-                    
-                    if first_name and first_name != user.first_name:
-                        user.first_name = first_name
-                        update_fields.append('first_name')
-                    
-                    if last_name and last_name != user.last_name:
-                        user.last_name = last_name
-                        update_fields.append('last_name')
-                    
-                    if provider != user.oauth_provider:
-                        user.oauth_provider = provider
-                        update_fields.append('oauth_provider')
-                    
-                    if provider_id != user.oauth_id:
-                        user.oauth_id = provider_id
-                        update_fields.append('oauth_id')
-                    
-                    if image and image != user.profile_image:
-                        user.profile_image = image
-                        update_fields.append('profile_image')
-                    
-                    # Always update last login
-                    user.last_login = timezone.now()
-                    update_fields.append('last_login')
-                    
-                    # Handle ORCID
-                    if provider == 'orcid' and orcid and orcid != user.orcid_id:
-                        user.orcid_id = orcid
-                        update_fields.append('orcid_id')
-                    
-                    if update_fields:
-                        user.save(update_fields=update_fields)
+                # Update existing user
+                update_fields = []
                 
-                # Log successful authentication
-                logger.info(f"OAuth authentication successful: {email} via {provider} (created: {created})")
+                if first_name and first_name != user.first_name:
+                    user.first_name = first_name
+                    update_fields.append('first_name')
                 
-                # Return user data
-                serializer = UserSerializer(user)
-                return Response({
-                    'user': serializer.data,
-                    'created': created,
-                    'message': 'User authenticated successfully',
-                    'provider': provider,
-                    'timestamp': timezone.now().isoformat()
-                }, status=status.HTTP_200_OK)
+                if last_name and last_name != user.last_name:
+                    user.last_name = last_name
+                    update_fields.append('last_name')
                 
-            except IntegrityError as e:
-                logger.error(f"Database integrity error during OAuth callback: {str(e)}")
-                return create_error_response(
-                    OAuthErrorCodes.ACCOUNT_CREATION_FAILED,
-                    'Failed to create or update user account',
-                    details=str(e),
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
-    
+                if provider != user.oauth_provider:
+                    user.oauth_provider = provider
+                    update_fields.append('oauth_provider')
+                
+                if provider_id != user.oauth_id:
+                    user.oauth_id = provider_id
+                    update_fields.append('oauth_id')
+                
+                if image and image != user.profile_image:
+                    user.profile_image = image
+                    update_fields.append('profile_image')
+                
+                # Always update last login
+                user.last_login = timezone.now()
+                update_fields.append('last_login')
+                
+                # Handle ORCID
+                if provider == 'orcid' and orcid and orcid != user.orcid_id:
+                    user.orcid_id = orcid
+                    update_fields.append('orcid_id')
+                
+                if update_fields:
+                    await user.asave(update_fields=update_fields)
+            
+            # Log successful authentication
+            logger.info(f"OAuth authentication successful: {email} via {provider} (created: {created})")
+            
+            # Return user data
+            serializer = UserSerializer(user)
+            return JsonResponse({
+                'user': serializer.data,
+                'created': created,
+                'message': 'User authenticated successfully',
+                'provider': provider,
+                'timestamp': timezone.now().isoformat()
+            }, status=status.HTTP_200_OK)
+            
+        except IntegrityError as e:
+            logger.error(f"Database integrity error during OAuth callback: {str(e)}")
+            return create_json_error_response(
+                OAuthErrorCodes.ACCOUNT_CREATION_FAILED,
+                'Failed to create or update user account',
+                details=str(e),
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
     except ValidationError as e:
-        return create_error_response(
+        return create_json_error_response(
             OAuthErrorCodes.VALIDATION_ERROR,
             'Data validation failed',
             details=str(e)
@@ -271,12 +309,12 @@ def oauth_callback(request):
     except Exception as e:
         # Log unexpected errors with full context
         logger.error(f"Unexpected OAuth callback error: {str(e)}", exc_info=True, extra={
-            'request_data': request.data,
+            'request_data': raw_data,
             'user_agent': request.META.get('HTTP_USER_AGENT'),
             'ip_address': request.META.get('REMOTE_ADDR'),
         })
         
-        return create_error_response(
+        return create_json_error_response(
             OAuthErrorCodes.DATABASE_ERROR,
             'An unexpected error occurred during authentication',
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.admin_management.access import PermissionResolver
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """Cached principals and compiled permissions of the user are stale after the change commits"""
+    user_id = instance.pk
+    transaction.on_commit(lambda: PermissionResolver.invalidate_user(user_id))
@@ -1,3 +1,53 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from apps.admin_management.access import PermissionResolver
+
+from .principals import CachedJWTAuthentication
+
+User = get_user_model()
+
+
+class PrincipalCacheTests(TestCase):
+    """Test cases for JWT authentication through cached user principals"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='researcher', email='researcher@example.com', password='testpass123',
+            first_name='Data', last_name='Researcher', subscription_type='premium'
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.request = RequestFactory().get('/api/auth/profile/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_warm_authentication_runs_no_queries(self):
+        """The second request is served from the cache, permissions included"""
+        CachedJWTAuthentication().authenticate(self.request)
+        PermissionResolver.has_perm(self.user, 'view_results')  # Compiles and caches the permissions
+
+        with self.assertNumQueries(0):
+            user, _ = CachedJWTAuthentication().authenticate(self.request)
+            self.assertFalse(PermissionResolver.has_perm(user, 'view_results'))
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.subscription_type, 'premium')
+        self.assertTrue(user.check_password('testpass123'))  # Deferred password loads on access
+
+    def test_user_changes_invalidate_the_principal(self):
+        """Saving the user replaces the snapshot; a deactivated user is rejected"""
+        CachedJWTAuthentication().authenticate(self.request)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.subscription_type = 'institutional'
+            self.user.save()
+        user, _ = CachedJWTAuthentication().authenticate(self.request)
+        self.assertEqual(user.subscription_type, 'institutional')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            CachedJWTAuthentication().authenticate(self.request)
@@ -1,11 +1,14 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import (
     BlogPost, BlogCategory, BlogTag, MediaFile, MediaFolder, MediaTag,
-    SEOAnalysis, BlogAnalytics, BlogComment, BlogPostVersion
+    SEOAnalysis, BlogAnalytics, BlogAnalyticsRollup, BlogComment, BlogPostVersion
 )
+from .comments import CommentThreadService
+from .response_cache import ResponseCacheService
 
 
 @admin.register(BlogCategory)
@@ -182,6 +185,15 @@ class BlogAnalyticsAdmin(admin.ModelAdmin):
     date_hierarchy = 'date'
 
 
+@admin.register(BlogAnalyticsRollup)
+class BlogAnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = ['period', 'period_start', 'scope', 'post', 'category', 'page_views', 'unique_visitors', 'updated_at']
+    list_filter = ['period', 'scope']
+    search_fields = ['post__title', 'category__name']
+    list_select_related = ['post', 'category']
+    date_hierarchy = 'period_start'
+
+
 @admin.register(BlogComment)
 class BlogCommentAdmin(admin.ModelAdmin):
     list_display = ['post', 'author', 'content_preview', 'is_approved', 'is_spam', 'created_at']
@@ -194,20 +206,29 @@ class BlogCommentAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content Preview'
     
     def approve_comments(self, request, queryset):
+        post_ids = set(queryset.values_list('post_id', flat=True))
         queryset.update(is_approved=True, is_spam=False)
+        CommentThreadService.invalidate(post_ids)
+        transaction.on_commit(lambda: ResponseCacheService.invalidate_posts(post_ids))
     approve_comments.short_description = "Approve selected comments"
     
     def mark_as_spam(self, request, queryset):
+        post_ids = set(queryset.values_list('post_id', flat=True))
         queryset.update(is_spam=True, is_approved=False)
+        CommentThreadService.invalidate(post_ids)
+        transaction.on_commit(lambda: ResponseCacheService.invalidate_posts(post_ids))
     mark_as_spam.short_description = "Mark selected comments as spam"
 
 
 @admin.register(BlogPostVersion)
 class BlogPostVersionAdmin(admin.ModelAdmin):
-    list_display = ['post', 'version_number', 'changed_by', 'change_summary', 'created_at']
-    list_filter = ['changed_by', 'created_at']
+    list_display = ['post', 'version_number', 'is_snapshot', 'content_length', 'changed_by', 'change_summary', 'created_at']
+    list_filter = ['is_snapshot', 'changed_by', 'created_at']
     search_fields = ['post__title', 'change_summary']
-    readonly_fields = ['version_number', 'created_at']
+    readonly_fields = ['version_number', 'is_snapshot', 'delta', 'content_length', 'created_at']
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('post', 'changed_by')
\ No newline at end of file
+        # The list only shows metadata; the change form loads content lazily
+        return super().get_queryset(request).select_related('post', 'changed_by').defer(
+            'content', 'excerpt', 'delta'
+        )
\ No newline at end of file
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class BlogConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.blog'
+    verbose_name = 'Blog'
+
+    def ready(self):
+        # Register signal handlers that keep derived data in sync
+        from . import signals  # noqa: F401
@@ -0,0 +1,176 @@
+"""
+Content-addressed media storage
+
+Uploads are hashed while they are received and identical content is stored
+once as a reference-counted MediaBlob.
+"""
+import hashlib
+import os
+from datetime import timedelta
+from typing import Any, Dict
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MediaBlob, MediaFile
+
+
+class HashingUploadMixin:
+    """Feeds every received chunk into a SHA-256 and attaches the digest"""
+
+    def new_file(self, *args, **kwargs):
+        self.sha256 = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def _hashing(self):
+        return True
+
+    def receive_data_chunk(self, raw_data, start):
+        if self._hashing():
+            self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    def _hashing(self):
+        # Large files pass through to the temporary-file handler, which hashes them
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def hashing_upload_handlers(request):
+    return [HashingMemoryFileUploadHandler(request), HashingTemporaryFileUploadHandler(request)]
+
+
+class MediaBlobService:
+    """Service for storing, sharing and collecting media blobs"""
+
+    ORIGINALS_PREFIX = 'media/originals'
+    VARIANTS_PREFIX = 'media/variants'
+    GC_GRACE_PERIOD = timedelta(hours=24)
+
+    @classmethod
+    def digest(cls, file) -> str:
+        """SHA-256 computed during upload, or by streaming the file's chunks"""
+        digest = getattr(file, 'sha256', None)
+        if digest is None:
+            hasher = hashlib.sha256()
+            for chunk in file.chunks():
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+            file.seek(0)
+        return digest
+
+    @classmethod
+    def blob_path(cls, digest: str, name: str) -> str:
+        extension = os.path.splitext(name)[1].lower()
+        return f"{cls.ORIGINALS_PREFIX}/{digest[:2]}/{digest}{extension}"
+
+    @classmethod
+    def store(cls, file, mime_type: str = '') -> MediaBlob:
+        """Blob for the upload's content, writing it only if it is new"""
+        digest = cls.digest(file)
+        blob = MediaBlob.objects.filter(sha256=digest).first()
+        if blob is not None:
+            return blob
+
+        path = cls.blob_path(digest, file.name)
+        if not default_storage.exists(path):
+            path = default_storage.save(path, file)
+        try:
+            with transaction.atomic():
+                return MediaBlob.objects.create(
+                    sha256=digest, size=file.size, mime_type=mime_type, storage_path=path
+                )
+        except IntegrityError:
+            # A concurrent upload of the same content created the blob first
+            return MediaBlob.objects.get(sha256=digest)
+
+    @classmethod
+    def adjust_refs(cls, blob_id, delta: int):
+        MediaBlob.objects.filter(pk=blob_id).update(ref_count=Greatest(F('ref_count') + delta, Value(0)))
+
+    @classmethod
+    def recount(cls) -> int:
+        """Repair ref_count from the actual MediaFile rows; returns blobs fixed"""
+        fixed = 0
+        for blob in MediaBlob.objects.annotate(actual=Count('media_files')).exclude(ref_count=F('actual')):
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=blob.actual)
+            fixed += 1
+        return fixed
+
+    @classmethod
+    def collect_garbage(cls, grace_period: timedelta = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete blobs no MediaFile references, plus their stored variants.
+
+        Blobs younger than the grace period are kept so an upload whose
+        MediaFile row is still being created is never collected.
+        """
+        if grace_period is None:
+            grace_period = cls.GC_GRACE_PERIOD
+        cutoff = timezone.now() - grace_period
+        candidates = MediaBlob.objects.filter(ref_count=0, created_at__lt=cutoff)
+
+        deleted = freed = 0
+        for blob in candidates.iterator():
+            with transaction.atomic():
+                locked = (
+                    MediaBlob.objects.select_for_update()
+                    .filter(pk=blob.pk, ref_count=0)
+                    .exclude(media_files__isnull=False)
+                    .first()
+                )
+                if locked is None:
+                    continue
+                if not dry_run:
+                    locked.delete()
+                    transaction.on_commit(lambda blob=locked: cls._delete_files(blob))
+            deleted += 1
+            freed += blob.size
+        return {'blobs': deleted, 'bytes': freed}
+
+    @classmethod
+    def _delete_files(cls, blob: MediaBlob):
+        if default_storage.exists(blob.storage_path):
+            default_storage.delete(blob.storage_path)
+        directory = f"{cls.VARIANTS_PREFIX}/{blob.sha256[:2]}/{blob.sha256}"
+        try:
+            _, files = default_storage.listdir(directory)
+        except (FileNotFoundError, NotImplementedError):
+            return
+        for name in files:
+            default_storage.delete(f"{directory}/{name}")
+
+    @classmethod
+    def savings_report(cls) -> Dict[str, Any]:
+        """Logical (per MediaFile) vs physical (per blob) storage use"""
+        files = MediaFile.objects.filter(blob__isnull=False).aggregate(count=Count('id'), logical=Sum('file_size'))
+        blobs = MediaBlob.objects.filter(ref_count__gt=0).aggregate(count=Count('id'), physical=Sum('size'))
+        orphans = MediaBlob.objects.filter(ref_count=0).aggregate(count=Count('id'), size=Sum('size'))
+
+        logical = files['logical'] or 0
+        physical = blobs['physical'] or 0
+        return {
+            'files': files['count'],
+            'blobs': blobs['count'],
+            'logical_bytes': logical,
+            'physical_bytes': physical,
+            'saved_bytes': logical - physical,
+            'dedup_ratio': round(logical / physical, 2) if physical else 1.0,
+            'orphaned_blobs': orphans['count'],
+            'orphaned_bytes': orphans['size'] or 0,
+        }
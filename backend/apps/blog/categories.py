@@ -0,0 +1,68 @@
+"""
+Category tree materialization
+
+The category tree is loaded with one query ordered by materialized path and
+cached until a category changes.
+"""
+from typing import Any, Dict, List, Optional
+
+from django.core.cache import cache
+
+from .models import BlogCategory
+
+
+class CategoryTreeService:
+    """Service for serving the category hierarchy from a cached tree"""
+
+    CACHE_KEY = 'blog:category-tree'
+    CACHE_TIMEOUT = 60 * 60
+
+    @classmethod
+    def build(cls) -> Dict[str, Any]:
+        """Serialize every category and link children/ancestors in memory"""
+        from .serializers import BlogCategoryBaseSerializer
+
+        roots = []
+        nodes = {}
+        for category in BlogCategory.objects.order_by('path'):
+            node = dict(BlogCategoryBaseSerializer(category).data)
+            parent = nodes.get(str(category.parent_id)) if category.parent_id else None
+            node['children'] = []
+            node['hierarchy'] = (parent['hierarchy'] if parent else []) + [
+                {'id': node['id'], 'name': node['name'], 'slug': node['slug']}
+            ]
+            nodes[node['id']] = node
+            (parent['children'] if parent else roots).append(node)
+
+        roots.sort(key=lambda node: node['name'])
+        for node in nodes.values():
+            node['children'].sort(key=lambda child: child['name'])
+
+        return {'roots': roots, 'nodes': nodes}
+
+    @classmethod
+    def get_index(cls) -> Dict[str, Any]:
+        index = cache.get(cls.CACHE_KEY)
+        if index is None:
+            index = cls.build()
+            cache.set(cls.CACHE_KEY, index, cls.CACHE_TIMEOUT)
+        return index
+
+    @classmethod
+    def get_tree(cls) -> List[Dict[str, Any]]:
+        """Serialized root categories with nested children"""
+        return cls.get_index()['roots']
+
+    @classmethod
+    def get_node(cls, category_id) -> Optional[Dict[str, Any]]:
+        """Serialized node for one category (None if it does not exist yet)"""
+        node = cls.get_index()['nodes'].get(str(category_id))
+        if node is None:
+            # Created after the cached tree was built
+            cls.invalidate()
+            node = cls.get_index()['nodes'].get(str(category_id))
+        return node
+
+    @classmethod
+    def invalidate(cls):
+        cache.delete(cls.CACHE_KEY)
@@ -0,0 +1,124 @@
+"""
+Comment thread loading
+
+Comment trees are built from one query per post, cached and paged with an
+opaque cursor.
+"""
+import base64
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Optional
+
+from django.core.cache import cache
+
+from .models import BlogComment
+
+
+class CommentThreadService:
+    """Service for serving threaded comments from a per-post cache"""
+
+    CACHE_PREFIX = 'blog:comment-threads:'
+    CACHE_TIMEOUT = 60 * 60
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+
+    @classmethod
+    def cache_key(cls, post_id) -> str:
+        return f'{cls.CACHE_PREFIX}{post_id}'
+
+    @classmethod
+    def visible_comments(cls, post_id):
+        return (
+            BlogComment.objects.filter(post_id=post_id, is_approved=True, is_spam=False)
+            .select_related('author')
+            .order_by('created_at', 'id')
+        )
+
+    @classmethod
+    def build(cls, post_id) -> Dict[str, Any]:
+        """Serialize every visible comment of a post and link replies in memory"""
+        from .serializers import BlogCommentBaseSerializer
+
+        comments = list(cls.visible_comments(post_id))
+        nodes = {}
+        for comment, data in zip(comments, BlogCommentBaseSerializer(comments, many=True).data):
+            node = dict(data)
+            node['replies'] = []
+            nodes[str(comment.pk)] = node
+
+        threads, keys = [], []
+        for comment in comments:
+            node = nodes[str(comment.pk)]
+            if comment.parent_id is None:
+                threads.append(node)
+                keys.append(cls._sort_key(comment))
+            else:
+                parent = nodes.get(str(comment.parent_id))
+                if parent is not None:
+                    parent['replies'].append(node)
+                else:
+                    # Hidden parent: its replies stay hidden too
+                    del nodes[str(comment.pk)]
+
+        return {'threads': threads, 'keys': keys, 'nodes': nodes}
+
+    @classmethod
+    def get_index(cls, post_id) -> Dict[str, Any]:
+        key = cls.cache_key(post_id)
+        index = cache.get(key)
+        if index is None:
+            index = cls.build(post_id)
+            cache.set(key, index, cls.CACHE_TIMEOUT)
+        return index
+
+    @classmethod
+    def get_threads(cls, post_id):
+        """All top-level threads of a post with nested replies"""
+        return cls.get_index(post_id)['threads']
+
+    @classmethod
+    def get_node(cls, post_id, comment_id) -> Optional[Dict[str, Any]]:
+        """Serialized comment with its replies (None if it is not visible)"""
+        return cls.get_index(post_id)['nodes'].get(str(comment_id))
+
+    @classmethod
+    def get_page(cls, post_id, cursor: Optional[str] = None, page_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        One page of top-level threads after ``cursor``.
+
+        Returns ``count`` (total threads), ``results`` and ``next_cursor``
+        (None on the last page). Cursors are positions in (created_at, id)
+        order, so threads added or removed between requests do not shift pages.
+        """
+        page_size = min(max(1, page_size or cls.PAGE_SIZE), cls.MAX_PAGE_SIZE)
+        index = cls.get_index(post_id)
+        keys = index['keys']
+
+        start = bisect_right(keys, cls.decode_cursor(cursor)) if cursor else 0
+        results = index['threads'][start:start + page_size]
+        end = start + len(results)
+        return {
+            'count': len(keys),
+            'results': results,
+            'next_cursor': cls.encode_cursor(keys[end - 1]) if end < len(keys) else None,
+        }
+
+    @staticmethod
+    def _sort_key(comment: BlogComment):
+        return (comment.created_at.isoformat(), str(comment.pk))
+
+    @staticmethod
+    def encode_cursor(key) -> str:
+        return base64.urlsafe_b64encode('|'.join(key).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """Sort key encoded in a cursor; raises ValueError if it is malformed"""
+        try:
+            created_at, comment_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        except (TypeError, UnicodeError, ValueError):
+            raise ValueError('Invalid cursor')
+        return (created_at, comment_id)
+
+    @classmethod
+    def invalidate(cls, post_ids: Iterable):
+        cache.delete_many([cls.cache_key(post_id) for post_id in set(post_ids)])
@@ -0,0 +1,304 @@
+"""
+Buffered view/like counters for blog posts
+
+View and like deltas are buffered and written to BlogPost and BlogAnalytics
+in bulk by a periodic flush.
+"""
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import BlogPost, BlogAnalytics, BlogPostLike
+from .response_cache import ResponseCacheService
+from .rollups import AnalyticsRollupService
+
+
+def counter_key(post_id, metric: str, day: str = '') -> str:
+    return f'{post_id}|{day}|{metric}'
+
+
+class LocalCounterBuffer:
+    """In-process buffer used in development (no Redis cache configured)"""
+
+    flushes_inline = True
+    MAX_MARKERS = 100000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas = defaultdict(int)
+        self._markers = {}
+        self.last_flush = time.monotonic()
+
+    def mark(self, key: str, ttl: int) -> bool:
+        """Set a dedup marker; returns False if it was already set"""
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._markers.get(key)
+            if expires_at and expires_at > now:
+                return False
+            if len(self._markers) >= self.MAX_MARKERS:
+                self._markers = {k: v for k, v in self._markers.items() if v > now}
+            self._markers[key] = now + ttl
+            return True
+
+    def incr(self, entries: Dict[str, int]):
+        with self._lock:
+            for key, delta in entries.items():
+                self._deltas[key] += delta
+
+    def pending(self, post_id, metrics: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {metric: self._deltas.get(counter_key(post_id, metric), 0) for metric in metrics}
+
+    def drain(self) -> Dict[str, int]:
+        with self._lock:
+            deltas = dict(self._deltas)
+            self._deltas.clear()
+            self.last_flush = time.monotonic()
+        return deltas
+
+    def ack(self):
+        pass
+
+    def restore(self, deltas: Dict[str, int]):
+        self.incr(deltas)
+
+
+class RedisCounterBuffer:
+    """Redis hash buffer shared by all worker processes"""
+
+    flushes_inline = False
+    PENDING_KEY = 'blog:counters:pending'
+    FLUSHING_KEY = 'blog:counters:flushing'
+    MARKER_PREFIX = 'blog:counters:seen:'
+
+    def __init__(self, client):
+        self.client = client
+
+    def mark(self, key: str, ttl: int) -> bool:
+        return bool(self.client.set(self.MARKER_PREFIX + key, 1, nx=True, ex=ttl))
+
+    def incr(self, entries: Dict[str, int]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, delta in entries.items():
+            pipe.hincrby(self.PENDING_KEY, key, delta)
+        pipe.execute()
+
+    def pending(self, post_id, metrics: Iterable[str]) -> Dict[str, int]:
+        metrics = list(metrics)
+        fields = [counter_key(post_id, metric) for metric in metrics]
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hmget(self.PENDING_KEY, fields)
+        # Deltas being flushed are not in the database yet either
+        pipe.hmget(self.FLUSHING_KEY, fields)
+        pending, flushing = pipe.execute()
+        return {
+            metric: int(pending[i] or 0) + int(flushing[i] or 0)
+            for i, metric in enumerate(metrics)
+        }
+
+    def drain(self) -> Dict[str, int]:
+        # A batch left behind by a failed flush is retried before taking a new one
+        if not self.client.exists(self.FLUSHING_KEY):
+            if not self.client.exists(self.PENDING_KEY):
+                return {}
+            self.client.rename(self.PENDING_KEY, self.FLUSHING_KEY)
+        raw = self.client.hgetall(self.FLUSHING_KEY)
+        return {key.decode(): int(value) for key, value in raw.items()}
+
+    def ack(self):
+        self.client.delete(self.FLUSHING_KEY)
+
+    def restore(self, deltas: Dict[str, int]):
+        # The flushing hash is kept and retried by the next flush
+        pass
+
+
+class BlogCounterService:
+    """Service for recording and flushing blog post view/like counters"""
+
+    VIEW_WINDOW = 30 * 60  # Repeat views by one visitor within 30 minutes count once
+    LOCAL_FLUSH_INTERVAL = 10  # seconds
+    FLUSH_LOCK_KEY = 'blog:counters:flush-lock'
+    FLUSH_LOCK_TIMEOUT = 120
+    BATCH_SIZE = 500
+
+    # Buffer metric -> BlogPost field / BlogAnalytics field
+    TOTAL_FIELDS = {'views': 'view_count', 'likes': 'like_count'}
+    DAILY_FIELDS = {'views': 'page_views', 'unique_visitors': 'unique_visitors', 'likes': 'likes'}
+
+    _buffer = None
+
+    @classmethod
+    def get_buffer(cls):
+        if cls._buffer is None:
+            try:
+                from django_redis import get_redis_connection
+                cls._buffer = RedisCounterBuffer(get_redis_connection('default'))
+            except (ImportError, NotImplementedError):
+                cls._buffer = LocalCounterBuffer()
+        return cls._buffer
+
+    @classmethod
+    def visitor_id(cls, request) -> str:
+        """Stable visitor identifier: user id, else hashed IP + user agent"""
+        if request.user.is_authenticated:
+            return f'u:{request.user.pk}'
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        ip = x_forwarded_for.split(',')[0].strip() if x_forwarded_for else request.META.get('REMOTE_ADDR', '')
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        return 'a:' + hashlib.sha1(f'{ip}|{user_agent}'.encode('utf-8')).hexdigest()[:20]
+
+    @classmethod
+    def record_view(cls, post: BlogPost, visitor: str) -> Dict[str, int]:
+        """Count a page view (deduplicated per visitor) and return current counts"""
+        buffer = cls.get_buffer()
+        today = timezone.localdate().isoformat()
+
+        if buffer.mark(f'view:{post.pk}:{visitor}', cls.VIEW_WINDOW):
+            entries = {
+                counter_key(post.pk, 'views'): 1,
+                counter_key(post.pk, 'views', today): 1,
+            }
+            if buffer.mark(f'visitor:{today}:{post.pk}:{visitor}', 24 * 60 * 60):
+                entries[counter_key(post.pk, 'unique_visitors', today)] = 1
+            buffer.incr(entries)
+
+        cls._maybe_flush(buffer)
+        return cls.current_counts(post)
+
+    @classmethod
+    def record_like(cls, post: BlogPost, visitor: str, liked: bool = True) -> Dict[str, int]:
+        """Like or unlike a post once per visitor and return current counts"""
+        buffer = cls.get_buffer()
+        if liked:
+            _, changed = BlogPostLike.objects.get_or_create(post_id=post.pk, visitor=visitor)
+            delta = 1
+        else:
+            changed = BlogPostLike.objects.filter(post_id=post.pk, visitor=visitor).delete()[0] > 0
+            delta = -1
+
+        if changed:
+            today = timezone.localdate().isoformat()
+            buffer.incr({
+                counter_key(post.pk, 'likes'): delta,
+                counter_key(post.pk, 'likes', today): delta,
+            })
+
+        cls._maybe_flush(buffer)
+        return cls.current_counts(post)
+
+    @classmethod
+    def current_counts(cls, post: BlogPost) -> Dict[str, int]:
+        """Database value plus the delta still waiting in the buffer"""
+        pending = cls.get_buffer().pending(post.pk, cls.TOTAL_FIELDS)
+        return {
+            field: max(0, getattr(post, field) + pending[metric])
+            for metric, field in cls.TOTAL_FIELDS.items()
+        }
+
+    @classmethod
+    def _maybe_flush(cls, buffer):
+        if buffer.flushes_inline and time.monotonic() - buffer.last_flush >= cls.LOCAL_FLUSH_INTERVAL:
+            cls.flush()
+
+    @classmethod
+    def flush(cls) -> int:
+        """Write buffered deltas to the database; returns number of keys written"""
+        if not cache.add(cls.FLUSH_LOCK_KEY, 1, cls.FLUSH_LOCK_TIMEOUT):
+            return 0
+
+        try:
+            buffer = cls.get_buffer()
+            deltas = buffer.drain()
+            if deltas:
+                try:
+                    cls._write(deltas)
+                except Exception:
+                    buffer.restore(deltas)
+                    raise
+            buffer.ack()
+            return len(deltas)
+        finally:
+            cache.delete(cls.FLUSH_LOCK_KEY)
+
+    @classmethod
+    def _write(cls, deltas: Dict[str, int]):
+        totals = defaultdict(dict)
+        daily = defaultdict(dict)
+        for key, delta in deltas.items():
+            if not delta:
+                continue
+            post_id, day, metric = key.split('|')
+            if day:
+                daily[(post_id, day)][metric] = delta
+            else:
+                totals[post_id][metric] = delta
+
+        with transaction.atomic():
+            cls._write_totals(totals)
+            cls._write_daily(daily)
+            AnalyticsRollupService.refresh(daily.keys())
+            if totals:
+                # Cached public responses show view_count/like_count
+                post_ids = list(totals)
+                transaction.on_commit(lambda: ResponseCacheService.invalidate_posts(post_ids))
+
+    @classmethod
+    def _write_totals(cls, totals: Dict[str, Dict[str, int]]):
+        """One UPDATE ... CASE per chunk of posts"""
+        post_ids = list(totals)
+        for start in range(0, len(post_ids), cls.BATCH_SIZE):
+            chunk = post_ids[start:start + cls.BATCH_SIZE]
+            updates = {}
+            for metric, field in cls.TOTAL_FIELDS.items():
+                whens = [
+                    When(pk=post_id, then=Value(totals[post_id][metric]))
+                    for post_id in chunk if totals[post_id].get(metric)
+                ]
+                if whens:
+                    delta = Case(*whens, default=Value(0), output_field=IntegerField())
+                    updates[field] = Greatest(F(field) + delta, Value(0))
+            if updates:
+                BlogPost.objects.filter(pk__in=chunk).update(**updates)
+
+    @classmethod
+    def _write_daily(cls, daily: Dict[tuple, Dict[str, int]]):
+        if not daily:
+            return
+
+        post_ids = {post_id for post_id, _ in daily}
+        days = {day for _, day in daily}
+        existing_posts = {
+            str(pk) for pk in BlogPost.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+        }
+        rows = {
+            (str(row.post_id), row.date.isoformat()): row
+            for row in BlogAnalytics.objects.select_for_update().filter(post_id__in=post_ids, date__in=days)
+        }
+
+        to_update, to_create = [], []
+        for (post_id, day), metrics in daily.items():
+            if post_id not in existing_posts:
+                continue
+            row = rows.get((post_id, day))
+            is_new = row is None
+            if is_new:
+                row = BlogAnalytics(post_id=post_id, date=day)
+            for metric, delta in metrics.items():
+                field = cls.DAILY_FIELDS[metric]
+                setattr(row, field, max(0, getattr(row, field) + delta))
+            (to_create if is_new else to_update).append(row)
+
+        if to_update:
+            BlogAnalytics.objects.bulk_update(to_update, list(cls.DAILY_FIELDS.values()), batch_size=cls.BATCH_SIZE)
+        if to_create:
+            BlogAnalytics.objects.bulk_create(to_create, batch_size=cls.BATCH_SIZE)
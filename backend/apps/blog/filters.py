@@ -1,6 +1,6 @@
 import django_filters
-from django.db.models import Q
 from .models import BlogPost, BlogCategory, BlogTag
+from .search import BlogSearchService
 
 
 class BlogPostFilter(django_filters.FilterSet):
@@ -70,19 +70,8 @@ class BlogPostFilter(django_filters.FilterSet):
         ]
     
     def filter_search(self, queryset, name, value):
-        """Custom search filter"""
-        if not value:
-            return queryset
-        
-        return queryset.filter(
-            Q(title__icontains=value) |
-            Q(content__icontains=value) |
-            Q(excerpt__icontains=value) |
-            Q(meta_title__icontains=value) |
-            Q(meta_description__icontains=value) |
-            Q(tags__name__icontains=value) |
-            Q(categories__name__icontains=value)
-        ).distinct()
+        """Full-text search filter (see BlogSearchService)"""
+        return BlogSearchService.filter_queryset(queryset, value)
 
 
 class BlogCategoryFilter(django_filters.FilterSet):
@@ -0,0 +1,260 @@
+"""
+Image rendering pipeline
+
+Uploads are decoded once, memory aware, into resized variants, a BlurHash and
+an LQIP, in a shared process pool.
+"""
+import base64
+import math
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+from PIL import Image, ImageOps, features
+
+EXIF_ORIENTATION = 0x0112
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+FORMAT_OPTIONS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', 'image/avif', {'quality': 55, 'speed': 6}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+LQIP_WIDTH = 16
+BLURHASH_COMPONENTS = (4, 3)
+BLURHASH_SAMPLE = 32
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+
+@dataclass
+class Variant:
+    width: int
+    height: int
+    format: str
+    mime_type: str
+    content: bytes
+
+
+@dataclass
+class RenderedImage:
+    width: int
+    height: int
+    blurhash: str
+    lqip: str
+    variants: List[Variant] = field(default_factory=list)
+
+
+def supported_formats(formats: Iterable[str]) -> List[str]:
+    """Requested formats this Pillow build can encode (AVIF needs libavif)"""
+    return [fmt for fmt in formats if fmt in FORMAT_OPTIONS and features.check(fmt if fmt != 'jpeg' else 'jpg')]
+
+
+def _decode(data: bytes, max_width: int) -> Tuple[Image.Image, int, int]:
+    """Decode once at the smallest scale that still covers ``max_width``"""
+    image = Image.open(BytesIO(data))
+    raw_width, raw_height = image.size
+    orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+    width, height = (raw_height, raw_width) if orientation in TRANSPOSED_ORIENTATIONS else (raw_width, raw_height)
+
+    target = min(max_width, width)
+    if image.format == 'JPEG':
+        ratio = target / width
+        # draft() picks a DCT scale that keeps the image at least this large
+        image.draft('RGB', (math.ceil(raw_width * ratio), math.ceil(raw_height * ratio)))
+
+    image = ImageOps.exif_transpose(image)
+    factor = image.width // target
+    if factor >= 2:
+        image = image.reduce(factor)
+
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    mode = 'RGBA' if has_alpha else 'RGB'
+    if image.mode != mode:
+        image = image.convert(mode)
+    return image, width, height
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    pil_format, _, options = FORMAT_OPTIONS[fmt]
+    if fmt == 'jpeg' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _resize(image: Image.Image, width: int) -> Image.Image:
+    if width >= image.width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS, reducing_gap=2.0)
+
+
+def render_image(data: bytes, widths: Sequence[int], formats: Sequence[str]) -> RenderedImage:
+    """Decode ``data`` once and render all variants and placeholders"""
+    image, width, height = _decode(data, max(widths))
+
+    targets = sorted({min(target, width) for target in widths}, reverse=True)
+    variants = []
+    for target in targets:
+        # The decoded base is at least as wide as the largest target
+        resized = _resize(image, target)
+        for fmt in formats:
+            variants.append(Variant(
+                width=resized.width, height=resized.height, format=fmt,
+                mime_type=FORMAT_OPTIONS[fmt][1], content=_encode(resized, fmt),
+            ))
+
+    return RenderedImage(
+        width=width,
+        height=height,
+        blurhash=blurhash(image),
+        lqip=lqip(image),
+        variants=variants,
+    )
+
+
+def lqip(image: Image.Image) -> str:
+    """Tiny blurred preview as a data URI"""
+    preview = _resize(image, LQIP_WIDTH)
+    buffer = BytesIO()
+    preview.save(buffer, 'WEBP', quality=40)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def _base83(value: int, length: int) -> str:
+    return ''.join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _srgb_to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash(image: Image.Image, components: Tuple[int, int] = BLURHASH_COMPONENTS) -> str:
+    """Encode a BlurHash from a small RGB sample of the image"""
+    components_x, components_y = components
+    sample_height = max(1, round(BLURHASH_SAMPLE * image.height / image.width))
+    sample = image.convert('RGB').resize((BLURHASH_SAMPLE, sample_height), Image.BILINEAR)
+    width, height = sample.size
+
+    linear = [tuple(_srgb_to_linear(channel) for channel in pixel) for pixel in sample.getdata()]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(components_x)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(components_y)]
+
+    factors = []
+    for j in range(components_y):
+        for i in range(components_x):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            r = g = b = 0.0
+            for y in range(height):
+                row_basis = normalisation * cos_y[j][y]
+                offset = y * width
+                for x in range(width):
+                    basis = row_basis * cos_x[i][x]
+                    pr, pg, pb = linear[offset + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(value) for factor in ac for value in factor)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+
+    r, g, b = (_linear_to_srgb(value) for value in dc)
+    result += _base83((r << 16) + (g << 8) + b, 4)
+
+    for factor in ac:
+        quantised = [
+            max(0, min(18, int(math.floor(_sign_pow(value / max_value, 0.5) * 9 + 9.5))))
+            for value in factor
+        ]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+    return result
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        return _executor
+
+
+def _pool_available(workers: int) -> bool:
+    # Daemonic processes (e.g. Celery prefork children) cannot start a pool
+    return workers > 1 and not multiprocessing.current_process().daemon
+
+
+def run_in_pool(func: Callable, *args, workers: int = 2):
+    """Run one job in the shared pool (inline when a pool is not available)"""
+    if not _pool_available(workers):
+        return func(*args)
+    return _get_executor(workers).submit(func, *args).result()
+
+
+def map_in_pool(func: Callable, jobs: Iterable[Tuple[Any, tuple]], workers: int = 2,
+                max_in_flight: int = None) -> Iterator[Tuple[Any, Any]]:
+    """
+    Run ``func(*args)`` for each ``(key, args)`` job, yielding
+    ``(key, result_or_exception)`` in submission order.
+
+    At most ``max_in_flight`` jobs (default ``2 * workers``) are submitted
+    at a time, which bounds the memory held by pending inputs and outputs.
+    """
+    if not _pool_available(workers):
+        for key, args in jobs:
+            try:
+                yield key, func(*args)
+            except Exception as exc:
+                yield key, exc
+        return
+
+    executor = _get_executor(workers)
+    max_in_flight = max_in_flight or 2 * workers
+    pending = deque()
+    for key, args in jobs:
+        pending.append((key, executor.submit(func, *args)))
+        if len(pending) >= max_in_flight:
+            yield _result(*pending.popleft())
+    while pending:
+        yield _result(*pending.popleft())
+
+
+def _result(key, future):
+    try:
+        return key, future.result()
+    except Exception as exc:
+        return key, exc
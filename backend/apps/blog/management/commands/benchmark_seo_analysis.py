@@ -0,0 +1,79 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from apps.blog.seo import analyze_paragraph, count_syllables
+from apps.blog.services import SEOAnalysisService
+
+
+class Command(BaseCommand):
+    help = 'Measure SEO analysis latency on a generated long post (cold, warm and after an edit)'
+
+    VOCABULARY = [
+        'research', 'analysis', 'statistical', 'regression', 'variable', 'sample',
+        'survey', 'questionnaire', 'reliability', 'validity', 'hypothesis', 'model',
+        'data', 'method', 'result', 'factor', 'structural', 'equation', 'the', 'and',
+        'of', 'to', 'a', 'in', 'is', 'for', 'example', 'significant', 'correlation',
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=10000, help='Approximate post length in words')
+        parser.add_argument('--runs', type=int, default=5, help='Repetitions per scenario')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        paragraphs = self.generate_paragraphs(rng, options['words'])
+        content = '\n\n'.join(paragraphs)
+        runs = options['runs']
+
+        def analyze(text):
+            return SEOAnalysisService.analyze_content(
+                text, 'A complete guide to regression analysis', 'Learn regression.', 'regression'
+            )
+
+        cold = []
+        for _ in range(runs):
+            analyze_paragraph.cache_clear()
+            count_syllables.cache_clear()
+            cold.append(self.timed(analyze, content))
+
+        warm = [self.timed(analyze, content) for _ in range(runs)]
+
+        edited = []
+        for run in range(runs):
+            changed = list(paragraphs)
+            index = rng.randrange(len(changed))
+            changed[index] = f'{changed[index]} Edited sentence number {run}.'
+            edited.append(self.timed(analyze, '\n\n'.join(changed)))
+
+        self.stdout.write(f'Post: {options["words"]} words, {len(paragraphs)} paragraphs, {runs} runs')
+        for label, samples in (('cold', cold), ('warm', warm), ('one paragraph edited', edited)):
+            samples.sort()
+            self.stdout.write(
+                f'  {label:<22} median {samples[len(samples) // 2]:8.2f} ms   min {samples[0]:8.2f} ms'
+            )
+        self.stdout.write(f'  paragraph cache: {analyze_paragraph.cache_info()}')
+
+    def timed(self, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        return (time.perf_counter() - start) * 1000
+
+    def generate_paragraphs(self, rng, total_words):
+        paragraphs = []
+        words = 0
+        while words < total_words:
+            if len(paragraphs) % 8 == 0:
+                paragraphs.append(f'<h2>Section {len(paragraphs) // 8 + 1}: regression</h2>')
+            sentences = []
+            for _ in range(rng.randint(4, 7)):
+                length = rng.randint(8, 22)
+                sentences.append(' '.join(rng.choice(self.VOCABULARY) for _ in range(length)).capitalize() + '.')
+                words += length
+            body = ' '.join(sentences)
+            if rng.random() < 0.2:
+                body += ' See <a href="/blog/posts/">related posts</a> or <a href="https://example.org">this source</a>.'
+            if rng.random() < 0.1:
+                body += ' <img src="/media/figure.png" alt="Figure">'
+            paragraphs.append(f'<p>{body}</p>')
+        return paragraphs
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from apps.blog.models import BlogPostVersion
+from apps.blog.versions import BlogPostVersionService
+
+
+class Command(BaseCommand):
+    help = 'Rewrite post version history as periodic snapshots plus deltas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', help='Only compact this post id')
+        parser.add_argument('--dry-run', action='store_true', help='Report savings without writing')
+
+    def handle(self, *args, **options):
+        post_ids = BlogPostVersion.objects.values_list('post_id', flat=True).distinct().order_by()
+        if options['post']:
+            post_ids = post_ids.filter(post_id=options['post'])
+
+        totals = {'posts': 0, 'versions': 0, 'before': 0, 'after': 0}
+        for post_id in post_ids.iterator():
+            result = BlogPostVersionService.compact(post_id, dry_run=options['dry_run'])
+            totals['posts'] += 1
+            for key in ('versions', 'before', 'after'):
+                totals[key] += result[key]
+
+        saved = totals['before'] - totals['after']
+        ratio = (saved / totals['before'] * 100) if totals['before'] else 0
+        verb = 'Would compact' if options['dry_run'] else 'Compacted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['versions']} versions of {totals['posts']} posts: "
+            f"{totals['before']} -> {totals['after']} characters stored ({ratio:.1f}% saved)"
+        ))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.blog.counters import BlogCounterService
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered blog view/like counters to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and flush every --interval seconds'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=60,
+            help='Seconds between flushes when --loop is given'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            written = BlogCounterService.flush()
+            self.stdout.write(f'Flushed {written} counter entries')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
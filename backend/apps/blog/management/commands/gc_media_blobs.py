@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from apps.blog.blobs import MediaBlobService
+
+
+class Command(BaseCommand):
+    help = 'Delete stored media blobs that no media file references any more'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24,
+                            help='Keep unreferenced blobs younger than this')
+        parser.add_argument('--recount', action='store_true',
+                            help='Repair reference counts from media file rows first')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            fixed = MediaBlobService.recount()
+            self.stdout.write(f'Reference counts repaired for {fixed} blobs')
+
+        result = MediaBlobService.collect_garbage(
+            grace_period=timedelta(hours=options['grace_hours']), dry_run=options['dry_run']
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result['blobs']} blobs ({result['bytes'] / (1024 * 1024):.2f} MB)"
+        ))
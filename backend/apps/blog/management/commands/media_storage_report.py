@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from apps.blog.blobs import MediaBlobService
+
+
+def _mb(size):
+    return f'{size / (1024 * 1024):.2f} MB'
+
+
+class Command(BaseCommand):
+    help = 'Report storage saved by content-addressed media deduplication'
+
+    def handle(self, *args, **options):
+        report = MediaBlobService.savings_report()
+        self.stdout.write(f"Media files:      {report['files']}")
+        self.stdout.write(f"Stored blobs:     {report['blobs']}")
+        self.stdout.write(f"Logical size:     {_mb(report['logical_bytes'])}")
+        self.stdout.write(f"Physical size:    {_mb(report['physical_bytes'])}")
+        self.stdout.write(f"Orphaned blobs:   {report['orphaned_blobs']} ({_mb(report['orphaned_bytes'])})")
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {_mb(report['saved_bytes'])} (dedup ratio {report['dedup_ratio']}x)"
+        ))
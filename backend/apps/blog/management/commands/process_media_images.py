@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.blog.models import MediaFile
+from apps.blog.services import MediaProcessingService
+
+
+class Command(BaseCommand):
+    help = 'Render resized variants and placeholders for uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocess images that already have variants')
+        parser.add_argument('--workers', type=int, default=None, help='Process pool size')
+
+    def handle(self, *args, **options):
+        queryset = MediaFile.objects.filter(mime_type__startswith='image/').exclude(storage_path='')
+        if not options['all']:
+            queryset = queryset.filter(variants=[])
+
+        processed = failed = 0
+        for media_file, error in MediaProcessingService.process_many(
+            queryset.iterator(chunk_size=100), workers=options['workers']
+        ):
+            if error is None:
+                processed += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{media_file.pk}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} images ({failed} failed)'))
@@ -0,0 +1,22 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.blog.rollups import AnalyticsRollupService
+
+
+class Command(BaseCommand):
+    help = 'Recompute weekly/monthly analytics rollups from daily BlogAnalytics rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only rebuild buckets containing days from this date (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('--since must be a date in YYYY-MM-DD format')
+
+        buckets = AnalyticsRollupService.rebuild(since)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {buckets} rollup buckets'))
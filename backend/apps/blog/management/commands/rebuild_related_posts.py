@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.blog.related import RelatedPostService
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed related-posts index for all published posts'
+
+    def handle(self, *args, **options):
+        indexed = RelatedPostService.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f'Related posts computed for {indexed} posts'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from apps.blog.response_cache import ResponseCacheService
+
+
+class Command(BaseCommand):
+    help = 'Report the hit ratio of the public blog response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after reporting')
+
+    def handle(self, *args, **options):
+        stats = ResponseCacheService.stats()
+        self.stdout.write(f"Requests:   {stats['requests']}")
+        self.stdout.write(f"Hits:       {stats['hit']}")
+        self.stdout.write(f"Stale hits: {stats['stale']}")
+        self.stdout.write(f"Misses:     {stats['miss']}")
+        self.stdout.write(self.style.SUCCESS(f"Hit ratio {stats['hit_ratio']:.1%}"))
+        if options['reset']:
+            ResponseCacheService.reset_stats()
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from apps.blog.scheduler import PublishScheduler, PublishSchedulerService
+
+
+class Command(BaseCommand):
+    help = 'Publish scheduled blog posts when they become due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Publish everything due now and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            published = PublishSchedulerService.publish_all_due()
+            self.stdout.write(self.style.SUCCESS(f'Published {published} scheduled posts'))
+            return
+
+        self.stdout.write('Waiting for scheduled posts...')
+        try:
+            PublishScheduler().run()
+        except KeyboardInterrupt:
+            self.stdout.write('Scheduler stopped')
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from apps.blog.models import BlogPost
+from apps.blog.search import BlogSearchService
+
+
+class Command(BaseCommand):
+    help = 'Backfill weighted full-text search vectors for blog posts in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of posts updated per UPDATE statement'
+        )
+        parser.add_argument(
+            '--only-missing',
+            action='store_true',
+            help='Only index posts that have no search vector yet'
+        )
+
+    def handle(self, *args, **options):
+        if not BlogSearchService.is_postgres():
+            self.stdout.write(self.style.WARNING(
+                'Search vectors are only used on PostgreSQL; nothing to do for this database.'
+            ))
+            return
+
+        batch_size = options['batch_size']
+        queryset = BlogPost.objects.order_by('pk')
+        if options['only_missing']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        total = 0
+        batch = []
+        for pk in queryset.values_list('pk', flat=True).iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                total += BlogSearchService.update_search_vectors(batch)
+                self.stdout.write(f'Indexed {total} posts...')
+                batch = []
+
+        if batch:
+            total += BlogSearchService.update_search_vectors(batch)
+
+        BlogSearchService.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Search vectors updated for {total} posts'))
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    """Compute materialized paths for existing categories, parents first"""
+    BlogCategory = apps.get_model('blog', 'BlogCategory')
+    categories = {category.pk: category for category in BlogCategory.objects.all()}
+
+    def path_of(category, seen=()):
+        if category.path:
+            return category.path
+        parent = categories.get(category.parent_id)
+        prefix = path_of(parent, seen + (category.pk,)) if parent and parent.pk not in seen else ''
+        category.path = f'{prefix}{category.pk.hex}/'
+        category.depth = category.path.count('/') - 1
+        return category.path
+
+    for category in categories.values():
+        path_of(category)
+    BlogCategory.objects.bulk_update(categories.values(), ['path', 'depth'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogcategory',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='blogcategory',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
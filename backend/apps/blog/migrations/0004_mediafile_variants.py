@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_blogcategory_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediafile',
+            name='blurhash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='lqip',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
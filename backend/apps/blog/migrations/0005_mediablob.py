@@ -0,0 +1,58 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_existing_files(apps, schema_editor):
+    """Create blobs for uploads already stored under their content hash"""
+    MediaBlob = apps.get_model('blog', 'MediaBlob')
+    MediaFile = apps.get_model('blog', 'MediaFile')
+
+    blobs = {}
+    for media_file in MediaFile.objects.filter(storage_path__startswith='media/originals/'):
+        digest = media_file.storage_path.rsplit('/', 1)[-1].split('.', 1)[0]
+        if len(digest) != 64:
+            continue
+        blob = blobs.get(digest)
+        if blob is None:
+            blob = blobs[digest] = MediaBlob.objects.create(
+                sha256=digest, size=media_file.file_size, mime_type=media_file.mime_type,
+                storage_path=media_file.storage_path,
+            )
+        blob.ref_count += 1
+        media_file.blob = blob
+        media_file.save(update_fields=['blob'])
+
+    MediaBlob.objects.bulk_update(blobs.values(), ['ref_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_mediafile_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('mime_type', models.CharField(max_length=100)),
+                ('storage_path', models.CharField(max_length=500)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ref_count', 'created_at'], name='blog_mediab_ref_cou_94ac27_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='mediafile',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='media_files', to='blog.mediablob'),
+        ),
+        migrations.RunPython(link_existing_files, migrations.RunPython.noop),
+    ]
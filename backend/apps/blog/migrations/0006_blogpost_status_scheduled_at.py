@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['status', 'scheduled_at'], name='blog_blogpo_status_425cfe_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:27
+
+from django.db import migrations, models
+from django.db.models.functions import Length
+
+
+def fill_content_length(apps, schema_editor):
+    BlogPostVersion = apps.get_model('blog', 'BlogPostVersion')
+    BlogPostVersion.objects.update(content_length=Length('content'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_blogpost_status_scheduled_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpostversion',
+            name='content_length',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='blogpostversion',
+            name='delta',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='blogpostversion',
+            name='is_snapshot',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='blogpostversion',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(fill_content_length, migrations.RunPython.noop),
+    ]
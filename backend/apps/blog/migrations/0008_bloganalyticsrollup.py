@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-19 04:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_blogpostversion_delta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogAnalyticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('scope', models.CharField(choices=[('post', 'Post'), ('category', 'Category'), ('site', 'Site')], max_length=8)),
+                ('page_views', models.BigIntegerField(default=0)),
+                ('unique_visitors', models.BigIntegerField(default=0)),
+                ('likes', models.BigIntegerField(default=0)),
+                ('shares', models.BigIntegerField(default=0)),
+                ('comments', models.BigIntegerField(default=0)),
+                ('organic_traffic', models.BigIntegerField(default=0)),
+                ('search_impressions', models.BigIntegerField(default=0)),
+                ('search_clicks', models.BigIntegerField(default=0)),
+                ('bounce_rate_weighted', models.FloatField(default=0)),
+                ('time_on_page_weighted', models.FloatField(default=0)),
+                ('position_weighted', models.FloatField(default=0)),
+                ('days', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='blog.blogcategory')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='analytics_rollups', to='blog.blogpost')),
+            ],
+            options={
+                'ordering': ['-period_start'],
+                'indexes': [models.Index(fields=['scope', 'period', 'period_start'], name='blog_blogan_scope_58a8b7_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('scope', 'post')), fields=('period', 'period_start', 'post'), name='blog_rollup_unique_post'), models.UniqueConstraint(condition=models.Q(('scope', 'category')), fields=('period', 'period_start', 'category'), name='blog_rollup_unique_category'), models.UniqueConstraint(condition=models.Q(('scope', 'site')), fields=('period', 'period_start'), name='blog_rollup_unique_site')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.4 on 2026-10-19 05:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_bloganalyticsrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogPostLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('visitor', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='blog.blogpost')),
+            ],
+            options={
+                'unique_together': {('post', 'visitor')},
+            },
+        ),
+    ]
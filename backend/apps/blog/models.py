@@ -21,6 +21,10 @@ class BlogCategory(models.Model):
     color = models.CharField(max_length=7, default='#3B82F6')  # Hex color
     icon = models.CharField(max_length=50, blank=True)
     
+    # Materialized path: ancestor ids (hex) from the root down to self, e.g. "<root>/<child>/"
+    path = models.CharField(max_length=500, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    
     # SEO fields
     meta_title = models.CharField(max_length=60, blank=True)
     meta_description = models.CharField(max_length=160, blank=True)
@@ -42,19 +46,44 @@ class BlogCategory(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        
+        old_path = self.path
+        self.path = self.build_path()
+        self.depth = self.path.count('/') - 1
         super().save(*args, **kwargs)
+        
+        # Moved under a new parent: rewrite the paths of the whole subtree
+        if old_path and old_path != self.path:
+            descendants = list(
+                BlogCategory.objects.filter(path__startswith=old_path).exclude(pk=self.pk)
+            )
+            for descendant in descendants:
+                descendant.path = self.path + descendant.path[len(old_path):]
+                descendant.depth = descendant.path.count('/') - 1
+            BlogCategory.objects.bulk_update(descendants, ['path', 'depth'])
+    
+    def build_path(self):
+        """Materialized path from the parent's path and this category's id"""
+        prefix = self.parent.path if self.parent_id else ''
+        if self.path and prefix.startswith(self.path):
+            raise ValueError('A category cannot be moved under its own descendant')
+        return f'{prefix}{self.id.hex}/'
     
     def get_absolute_url(self):
         return reverse('blog:category', kwargs={'slug': self.slug})
     
+    def get_ancestor_ids(self):
+        """Ancestor ids (root first), read from the materialized path"""
+        return [uuid.UUID(part) for part in self.path.split('/')[:-2]]
+    
     def get_hierarchy(self):
-        """Get full category hierarchy"""
-        hierarchy = []
-        current = self
-        while current:
-            hierarchy.insert(0, current)
-            current = current.parent
-        return hierarchy
+        """Get full category hierarchy (root first) with a single query"""
+        ancestors = BlogCategory.objects.filter(pk__in=self.get_ancestor_ids()).order_by('depth')
+        return list(ancestors) + [self]
+    
+    def get_descendants(self):
+        """All categories below this one"""
+        return BlogCategory.objects.filter(path__startswith=self.path).exclude(pk=self.pk)
 
 
 class BlogTag(models.Model):
@@ -117,6 +146,25 @@ class MediaTag(models.Model):
         super().save(*args, **kwargs)
 
 
+class MediaBlob(models.Model):
+    """Stored file content shared by every MediaFile with the same SHA-256"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField()
+    mime_type = models.CharField(max_length=100)
+    storage_path = models.CharField(max_length=500)
+    
+    # Number of MediaFile rows pointing at this blob (maintained by signals)
+    ref_count = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [models.Index(fields=['ref_count', 'created_at'])]
+    
+    def __str__(self):
+        return self.sha256
+
+
 class MediaFile(models.Model):
     """Media file model with AI metadata support"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -128,10 +176,16 @@ class MediaFile(models.Model):
     # Storage
     storage_path = models.CharField(max_length=500)
     cdn_url = models.URLField(blank=True)
+    blob = models.ForeignKey(
+        MediaBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='media_files'
+    )
     
     # Image specific
     width = models.IntegerField(null=True, blank=True)
     height = models.IntegerField(null=True, blank=True)
+    variants = models.JSONField(default=list, blank=True)  # Resized renditions (see images.py)
+    blurhash = models.CharField(max_length=64, blank=True)
+    lqip = models.TextField(blank=True)  # Tiny placeholder as a data URI
     
     # Metadata
     alt_text = models.TextField(blank=True)
@@ -238,6 +292,7 @@ class BlogPost(models.Model):
         indexes = [
             GinIndex(fields=['search_vector']),
             models.Index(fields=['status', 'published_at']),
+            models.Index(fields=['status', 'scheduled_at']),
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['slug']),
         ]
@@ -390,6 +445,82 @@ class BlogAnalytics(models.Model):
         return 0
 
 
+class BlogPostLike(models.Model):
+    """One visitor's like of a post; counts are buffered, the like itself is not"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='likes')
+    visitor = models.CharField(max_length=64)  # BlogCounterService.visitor_id
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['post', 'visitor']
+    
+    def __str__(self):
+        return f"{self.visitor} likes {self.post_id}"
+
+
+class BlogAnalyticsRollup(models.Model):
+    """Weekly/monthly BlogAnalytics totals per post, per category or site-wide (see rollups.py)"""
+    PERIOD_CHOICES = [
+        ('week', 'Week'),
+        ('month', 'Month'),
+    ]
+    SCOPE_CHOICES = [
+        ('post', 'Post'),
+        ('category', 'Category'),
+        ('site', 'Site'),
+    ]
+    
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()  # Monday / first day of the month
+    scope = models.CharField(max_length=8, choices=SCOPE_CHOICES)
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, null=True, blank=True, related_name='analytics_rollups')
+    category = models.ForeignKey(BlogCategory, on_delete=models.CASCADE, null=True, blank=True, related_name='analytics_rollups')
+    
+    # Summed daily metrics
+    page_views = models.BigIntegerField(default=0)
+    unique_visitors = models.BigIntegerField(default=0)  # Sum of daily uniques
+    likes = models.BigIntegerField(default=0)
+    shares = models.BigIntegerField(default=0)
+    comments = models.BigIntegerField(default=0)
+    organic_traffic = models.BigIntegerField(default=0)
+    search_impressions = models.BigIntegerField(default=0)
+    search_clicks = models.BigIntegerField(default=0)
+    
+    # Weighted sums, so averages can be recombined across any set of buckets
+    bounce_rate_weighted = models.FloatField(default=0)  # bounce_rate * page_views
+    time_on_page_weighted = models.FloatField(default=0)  # avg_time_on_page * page_views
+    position_weighted = models.FloatField(default=0)  # avg_position * search_impressions
+    
+    days = models.PositiveSmallIntegerField(default=0)  # Daily rows aggregated (post scope)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-period_start']
+        indexes = [
+            models.Index(fields=['scope', 'period', 'period_start']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'post'], condition=models.Q(scope='post'),
+                name='blog_rollup_unique_post'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'category'], condition=models.Q(scope='category'),
+                name='blog_rollup_unique_category'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'period_start'], condition=models.Q(scope='site'),
+                name='blog_rollup_unique_site'
+            ),
+        ]
+    
+    def __str__(self):
+        target = self.post_id or self.category_id or 'site'
+        return f"{self.period} of {self.period_start} ({self.scope} {target})"
+
+
 class BlogComment(models.Model):
     """Blog comment model"""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -419,11 +550,16 @@ class BlogPostVersion(models.Model):
     post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='versions')
     version_number = models.IntegerField()
     
-    # Snapshot of post data
+    # Snapshot of post data (content/excerpt stay empty on delta versions)
     title = models.CharField(max_length=255)
-    content = models.TextField()
+    content = models.TextField(blank=True)
     excerpt = models.TextField(blank=True)
     
+    # Delta storage (see versions.py)
+    is_snapshot = models.BooleanField(default=True)
+    delta = models.JSONField(null=True, blank=True)  # Edits from the previous version
+    content_length = models.PositiveIntegerField(default=0)
+    
     # Change tracking
     changed_by = models.ForeignKey(User, on_delete=models.CASCADE)
     change_summary = models.CharField(max_length=255, blank=True)
@@ -436,4 +572,24 @@ class BlogPostVersion(models.Model):
         ordering = ['-version_number']
     
     def __str__(self):
-        return f"{self.post.title} - Version {self.version_number}"
\ No newline at end of file
+        return f"{self.post.title} - Version {self.version_number}"
+
+class RelatedPost(models.Model):
+    """Precomputed, ranked related-post entry (see related.RelatedPostService)"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    # Timestamps
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['post', 'related']
+        ordering = ['post', 'rank']
+        indexes = [
+            models.Index(fields=['post', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.post.title} -> {self.related.title} ({self.score:.3f})"
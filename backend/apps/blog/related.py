@@ -0,0 +1,330 @@
+"""
+Related-posts engine
+
+Precomputed related-post lists scored by taxonomy overlap and TF-IDF
+similarity, updated incrementally against a cached corpus.
+"""
+import heapq
+import math
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.html import strip_tags
+
+from .models import BlogPost, RelatedPost
+from .seo import WORD_RE
+
+
+@dataclass
+class _Document:
+    tags: FrozenSet
+    categories: FrozenSet
+    vector: Dict[str, float]
+
+
+class _Corpus:
+    """Published posts with TF-IDF vectors and inverted indexes"""
+
+    def __init__(self, documents: Dict[str, _Document], document_frequency: Counter, total: int):
+        self.documents = documents
+        self.document_frequency = document_frequency
+        self.total = total
+        self.term_postings = defaultdict(list)
+        self.tag_postings = defaultdict(list)
+        self.category_postings = defaultdict(list)
+        for pk, document in documents.items():
+            for term, weight in document.vector.items():
+                self.term_postings[term].append((pk, weight))
+            for tag in document.tags:
+                self.tag_postings[tag].append(pk)
+            for category in document.categories:
+                self.category_postings[category].append(pk)
+
+    def neighbours(self, pk: str, limit: int) -> List[Tuple[float, str]]:
+        """Top ``limit`` (score, post_id) pairs for a post"""
+        document = self.documents[pk]
+
+        # Sparse dot product through the term postings
+        text_scores = defaultdict(float)
+        for term, weight in document.vector.items():
+            for other, other_weight in self.term_postings[term]:
+                text_scores[other] += weight * other_weight
+
+        candidates = set(text_scores)
+        for tag in document.tags:
+            candidates.update(self.tag_postings[tag])
+        for category in document.categories:
+            candidates.update(self.category_postings[category])
+        candidates.discard(pk)
+
+        scored = []
+        for other in candidates:
+            score = RelatedPostService.score(document, self.documents[other], text_scores.get(other, 0.0))
+            if score > 0:
+                scored.append((score, other))
+        return heapq.nlargest(limit, scored)
+
+
+class RelatedPostService:
+    """Service for computing and serving related posts"""
+
+    NEIGHBOURS = 10
+    TAG_WEIGHT = 0.35
+    CATEGORY_WEIGHT = 0.25
+    TEXT_WEIGHT = 0.40
+    TITLE_BOOST = 3  # Title terms count as this many occurrences
+    MAX_DOCUMENT_WORDS = 2000
+    VECTOR_TERMS = 50  # Strongest terms kept per document
+    MIN_TERM_LENGTH = 3
+    CORPUS_KEY = 'related:corpus'
+    CORPUS_LOCK_KEY = 'related:corpus:lock'
+    CORPUS_TTL = 7 * 24 * 60 * 60  # rebuild_related_posts replaces it daily
+    LOCK_TIMEOUT = 60
+    LOCK_POLL_INTERVAL = 0.1
+
+    @staticmethod
+    def jaccard(a: FrozenSet, b: FrozenSet) -> float:
+        if not a or not b:
+            return 0.0
+        return len(a & b) / len(a | b)
+
+    @classmethod
+    def score(cls, a: _Document, b: _Document, cosine: float) -> float:
+        return (
+            cls.TAG_WEIGHT * cls.jaccard(a.tags, b.tags) +
+            cls.CATEGORY_WEIGHT * cls.jaccard(a.categories, b.categories) +
+            cls.TEXT_WEIGHT * cosine
+        )
+
+    @classmethod
+    def _terms(cls, text: str) -> List[str]:
+        return [
+            word for word in WORD_RE.findall(text.lower())
+            if len(word) >= cls.MIN_TERM_LENGTH and not word.isdigit()
+        ]
+
+    @classmethod
+    def _read_posts(cls, post_ids: Iterable = None):
+        """(term counts, tags, categories) per published post, all or only ``post_ids``"""
+        posts = BlogPost.objects.filter(status='published')
+        if post_ids is not None:
+            posts = posts.filter(pk__in=list(post_ids))
+        rows = list(posts.values_list('pk', 'title', 'excerpt', 'content'))
+        found = [row[0] for row in rows]
+
+        tags = defaultdict(set)
+        for pk, tag_id in BlogPost.tags.through.objects.filter(
+            blogpost_id__in=found
+        ).values_list('blogpost_id', 'blogtag_id'):
+            tags[pk].add(tag_id)
+        categories = defaultdict(set)
+        for pk, category_id in BlogPost.categories.through.objects.filter(
+            blogpost_id__in=found
+        ).values_list('blogpost_id', 'blogcategory_id'):
+            categories[pk].add(category_id)
+
+        term_counts = {}
+        for pk, title, excerpt, content in rows:
+            body = cls._terms(f'{excerpt} {strip_tags(content)}')[:cls.MAX_DOCUMENT_WORDS]
+            counts = Counter(body)
+            for term in cls._terms(title):
+                counts[term] += cls.TITLE_BOOST
+            term_counts[pk] = counts
+        return term_counts, tags, categories
+
+    @classmethod
+    def _document(cls, counts: Counter, tags, categories, document_frequency: Counter, total: int) -> _Document:
+        weights = {
+            term: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+            for term, count in counts.items()
+        }
+        strongest = heapq.nlargest(cls.VECTOR_TERMS, weights.items(), key=lambda item: item[1])
+        norm = math.sqrt(sum(weight * weight for _, weight in strongest)) or 1.0
+        return _Document(
+            tags=frozenset(tags),
+            categories=frozenset(categories),
+            vector={term: weight / norm for term, weight in strongest},
+        )
+
+    @classmethod
+    def load_corpus(cls) -> _Corpus:
+        """Read and vectorize every published post (fresh document frequencies)"""
+        term_counts, tags, categories = cls._read_posts()
+        document_frequency = Counter()
+        for counts in term_counts.values():
+            document_frequency.update(counts.keys())
+
+        total = len(term_counts)
+        documents = {
+            str(pk): cls._document(counts, tags[pk], categories[pk], document_frequency, total)
+            for pk, counts in term_counts.items()
+        }
+        return _Corpus(documents, document_frequency, total)
+
+    @classmethod
+    def cached_corpus(cls) -> _Corpus:
+        """The corpus from the last run, loading (and caching) it when missing"""
+        state = cache.get(cls.CORPUS_KEY)
+        if state is not None:
+            return _Corpus(*state)
+        corpus = cls.load_corpus()
+        cls._cache_corpus(corpus)
+        return corpus
+
+    @classmethod
+    def _cache_corpus(cls, corpus: _Corpus):
+        cache.set(cls.CORPUS_KEY, (corpus.documents, corpus.document_frequency, corpus.total), cls.CORPUS_TTL)
+
+    @classmethod
+    def _apply_changes(cls, corpus: _Corpus, post_ids: List[str]) -> _Corpus:
+        """Corpus with the given posts re-read; unpublished ones drop out"""
+        term_counts, tags, categories = cls._read_posts(post_ids)
+        documents = {pk: document for pk, document in corpus.documents.items() if pk not in post_ids}
+        for pk, counts in term_counts.items():
+            documents[str(pk)] = cls._document(
+                counts, tags[pk], categories[pk], corpus.document_frequency, corpus.total
+            )
+        return _Corpus(documents, corpus.document_frequency, corpus.total)
+
+    @classmethod
+    def _acquire_corpus_lock(cls) -> bool:
+        """Wait for concurrent updates to finish; False if the lock could not be taken in time"""
+        deadline = time.monotonic() + cls.LOCK_TIMEOUT
+        while not cache.add(cls.CORPUS_LOCK_KEY, 1, cls.LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(cls.LOCK_POLL_INTERVAL)
+        return True
+
+    @classmethod
+    def rebuild_all(cls) -> int:
+        """Recompute every neighbour list; returns number of posts indexed"""
+        corpus = cls.load_corpus()
+        lists = {pk: corpus.neighbours(pk, cls.NEIGHBOURS) for pk in corpus.documents}
+        with transaction.atomic():
+            RelatedPost.objects.all().delete()
+            cls._store(lists)
+        cls._cache_corpus(corpus)
+        return len(lists)
+
+    @classmethod
+    def update_post(cls, post_id) -> int:
+        """Incrementally refresh the index after ``post_id`` changed"""
+        return cls.update_posts([post_id])
+
+    @classmethod
+    def update_posts(cls, post_ids: Iterable) -> int:
+        """
+        Incrementally refresh the index after the given posts changed.
+
+        Recomputes the posts' own lists plus the lists of posts whose
+        neighbourhood they enter, leave or move within. Only the changed posts
+        are read from the database; the rest of the corpus comes from the
+        cache. Returns the number of lists rewritten.
+        """
+        post_ids = [str(pk) for pk in post_ids]
+        locked = cls._acquire_corpus_lock()
+        try:
+            corpus = cls._apply_changes(cls.cached_corpus(), post_ids)
+            if locked:
+                cls._cache_corpus(corpus)
+            else:
+                # Another update kept the lock: ours would overwrite its changes, so
+                # leave the cached corpus to be reloaded in full next time
+                cache.delete(cls.CORPUS_KEY)
+            return cls._update_lists(corpus, post_ids)
+        finally:
+            if locked:
+                cache.delete(cls.CORPUS_LOCK_KEY)
+
+    @classmethod
+    def _update_lists(cls, corpus: _Corpus, post_ids: List[str]) -> int:
+        # Posts currently listing one of these as a neighbour
+        affected = {
+            str(pk): None
+            for pk in RelatedPost.objects.filter(related_id__in=post_ids).values_list('post_id', flat=True)
+        }
+
+        lists = {}
+        scored_by_post = {}
+        for post_id in post_ids:
+            if post_id in corpus.documents:
+                scored_by_post[post_id] = corpus.neighbours(post_id, len(corpus.documents))
+                lists[post_id] = scored_by_post[post_id][:cls.NEIGHBOURS]
+
+        # Scores are symmetric: posts that now score a changed post above their
+        # weakest neighbour (or have room left) need their list rebuilt
+        current_floor = cls._list_floors({pk for scored in scored_by_post.values() for _, pk in scored})
+        for scored in scored_by_post.values():
+            for score, other in scored:
+                floor = current_floor.get(other)
+                if floor is None or score > floor:
+                    affected[other] = None
+
+        for pk in affected:
+            if pk in corpus.documents and pk not in lists:
+                lists[pk] = corpus.neighbours(pk, cls.NEIGHBOURS)
+
+        with transaction.atomic():
+            RelatedPost.objects.filter(post_id__in=post_ids).delete()
+            RelatedPost.objects.filter(post_id__in=list(affected)).delete()
+            cls._store(lists)
+        return len(lists)
+
+    @classmethod
+    def refresh_lists(cls, post_ids: Iterable, removed_ids: Iterable = ()) -> int:
+        """Recompute only the given posts' neighbour lists, after ``removed_ids`` left the corpus"""
+        post_ids = [str(pk) for pk in post_ids]
+        removed_ids = {str(pk) for pk in removed_ids}
+        locked = cls._acquire_corpus_lock()
+        try:
+            corpus = cls.cached_corpus()
+            if removed_ids & corpus.documents.keys():
+                documents = {pk: document for pk, document in corpus.documents.items() if pk not in removed_ids}
+                corpus = _Corpus(documents, corpus.document_frequency, corpus.total)
+                if locked:
+                    cls._cache_corpus(corpus)
+                else:
+                    cache.delete(cls.CORPUS_KEY)
+            lists = {pk: corpus.neighbours(pk, cls.NEIGHBOURS) for pk in post_ids if pk in corpus.documents}
+            with transaction.atomic():
+                RelatedPost.objects.filter(post_id__in=post_ids).delete()
+                cls._store(lists)
+            return len(lists)
+        finally:
+            if locked:
+                cache.delete(cls.CORPUS_LOCK_KEY)
+
+    @classmethod
+    def _list_floors(cls, post_ids: Iterable[str]) -> Dict[str, float]:
+        """Lowest stored score of each full neighbour list (0 if not full)"""
+        floors = {}
+        counts = Counter()
+        for pk, score in RelatedPost.objects.filter(post_id__in=list(post_ids)).values_list('post_id', 'score'):
+            pk = str(pk)
+            counts[pk] += 1
+            floors[pk] = min(score, floors.get(pk, score))
+        return {pk: (floors[pk] if counts[pk] >= cls.NEIGHBOURS else 0.0) for pk in floors}
+
+    @classmethod
+    def _store(cls, lists: Dict[str, List[Tuple[float, str]]]):
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=pk, related_id=other, rank=rank, score=score)
+            for pk, neighbours in lists.items()
+            for rank, (score, other) in enumerate(neighbours, start=1)
+        ], batch_size=1000)
+
+    @classmethod
+    def get_related(cls, post: BlogPost, limit: int = 5) -> List[BlogPost]:
+        """Ranked related posts from the precomputed index"""
+        entries = list(
+            RelatedPost.objects.filter(post=post, related__status='published')
+            .select_related('related__author', 'related__featured_image')
+            .prefetch_related('related__categories', 'related__tags')
+            .order_by('rank')[:limit]
+        )
+        return [entry.related for entry in entries]
@@ -0,0 +1,185 @@
+"""
+Response cache for public (anonymous) blog read endpoints
+
+Responses are cached with the versions of the tags they depend on and
+recomputed by a single request when stale or missing.
+"""
+import functools
+import hashlib
+import time
+from typing import Any, Dict, Iterable, List
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+PUBLISHED_POSTS = 'posts:published'
+TAG_LIST = 'tags'
+
+
+class ResponseCacheService:
+    """Service for caching public responses with tag-based invalidation"""
+
+    PREFIX = 'blog:response:'
+    TAG_PREFIX = 'blog:response-tag:'
+    STATS_KEYS = {
+        'hit': 'blog:response-stats:hit',
+        'stale': 'blog:response-stats:stale',
+        'miss': 'blog:response-stats:miss',
+    }
+    TTL = 5 * 60
+    STALE_TTL = 60 * 60  # How long a stale entry may still be served
+    LOCK_TIMEOUT = 30
+    MISS_WAIT = 2.0  # How long a miss waits for a concurrent request to fill the entry
+    MISS_POLL_INTERVAL = 0.05
+
+    @classmethod
+    def key_for(cls, request) -> str:
+        query = '&'.join(sorted(f'{k}={v}' for k, values in request.GET.lists() for v in values))
+        raw = f'{request.path}?{query}'
+        return cls.PREFIX + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def tag_versions(cls, tags: Iterable[str]) -> Dict[str, int]:
+        keys = {cls.TAG_PREFIX + tag: tag for tag in tags}
+        found = cache.get_many(list(keys))
+        versions = {}
+        for key, tag in keys.items():
+            if key not in found:
+                # Start from a timestamp so an evicted tag never repeats an old version
+                cache.add(key, time.time_ns(), None)
+                found[key] = cache.get(key)
+            versions[tag] = found[key]
+        return versions
+
+    @classmethod
+    def invalidate(cls, tags: Iterable[str]):
+        """Mark every entry carrying one of ``tags`` as stale"""
+        for tag in set(tags):
+            key = cls.TAG_PREFIX + tag
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), None)
+
+    @classmethod
+    def invalidate_posts(cls, post_ids: Iterable, lists: bool = False, taxonomy: Iterable[str] = ()):
+        """
+        Purge entries showing the given posts.
+
+        ``lists`` also purges published-post lists (publish/unpublish adds or
+        removes entries); ``taxonomy`` adds ``category:<id>`` / ``tag:<id>``
+        tags for taxonomy pages that gain or lose the posts.
+        """
+        tags = [f'post:{post_id}' for post_id in post_ids]
+        if lists:
+            tags.append(PUBLISHED_POSTS)
+        cls.invalidate(tags + list(taxonomy))
+
+    @classmethod
+    def get(cls, key: str):
+        """Returns (data, state) with state 'hit', 'stale' or 'miss'"""
+        entry = cache.get(key)
+        if entry is None:
+            return None, 'miss'
+        current = cls.tag_versions(entry['tags'])
+        if current != entry['tags'] or entry['fresh_until'] < time.time():
+            return entry['data'], 'stale'
+        return entry['data'], 'hit'
+
+    @classmethod
+    def wait_for(cls, key: str):
+        """Data of an entry another request is computing, or None after ``MISS_WAIT``"""
+        deadline = time.monotonic() + cls.MISS_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(cls.MISS_POLL_INTERVAL)
+            data, state = cls.get(key)
+            if state != 'miss':
+                return data
+        return None
+
+    @classmethod
+    def set(cls, key: str, data: Any, tags: Iterable[str], versions: Dict[str, int] = None):
+        tags = set(tags)
+        versions = versions or {}
+        # Versions read before computing win: a bump during computation leaves the entry stale
+        current = cls.tag_versions(tags - set(versions))
+        current.update({tag: versions[tag] for tag in tags & set(versions)})
+        cache.set(key, {
+            'data': data,
+            'tags': current,
+            'fresh_until': time.time() + cls.TTL,
+        }, cls.TTL + cls.STALE_TTL)
+
+    @classmethod
+    def record(cls, state: str):
+        key = cls.STATS_KEYS[state]
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        counts = cache.get_many(list(cls.STATS_KEYS.values()))
+        result = {state: counts.get(key, 0) for state, key in cls.STATS_KEYS.items()}
+        total = sum(result.values())
+        served = result['hit'] + result['stale']
+        result['requests'] = total
+        result['hit_ratio'] = round(served / total, 4) if total else 0.0
+        return result
+
+    @classmethod
+    def reset_stats(cls):
+        cache.delete_many(list(cls.STATS_KEYS.values()))
+
+
+def _item_tags(data, item_tag: str) -> List[str]:
+    items = data.get('results', [data]) if isinstance(data, dict) else data
+    return [f'{item_tag}:{item["id"]}' for item in items if isinstance(item, dict) and 'id' in item]
+
+
+def cache_public_response(tags: Iterable[str] = (), item_tag: str = None):
+    """
+    Cache a viewset action's response data for anonymous GET requests.
+
+    ``tags`` are formatted with the URL kwargs (e.g. ``'category:{pk}'``);
+    ``item_tag`` adds ``'<item_tag>:<id>'`` for every object in the payload.
+    Only 200 responses are cached.
+    """
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+
+            key = ResponseCacheService.key_for(request)
+            data, state = ResponseCacheService.get(key)
+            if state == 'hit':
+                ResponseCacheService.record(state)
+                return Response(data, headers={'X-Cache': 'HIT'})
+
+            locked = cache.add(f'{key}:lock', 1, ResponseCacheService.LOCK_TIMEOUT)
+            if not locked:
+                if state == 'miss':
+                    # Another request is computing this entry: wait for it instead of stampeding
+                    data = ResponseCacheService.wait_for(key)
+                    state = 'hit' if data is not None else 'miss'
+                if state != 'miss':
+                    ResponseCacheService.record(state)
+                    return Response(data, headers={'X-Cache': state.upper()})
+
+            try:
+                static_tags = [tag.format(**kwargs) for tag in tags]
+                versions = ResponseCacheService.tag_versions(static_tags)
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code == 200:
+                    entry_tags = static_tags + (_item_tags(response.data, item_tag) if item_tag else [])
+                    ResponseCacheService.set(key, response.data, entry_tags, versions)
+            finally:
+                if locked:
+                    cache.delete(f'{key}:lock')
+            ResponseCacheService.record('miss')
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,299 @@
+"""
+Pre-aggregated blog analytics
+
+Daily analytics are rolled up into weekly and monthly buckets so range
+queries read a few rows per post.
+"""
+import heapq
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q, Sum
+from django.utils import timezone
+
+from .models import BlogAnalytics, BlogAnalyticsRollup, BlogPost
+
+METRICS = (
+    'page_views', 'unique_visitors', 'likes', 'shares', 'comments',
+    'organic_traffic', 'search_impressions', 'search_clicks',
+)
+
+# Average -> (daily field, weighted rollup field, weight metric)
+AVERAGES = {
+    'bounce_rate': ('bounce_rate', 'bounce_rate_weighted', 'page_views'),
+    'avg_time_on_page': ('avg_time_on_page', 'time_on_page_weighted', 'page_views'),
+    'avg_position': ('avg_position', 'position_weighted', 'search_impressions'),
+}
+
+STORED_FIELDS = METRICS + tuple(weighted for _, weighted, _ in AVERAGES.values()) + ('days',)
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def period_bounds(period: str, start: date) -> Tuple[date, date]:
+    if period == 'week':
+        return start, start + timedelta(days=6)
+    return start, next_month(start) - timedelta(days=1)
+
+
+def plan_range(start: date, end: date) -> Dict[str, List[date]]:
+    """
+    Cover ``[start, end]`` with the fewest buckets: whole months first, then
+    whole weeks, then single days. A week is not taken if it would cut into
+    a month that fits the range completely.
+    """
+    plan = {'month': [], 'week': [], 'day': []}
+    day = start
+    while day <= end:
+        following_month = next_month(day)
+        if day.day == 1 and following_month - timedelta(days=1) <= end:
+            plan['month'].append(day)
+            day = following_month
+        elif (
+            day.weekday() == 0 and day + timedelta(days=6) <= end
+            and not (day + timedelta(days=6) >= following_month and next_month(following_month) - timedelta(days=1) <= end)
+        ):
+            plan['week'].append(day)
+            day += timedelta(days=7)
+        else:
+            plan['day'].append(day)
+            day += timedelta(days=1)
+    return plan
+
+
+def _daily_aggregates() -> Dict[str, Any]:
+    # Weighted sums come first: once 'page_views' is annotated, F('page_views') means the aggregate
+    aggregates = {
+        weighted: Sum(ExpressionWrapper(F(daily) * F(weight), output_field=FloatField()))
+        for daily, weighted, weight in AVERAGES.values()
+    }
+    aggregates.update({metric: Sum(metric) for metric in METRICS})
+    aggregates['days'] = Count('id')
+    return aggregates
+
+
+def _rollup_aggregates() -> Dict[str, Any]:
+    return {field: Sum(field) for field in STORED_FIELDS}
+
+
+class AnalyticsRollupService:
+    """Service for maintaining and querying weekly/monthly analytics rollups"""
+
+    PERIODS = ('week', 'month')
+    REBUILD_BATCH = 5000
+
+    @classmethod
+    def refresh(cls, post_days: Iterable[Tuple[Any, Any]]) -> int:
+        """
+        Recompute the buckets containing the given ``(post_id, day)`` pairs
+        (days as dates or ISO strings); returns buckets recomputed.
+        """
+        buckets = defaultdict(set)
+        for post_id, day in post_days:
+            if isinstance(day, str):
+                day = date.fromisoformat(day)
+            buckets[('week', week_start(day))].add(str(post_id))
+            buckets[('month', month_start(day))].add(str(post_id))
+
+        with transaction.atomic():
+            for (period, start), post_ids in buckets.items():
+                cls._refresh_bucket(period, start, post_ids)
+        return len(buckets)
+
+    @classmethod
+    def rebuild(cls, since: date = None) -> int:
+        """Recompute every bucket with daily data (optionally from ``since``)"""
+        # Buckets are always recomputed whole, so days before ``since`` are covered too
+        rows = BlogAnalytics.objects.order_by('date')
+        if since is not None:
+            rows = rows.filter(date__gte=since)
+        pairs = set()
+        total = 0
+        for post_id, day in rows.values_list('post_id', 'date').iterator(chunk_size=cls.REBUILD_BATCH):
+            pairs.add((post_id, day))
+            if len(pairs) >= cls.REBUILD_BATCH:
+                total += cls.refresh(pairs)
+                pairs = set()
+        if pairs:
+            total += cls.refresh(pairs)
+        return total
+
+    @classmethod
+    def _refresh_bucket(cls, period: str, start: date, post_ids: set):
+        first, last = period_bounds(period, start)
+        post_rows = {
+            str(row.pop('post_id')): row
+            for row in BlogAnalytics.objects.filter(post_id__in=post_ids, date__range=(first, last))
+            .values('post_id').annotate(**_daily_aggregates())
+        }
+        cls._store('post', period, start, post_rows, stale=post_ids - set(post_rows))
+
+        # Categories of the changed posts, summed from their post buckets
+        post_buckets = BlogAnalyticsRollup.objects.filter(scope='post', period=period, period_start=start)
+        category_ids = set(
+            BlogPost.categories.through.objects.filter(blogpost_id__in=post_ids).values_list('blogcategory_id', flat=True)
+        )
+        if category_ids:
+            category_rows = {
+                str(row.pop('post__categories')): row
+                for row in post_buckets.filter(post__categories__in=category_ids)
+                .values('post__categories').annotate(**_rollup_aggregates())
+            }
+            stale = {str(pk) for pk in category_ids} - set(category_rows)
+            cls._store('category', period, start, category_rows, stale=stale)
+
+        site = post_buckets.aggregate(**_rollup_aggregates())
+        if site['days']:
+            cls._store('site', period, start, {None: site})
+        else:
+            cls._store('site', period, start, {}, stale={None})
+
+    @classmethod
+    def _store(cls, scope: str, period: str, start: date, rows: Dict, stale: set = frozenset()):
+        """Upsert bucket rows keyed by post/category id (None for site) and drop stale ones"""
+        target = {'post': 'post_id', 'category': 'category_id', 'site': None}[scope]
+        buckets = BlogAnalyticsRollup.objects.filter(scope=scope, period=period, period_start=start)
+
+        if stale:
+            if target is None:
+                buckets.delete()
+            else:
+                buckets.filter(**{f'{target}__in': stale}).delete()
+        if not rows:
+            return
+
+        existing = {
+            (str(getattr(row, target)) if target else None): row
+            for row in (buckets.filter(**{f'{target}__in': list(rows)}) if target else buckets)
+        }
+        to_update, to_create = [], []
+        for key, values in rows.items():
+            row = existing.get(key)
+            if row is None:
+                row = BlogAnalyticsRollup(scope=scope, period=period, period_start=start)
+                if target:
+                    setattr(row, target, key)
+                to_create.append(row)
+            else:
+                row.updated_at = timezone.now()  # bulk_update skips auto_now
+                to_update.append(row)
+            for field in STORED_FIELDS:
+                setattr(row, field, values[field] or 0)
+
+        if to_update:
+            BlogAnalyticsRollup.objects.bulk_update(to_update, list(STORED_FIELDS) + ['updated_at'])
+        if to_create:
+            BlogAnalyticsRollup.objects.bulk_create(to_create)
+
+    @classmethod
+    def _scoped(cls, post=None, category=None):
+        """(rollup queryset, daily queryset) for one post, one category or the site"""
+        if post is not None:
+            return (
+                BlogAnalyticsRollup.objects.filter(scope='post', post=post),
+                BlogAnalytics.objects.filter(post=post),
+            )
+        if category is not None:
+            return (
+                BlogAnalyticsRollup.objects.filter(scope='category', category=category),
+                BlogAnalytics.objects.filter(post__categories=category),
+            )
+        return BlogAnalyticsRollup.objects.filter(scope='site'), BlogAnalytics.objects.all()
+
+    @staticmethod
+    def _plan_filter(plan: Dict[str, List[date]]) -> Q:
+        condition = Q(pk__in=[])
+        for period in ('week', 'month'):
+            if plan[period]:
+                condition |= Q(period=period, period_start__in=plan[period])
+        return condition
+
+    @staticmethod
+    def _finish(values: Dict[str, Any]) -> Dict[str, Any]:
+        """Metric totals plus recombined averages"""
+        result = {metric: values.get(metric) or 0 for metric in METRICS}
+        for name, (_, weighted, weight) in AVERAGES.items():
+            total_weight = result[weight]
+            result[name] = round((values.get(weighted) or 0) / total_weight, 2) if total_weight else 0
+        return result
+
+    @classmethod
+    def totals(cls, start: date, end: date, post=None, category=None) -> Dict[str, Any]:
+        """Totals for ``[start, end]`` for a post, a category or the whole site"""
+        plan = plan_range(start, end)
+        rollups, daily = cls._scoped(post, category)
+
+        combined = Counter()
+        if plan['week'] or plan['month']:
+            combined.update({
+                key: value or 0
+                for key, value in rollups.filter(cls._plan_filter(plan)).aggregate(**_rollup_aggregates()).items()
+            })
+        if plan['day']:
+            combined.update({
+                key: value or 0
+                for key, value in daily.filter(date__in=plan['day']).aggregate(**_daily_aggregates()).items()
+            })
+        return cls._finish(combined)
+
+    @classmethod
+    def series(cls, start: date, end: date, period: str = 'week', post=None, category=None) -> List[Dict[str, Any]]:
+        """Bucket values for every period overlapping ``[start, end]``"""
+        if period not in cls.PERIODS:
+            raise ValueError(f"Unknown period: {period}")
+        first = week_start(start) if period == 'week' else month_start(start)
+        rollups, _ = cls._scoped(post, category)
+        rows = rollups.filter(period=period, period_start__range=(first, end)).order_by('period_start')
+        return [
+            {'period_start': row['period_start'], **cls._finish(row)}
+            for row in rows.values('period_start', *STORED_FIELDS)
+        ]
+
+    @classmethod
+    def top_posts(cls, metric: str, start: date, end: date, limit: int = 10,
+                  category=None) -> List[Dict[str, Any]]:
+        """Posts with the highest ``metric`` total over ``[start, end]``"""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        plan = plan_range(start, end)
+        rollups = BlogAnalyticsRollup.objects.filter(scope='post')
+        daily = BlogAnalytics.objects.all()
+        if category is not None:
+            rollups = rollups.filter(post__categories=category)
+            daily = daily.filter(post__categories=category)
+
+        totals = Counter()
+        if plan['week'] or plan['month']:
+            for post_id, value in (
+                rollups.filter(cls._plan_filter(plan)).values('post_id')
+                .annotate(total=Sum(metric)).values_list('post_id', 'total')
+            ):
+                totals[str(post_id)] += value or 0
+        if plan['day']:
+            for post_id, value in (
+                daily.filter(date__in=plan['day']).values('post_id')
+                .annotate(total=Sum(metric)).values_list('post_id', 'total')
+            ):
+                totals[str(post_id)] += value or 0
+
+        best = heapq.nlargest(limit, ((value, post_id) for post_id, value in totals.items() if value > 0))
+        posts = {
+            str(post.pk): post
+            for post in BlogPost.objects.filter(pk__in=[post_id for _, post_id in best]).only('title', 'slug')
+        }
+        return [
+            {'post_id': post_id, 'title': posts[post_id].title, 'slug': posts[post_id].slug, metric: value}
+            for value, post_id in best if post_id in posts
+        ]
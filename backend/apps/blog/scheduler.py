@@ -0,0 +1,187 @@
+"""
+Scheduled publishing
+
+A long-running loop publishes scheduled posts when they become due; rows are
+claimed with skip_locked so several schedulers can run side by side. It is
+woken through the cache, or polls the database when the cache is per-process.
+"""
+import heapq
+import logging
+import time
+from datetime import timedelta
+from typing import Callable, List
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BlogPost
+from .response_cache import ResponseCacheService
+from .search import BlogSearchService
+
+logger = logging.getLogger(__name__)
+
+
+class PublishSchedulerService:
+    """Service for publishing scheduled posts when they become due"""
+
+    BATCH_SIZE = 100
+    VERSION_KEY = 'blog:schedule:version'
+
+    @classmethod
+    def notify(cls):
+        """Tell running schedulers that the set of scheduled posts changed"""
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, 1, None)
+
+    @classmethod
+    def version(cls) -> int:
+        return cache.get(cls.VERSION_KEY, 0)
+
+    @staticmethod
+    def cache_is_shared() -> bool:
+        """False when other processes cannot see ``notify`` (per-process cache backends)"""
+        return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+    @classmethod
+    def earliest_scheduled(cls):
+        return (
+            BlogPost.objects.filter(status='scheduled')
+            .order_by('scheduled_at')
+            .values_list('scheduled_at', flat=True)
+            .first()
+        )
+
+    @classmethod
+    def publish_due(cls, now=None, limit: int = None) -> List[str]:
+        """
+        Publish one batch of due posts; returns their ids.
+
+        Status, ``published_at`` (the scheduled time) and search vectors are
+        updated in one transaction; once it commits, caches are purged and a
+        related-posts refresh is queued, so no row locks are held meanwhile.
+        """
+        from .tasks import update_related_posts
+
+        now = now or timezone.now()
+        with transaction.atomic():
+            post_ids = list(
+                BlogPost.objects.select_for_update(skip_locked=True)
+                .filter(status='scheduled', scheduled_at__lte=now)
+                .order_by('scheduled_at')
+                .values_list('pk', flat=True)[:limit or cls.BATCH_SIZE]
+            )
+            if not post_ids:
+                return []
+
+            BlogPost.objects.filter(pk__in=post_ids).update(
+                status='published', published_at=F('scheduled_at'), updated_at=now
+            )
+            BlogSearchService.update_search_vectors(post_ids)
+            transaction.on_commit(lambda: cls.purge_caches(post_ids))
+            transaction.on_commit(lambda: update_related_posts.delay([str(pk) for pk in post_ids]))
+
+        logger.info("Published %d scheduled posts", len(post_ids))
+        return [str(pk) for pk in post_ids]
+
+    @classmethod
+    def publish_all_due(cls, now=None) -> int:
+        """Publish batches until nothing is due; returns number published"""
+        total = 0
+        while True:
+            published = cls.publish_due(now)
+            total += len(published)
+            if len(published) < cls.BATCH_SIZE:
+                return total
+
+    @classmethod
+    def purge_caches(cls, post_ids):
+        # Rows were published with update(), so no post_save signals fired
+        BlogSearchService.invalidate()
+        taxonomy = BlogPost.objects.filter(pk__in=post_ids).values_list('categories', 'tags')
+        ResponseCacheService.invalidate_posts(
+            post_ids, lists=True,
+            taxonomy={f'category:{category}' for category, _ in taxonomy if category}
+            | {f'tag:{tag}' for _, tag in taxonomy if tag},
+        )
+
+
+class PublishScheduler:
+    """Long-running loop that wakes when the next scheduled post is due"""
+
+    LOAD_HORIZON = timedelta(hours=6)  # Only the near future is kept in memory
+    LOAD_LIMIT = 10000
+    CHECK_INTERVAL = 5  # Seconds between version-key checks while idle
+    RELOAD_INTERVAL = 15 * 60  # Re-read the horizon at least this often
+
+    def __init__(self, clock: Callable = timezone.now, sleep: Callable = time.sleep, poll_database: bool = None):
+        self.clock = clock
+        self.sleep = sleep
+        # Without a shared cache, notify() from other processes is invisible here
+        self.poll_database = not PublishSchedulerService.cache_is_shared() if poll_database is None else poll_database
+        self.heap = []
+        self.version = None
+        self.loaded_at = None
+        self.truncated = False
+
+    def reload(self):
+        now = self.clock()
+        rows = list(
+            BlogPost.objects.filter(status='scheduled', scheduled_at__lte=now + self.LOAD_HORIZON)
+            .order_by('scheduled_at')
+            .values_list('scheduled_at', 'pk')[:self.LOAD_LIMIT]
+        )
+        # Rows arrive sorted, which already satisfies the heap invariant
+        self.heap = [(scheduled_at, str(pk)) for scheduled_at, pk in rows]
+        self.truncated = len(rows) == self.LOAD_LIMIT
+        self.version = PublishSchedulerService.version()
+        self.loaded_at = now
+
+    def needs_reload(self, now) -> bool:
+        return (
+            self.loaded_at is None
+            or self.version != PublishSchedulerService.version()
+            or (now - self.loaded_at).total_seconds() >= self.RELOAD_INTERVAL
+            or (self.truncated and not self.heap)
+            or (self.poll_database and self.scheduled_earlier(now))
+        )
+
+    def scheduled_earlier(self, now) -> bool:
+        """Whether the database holds a post within the horizon due before the heap's first entry"""
+        earliest = PublishSchedulerService.earliest_scheduled()
+        if earliest is None or earliest > now + self.LOAD_HORIZON:
+            return False
+        return not self.heap or earliest < self.heap[0][0]
+
+    def run_once(self) -> float:
+        """Publish anything due; returns seconds to sleep before the next call"""
+        now = self.clock()
+        if self.needs_reload(now):
+            self.reload()
+
+        if self.heap and self.heap[0][0] <= now:
+            while self.heap and self.heap[0][0] <= now:
+                heapq.heappop(self.heap)
+            PublishSchedulerService.publish_all_due(now)
+            return 0
+
+        wait = self.CHECK_INTERVAL
+        if self.heap:
+            wait = min(wait, (self.heap[0][0] - now).total_seconds())
+        return max(0.0, wait)
+
+    def run(self, should_stop: Callable[[], bool] = lambda: False):
+        while not should_stop():
+            try:
+                wait = self.run_once()
+            except Exception:
+                logger.exception("Scheduled publishing failed; retrying")
+                self.loaded_at = None
+                wait = self.CHECK_INTERVAL
+            if wait:
+                self.sleep(wait)
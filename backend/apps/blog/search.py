@@ -0,0 +1,294 @@
+"""
+Full-text search for blog posts
+
+PostgreSQL full-text search with a weighted term-matching fallback elsewhere;
+ranked ids are cached per query.
+"""
+import hashlib
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Exists, F, Func, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils.html import escape, strip_tags
+
+from .models import BlogPost, BlogTag, BlogCategory
+
+
+class StripHTML(Func):
+    """Remove HTML tags from a text expression (PostgreSQL regexp_replace)"""
+    function = 'regexp_replace'
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value('<[^>]+>'), Value(' '), Value('g'), **extra)
+
+
+class BlogSearchService:
+    """Service for indexing and querying blog posts"""
+
+    # Text search configuration; 'simple' avoids English-only stemming of
+    # the Vietnamese content that makes up most of the blog
+    CONFIG = 'simple'
+
+    # Fields that feed the search vector, used to skip needless re-indexing
+    INDEXED_FIELDS = frozenset({'title', 'excerpt', 'content'})
+
+    # PostgreSQL default weights for A/B/C, mirrored by the SQLite fallback
+    FIELD_WEIGHTS = {'title': 1.0, 'excerpt': 0.4, 'taxonomy': 0.4, 'content': 0.2}
+
+    MAX_RESULTS = 1000
+    RESULT_CACHE_TIMEOUT = 300
+    GENERATION_KEY = 'blog:search:generation'
+
+    @classmethod
+    def is_postgres(cls) -> bool:
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def vector_expression(cls):
+        """Weighted search vector: title A, excerpt B, tags/categories B, content C"""
+        tag_names = Subquery(
+            BlogTag.objects.filter(posts=OuterRef('pk'))
+            .values('posts')
+            .annotate(names=StringAgg('name', delimiter=' '))
+            .values('names')[:1]
+        )
+        category_names = Subquery(
+            BlogCategory.objects.filter(posts=OuterRef('pk'))
+            .values('posts')
+            .annotate(names=StringAgg('name', delimiter=' '))
+            .values('names')[:1]
+        )
+
+        return (
+            SearchVector('title', weight='A', config=cls.CONFIG) +
+            SearchVector('excerpt', weight='B', config=cls.CONFIG) +
+            SearchVector(Coalesce(tag_names, Value('')), weight='B', config=cls.CONFIG) +
+            SearchVector(Coalesce(category_names, Value('')), weight='B', config=cls.CONFIG) +
+            SearchVector(StripHTML(F('content')), weight='C', config=cls.CONFIG)
+        )
+
+    @classmethod
+    def update_search_vectors(cls, post_ids: Iterable = None) -> int:
+        """Recompute search vectors for the given posts (all posts if None)"""
+        if not cls.is_postgres():
+            return 0
+
+        queryset = BlogPost.objects.all()
+        if post_ids is not None:
+            post_ids = list(post_ids)
+            if not post_ids:
+                return 0
+            queryset = queryset.filter(pk__in=post_ids)
+
+        return queryset.update(search_vector=cls.vector_expression())
+
+    @classmethod
+    def schedule_update(cls, post_ids: Iterable):
+        """Re-index posts once the surrounding transaction commits"""
+        post_ids = list(post_ids)
+        if not post_ids:
+            return
+
+        def _update():
+            cls.update_search_vectors(post_ids)
+            cls.invalidate()
+
+        transaction.on_commit(_update)
+
+    @classmethod
+    def invalidate(cls):
+        """Drop all cached result sets by moving to a new generation"""
+        try:
+            cache.incr(cls.GENERATION_KEY)
+        except ValueError:
+            cache.set(cls.GENERATION_KEY, 1, None)
+
+    @classmethod
+    def filter_queryset(cls, queryset, text: str):
+        """Restrict a queryset to posts matching the search text (no ranking)"""
+        text = (text or '').strip()
+        if not text:
+            return queryset
+
+        if cls.is_postgres():
+            return queryset.filter(search_vector=cls._search_query(text))
+
+        terms = cls._terms(text)
+        if not terms:
+            return queryset.none()
+        return queryset.filter(cls._fallback_condition(terms))
+
+    @classmethod
+    def search(cls, text: str, page: int = 1, page_size: Optional[int] = 20) -> Dict[str, Any]:
+        """
+        Search published posts.
+
+        Returns ``{'count': int, 'results': [BlogPost, ...]}`` where each post
+        carries ``rank`` and ``headline`` attributes for the requested page
+        (every match, up to ``MAX_RESULTS``, when ``page_size`` is None).
+        """
+        text = (text or '').strip()
+        if not text:
+            return {'count': 0, 'results': []}
+
+        ranked = cls.ranked_ids(text)
+        if page_size is None:
+            page_ranks = dict(ranked)
+        else:
+            start = (max(page, 1) - 1) * page_size
+            page_ranks = dict(ranked[start:start + page_size])
+
+        return {
+            'count': len(ranked),
+            'results': cls._load_page(page_ranks, text),
+        }
+
+    @classmethod
+    def ranked_ids(cls, text: str) -> List[Tuple[str, float]]:
+        """Ordered ``(post_id, rank)`` pairs for a query, cached per generation"""
+        generation = cache.get(cls.GENERATION_KEY, 0)
+        digest = hashlib.sha1(text.lower().encode('utf-8')).hexdigest()
+        cache_key = f'blog:search:{generation}:{digest}'
+
+        ranked = cache.get(cache_key)
+        if ranked is None:
+            if cls.is_postgres():
+                ranked = cls._rank_postgres(text)
+            else:
+                ranked = cls._rank_fallback(text)
+            cache.set(cache_key, ranked, cls.RESULT_CACHE_TIMEOUT)
+        return ranked
+
+    @classmethod
+    def _published(cls):
+        return BlogPost.objects.filter(status='published')
+
+    @classmethod
+    def _search_query(cls, text: str) -> SearchQuery:
+        return SearchQuery(text, search_type='websearch', config=cls.CONFIG)
+
+    @classmethod
+    def _rank_postgres(cls, text: str) -> List[Tuple[str, float]]:
+        query = cls._search_query(text)
+        rows = (
+            cls._published()
+            .filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-published_at')
+            .values_list('pk', 'rank')[:cls.MAX_RESULTS]
+        )
+        return [(str(pk), float(rank)) for pk, rank in rows]
+
+    @classmethod
+    def _load_page(cls, page_ranks: Dict[str, float], text: str) -> List[BlogPost]:
+        if not page_ranks:
+            return []
+
+        queryset = cls._published().filter(pk__in=list(page_ranks)).select_related(
+            'author', 'featured_image'
+        ).prefetch_related('categories', 'tags')
+
+        if cls.is_postgres():
+            queryset = queryset.annotate(headline=SearchHeadline(
+                StripHTML(F('content')),
+                cls._search_query(text),
+                config=cls.CONFIG,
+                start_sel='<mark>',
+                stop_sel='</mark>',
+                max_words=35,
+                min_words=15,
+                max_fragments=2,
+            ))
+
+        posts = list(queryset)
+        terms = cls._terms(text)
+        for post in posts:
+            post.rank = page_ranks[str(post.pk)]
+            if not hasattr(post, 'headline'):
+                post.headline = cls._highlight(post.content, terms)
+
+        posts.sort(key=lambda post: (-post.rank, -(post.published_at.timestamp() if post.published_at else 0)))
+        return posts
+
+    @classmethod
+    def _terms(cls, text: str) -> List[str]:
+        terms = [term.lower() for term in re.findall(r'\w+', text)]
+        return list(dict.fromkeys(terms))
+
+    @classmethod
+    def _fallback_condition(cls, terms: List[str]) -> Q:
+        condition = Q()
+        for term in terms:
+            condition &= (
+                Q(title__icontains=term) |
+                Q(excerpt__icontains=term) |
+                Q(content__icontains=term) |
+                Q(Exists(BlogTag.objects.filter(posts=OuterRef('pk'), name__icontains=term))) |
+                Q(Exists(BlogCategory.objects.filter(posts=OuterRef('pk'), name__icontains=term)))
+            )
+        return condition
+
+    @classmethod
+    def _rank_fallback(cls, text: str) -> List[Tuple[str, float]]:
+        terms = cls._terms(text)
+        if not terms:
+            return []
+
+        rows = list(
+            cls._published()
+            .filter(cls._fallback_condition(terms))
+            .values_list('pk', 'title', 'excerpt', 'content', 'published_at')
+        )
+        post_ids = [row[0] for row in rows]
+
+        taxonomy = {pk: [] for pk in post_ids}
+        for pk, name in BlogPost.tags.through.objects.filter(
+            blogpost_id__in=post_ids
+        ).values_list('blogpost_id', 'blogtag__name'):
+            taxonomy[pk].append(name)
+        for pk, name in BlogPost.categories.through.objects.filter(
+            blogpost_id__in=post_ids
+        ).values_list('blogpost_id', 'blogcategory__name'):
+            taxonomy[pk].append(name)
+
+        scored = []
+        for pk, title, excerpt, content, published_at in rows:
+            fields = {
+                'title': title.lower(),
+                'excerpt': excerpt.lower(),
+                'taxonomy': ' '.join(taxonomy[pk]).lower(),
+                'content': strip_tags(content).lower(),
+            }
+            score = sum(
+                weight * fields[field].count(term)
+                for field, weight in cls.FIELD_WEIGHTS.items()
+                for term in terms
+            )
+            # Length normalisation similar to ts_rank normalization 1
+            length = len(fields['content'].split()) + 1
+            scored.append((str(pk), score / (1 + math.log(length)), published_at))
+
+        scored.sort(key=lambda row: (-row[1], -(row[2].timestamp() if row[2] else 0)))
+        return [(pk, rank) for pk, rank, _ in scored[:cls.MAX_RESULTS]]
+
+    @classmethod
+    def _highlight(cls, content: str, terms: List[str], width: int = 240) -> str:
+        """Build a short snippet around the first match with <mark> tags"""
+        text = re.sub(r'\s+', ' ', strip_tags(content or '')).strip()
+        if not terms:
+            return escape(text[:width])
+
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        match = pattern.search(text)
+        start = max(0, match.start() - width // 3) if match else 0
+        snippet = text[start:start + width]
+
+        highlighted = pattern.sub(lambda m: f'\x00{m.group(0)}\x01', snippet)
+        highlighted = escape(highlighted).replace('\x00', '<mark>').replace('\x01', '</mark>')
+        return ('...' if start else '') + highlighted + ('...' if start + width < len(text) else '')
@@ -0,0 +1,202 @@
+"""
+Single-pass content tokenizer for SEO analysis
+
+Each paragraph is tokenized once and its metrics memoized, so re-analysing an
+edited post only reprocesses changed paragraphs.
+"""
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from html.parser import HTMLParser
+from typing import List, Tuple
+
+WORD_RE = re.compile(r'\w+')
+SENTENCE_RE = re.compile(r'[.!?]+')
+LETTER_RE = re.compile(r'[a-zA-Z]')
+EXAMPLE_RE = re.compile(r'(for example|such as|including|like)', re.IGNORECASE)
+LIST_RE = re.compile(r'(\d+\.|•|\*)')
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+RELATED_STOP_WORDS = frozenset(['this', 'that', 'with', 'have', 'will', 'from', 'they', 'been'])
+
+
+@lru_cache(maxsize=65536)
+def count_syllables(word: str) -> int:
+    """Count syllables in a word (approximation)"""
+    word = word.lower()
+    vowels = 'aeiouy'
+    syllable_count = 0
+    prev_was_vowel = False
+
+    for char in word:
+        if char in vowels:
+            if not prev_was_vowel:
+                syllable_count += 1
+            prev_was_vowel = True
+        else:
+            prev_was_vowel = False
+
+    # Handle silent e
+    if word.endswith('e'):
+        syllable_count -= 1
+
+    # Every word has at least one syllable
+    return max(1, syllable_count)
+
+
+class _ParagraphParser(HTMLParser):
+    """Collects text, headings, links and images of an HTML fragment"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_parts = []
+        self.headings = [0] * len(HEADING_TAGS)
+        self.heading_texts = []
+        self.internal_links = 0
+        self.external_links = 0
+        self.images = 0
+        self.images_without_alt = 0
+        self._heading_tag = None
+        self._heading_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href is None:
+                return
+            if href.startswith(('http://', 'https://')):
+                self.external_links += 1
+            else:
+                self.internal_links += 1
+        elif tag == 'img':
+            self.images += 1
+            if 'alt' not in dict(attrs):
+                self.images_without_alt += 1
+        elif tag in HEADING_TAGS:
+            self.headings[HEADING_TAGS.index(tag)] += 1
+            self._heading_tag = tag
+            self._heading_parts = []
+
+    def handle_endtag(self, tag):
+        if tag == self._heading_tag:
+            self.heading_texts.append(''.join(self._heading_parts).lower())
+            self._heading_tag = None
+
+    def handle_data(self, data):
+        self.text_parts.append(data)
+        if self._heading_tag:
+            self._heading_parts.append(data)
+
+
+@dataclass(frozen=True)
+class ParagraphMetrics:
+    """Everything the SEO scorer needs from one paragraph"""
+    is_blank: bool
+    text: str
+    lower_text: str
+    word_count: int
+    sentence_count: int
+    syllable_count: int
+    complex_words: int
+    letter_count: int
+    word_frequency: Counter
+    has_examples: bool
+    has_list: bool
+    headings: Tuple[int, ...]
+    heading_texts: Tuple[str, ...]
+    internal_links: int
+    external_links: int
+    images: int
+    images_without_alt: int
+
+
+@lru_cache(maxsize=4096)
+def analyze_paragraph(paragraph: str) -> ParagraphMetrics:
+    """Tokenize a paragraph once; memoized by paragraph text"""
+    parser = _ParagraphParser()
+    parser.feed(paragraph)
+    parser.close()
+
+    text = ''.join(parser.text_parts)
+    syllable_count = 0
+    complex_words = 0
+    word_frequency = Counter()
+
+    words = WORD_RE.findall(text)
+    for word in words:
+        word = word.lower()
+        syllables = count_syllables(word)
+        syllable_count += syllables
+        if syllables >= 3:
+            complex_words += 1
+        if len(word) > 3 and word not in RELATED_STOP_WORDS:
+            word_frequency[word] += 1
+
+    return ParagraphMetrics(
+        is_blank=not paragraph.strip(),
+        text=text,
+        lower_text=text.lower(),
+        word_count=len(words),
+        sentence_count=len(SENTENCE_RE.findall(text)),
+        syllable_count=syllable_count,
+        complex_words=complex_words,
+        letter_count=len(LETTER_RE.findall(text)),
+        word_frequency=word_frequency,
+        has_examples=bool(EXAMPLE_RE.search(text)),
+        has_list=bool(LIST_RE.search(text)),
+        headings=tuple(parser.headings),
+        heading_texts=tuple(parser.heading_texts),
+        internal_links=parser.internal_links,
+        external_links=parser.external_links,
+        images=parser.images,
+        images_without_alt=parser.images_without_alt,
+    )
+
+
+class ContentMetrics:
+    """Aggregated metrics for a whole post, built from cached paragraphs"""
+
+    def __init__(self, paragraphs: List[ParagraphMetrics]):
+        self.paragraphs = paragraphs
+        self.word_count = sum(p.word_count for p in paragraphs)
+        self.sentence_count = sum(p.sentence_count for p in paragraphs)
+        self.syllable_count = sum(p.syllable_count for p in paragraphs)
+        self.complex_words = sum(p.complex_words for p in paragraphs)
+        self.letter_count = sum(p.letter_count for p in paragraphs)
+        self.paragraph_count = sum(1 for p in paragraphs if not p.is_blank)
+        self.internal_links = sum(p.internal_links for p in paragraphs)
+        self.external_links = sum(p.external_links for p in paragraphs)
+        self.images = sum(p.images for p in paragraphs)
+        self.images_without_alt = sum(p.images_without_alt for p in paragraphs)
+        self.has_examples = any(p.has_examples for p in paragraphs)
+        self.has_list = any(p.has_list for p in paragraphs)
+
+    @classmethod
+    def from_html(cls, content: str) -> 'ContentMetrics':
+        return cls([analyze_paragraph(paragraph) for paragraph in (content or '').split('\n\n')])
+
+    @cached_property
+    def text(self) -> str:
+        """Tag-free text of the whole post"""
+        return '\n\n'.join(p.text for p in self.paragraphs)
+
+    @cached_property
+    def lower_text(self) -> str:
+        return '\n\n'.join(p.lower_text for p in self.paragraphs)
+
+    @cached_property
+    def headings(self) -> dict:
+        totals = [sum(counts) for counts in zip(*(p.headings for p in self.paragraphs))]
+        return dict(zip(HEADING_TAGS, totals))
+
+    @cached_property
+    def heading_texts(self) -> List[str]:
+        return [text for p in self.paragraphs for text in p.heading_texts]
+
+    @cached_property
+    def word_frequency(self) -> Counter:
+        frequency = Counter()
+        for paragraph in self.paragraphs:
+            frequency.update(paragraph.word_frequency)
+        return frequency
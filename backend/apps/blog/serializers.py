@@ -1,9 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from .models import (
     BlogPost, BlogCategory, BlogTag, MediaFile, MediaFolder, MediaTag,
     SEOAnalysis, BlogAnalytics, BlogComment, BlogPostVersion
 )
+from .categories import CategoryTreeService
+from .comments import CommentThreadService
+from .blobs import MediaBlobService
+from .versions import BlogPostVersionService
 
 User = get_user_model()
 
@@ -37,34 +42,63 @@ class MediaFileSerializer(serializers.ModelSerializer):
         model = MediaFile
         fields = [
             'id', 'filename', 'original_name', 'mime_type', 'file_size', 'file_size_mb',
-            'storage_path', 'cdn_url', 'width', 'height', 'alt_text', 'caption',
-            'description', 'ai_description', 'ai_tags', 'detected_objects',
+            'storage_path', 'cdn_url', 'width', 'height', 'variants', 'blurhash', 'lqip',
+            'alt_text', 'caption', 'description', 'ai_description', 'ai_tags', 'detected_objects',
             'folder', 'tags', 'usage_count', 'last_used', 'uploaded_by',
             'is_image', 'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'filename', 'file_size', 'width', 'height', 'ai_description',
-            'ai_tags', 'detected_objects', 'usage_count', 'last_used', 'uploaded_by'
+            'filename', 'file_size', 'width', 'height', 'variants', 'blurhash', 'lqip',
+            'ai_description', 'ai_tags', 'detected_objects', 'usage_count', 'last_used', 'uploaded_by'
         ]
 
 
-class BlogCategorySerializer(serializers.ModelSerializer):
-    children = serializers.SerializerMethodField()
-    hierarchy = serializers.ReadOnlyField(source='get_hierarchy')
+class BlogCategoryBaseSerializer(serializers.ModelSerializer):
+    """Category fields without the tree (used to build the cached tree)"""
     
     class Meta:
         model = BlogCategory
+        fields = [
+            'id', 'name', 'slug', 'description', 'parent', 'color', 'icon',
+            'meta_title', 'meta_description', 'post_count', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['post_count']
+
+
+class BlogCategorySerializer(BlogCategoryBaseSerializer):
+    children = serializers.SerializerMethodField()
+    hierarchy = serializers.SerializerMethodField()
+    
+    class Meta(BlogCategoryBaseSerializer.Meta):
         fields = [
             'id', 'name', 'slug', 'description', 'parent', 'color', 'icon',
             'meta_title', 'meta_description', 'post_count', 'children', 'hierarchy',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['post_count']
+    
+    def _tree_node(self, obj):
+        # Fetch the cached tree once per serializer (shared by list items)
+        if not hasattr(self, '_category_index'):
+            self._category_index = CategoryTreeService.get_index()
+        node = self._category_index['nodes'].get(str(obj.pk))
+        return node if node is not None else CategoryTreeService.get_node(obj.pk)
     
     def get_children(self, obj):
-        if obj.children.exists():
-            return BlogCategorySerializer(obj.children.all(), many=True).data
-        return []
+        node = self._tree_node(obj)
+        return node['children'] if node else []
+    
+    def get_hierarchy(self, obj):
+        node = self._tree_node(obj)
+        if node:
+            return node['hierarchy']
+        return [{'id': str(obj.pk), 'name': obj.name, 'slug': obj.slug}]
+    
+    def validate_parent(self, value):
+        """Prevent cycles in the category tree"""
+        instance = getattr(self, 'instance', None)
+        if instance and value and value.path.startswith(instance.path):
+            raise serializers.ValidationError("A category cannot be moved under itself or its descendants.")
+        return value
 
 
 class BlogTagSerializer(serializers.ModelSerializer):
@@ -105,35 +139,75 @@ class BlogAnalyticsSerializer(serializers.ModelSerializer):
         ]
 
 
-class BlogCommentSerializer(serializers.ModelSerializer):
+class BlogCommentBaseSerializer(serializers.ModelSerializer):
+    """Flat comment fields; replies are linked by CommentThreadService"""
     author = UserSerializer(read_only=True)
-    replies = serializers.SerializerMethodField()
     
     class Meta:
         model = BlogComment
         fields = [
-            'id', 'author', 'content', 'parent', 'replies', 'is_approved',
+            'id', 'author', 'content', 'parent', 'is_approved',
             'is_spam', 'created_at', 'updated_at'
         ]
         read_only_fields = ['is_approved', 'is_spam']
+
+
+class BlogCommentSerializer(BlogCommentBaseSerializer):
+    replies = serializers.SerializerMethodField()
+    
+    class Meta(BlogCommentBaseSerializer.Meta):
+        fields = [
+            'id', 'author', 'content', 'parent', 'replies', 'is_approved',
+            'is_spam', 'created_at', 'updated_at'
+        ]
     
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return BlogCommentSerializer(obj.replies.filter(is_approved=True), many=True).data
-        return []
+        # Load each post's cached threads once per serializer (shared by list items)
+        if not hasattr(self, '_comment_indexes'):
+            self._comment_indexes = {}
+        if obj.post_id not in self._comment_indexes:
+            self._comment_indexes[obj.post_id] = CommentThreadService.get_index(obj.post_id)
+        node = self._comment_indexes[obj.post_id]['nodes'].get(str(obj.pk))
+        return node['replies'] if node else []
 
 
-class BlogPostVersionSerializer(serializers.ModelSerializer):
+class BlogPostVersionListSerializer(serializers.ModelSerializer):
+    """Version metadata (content is not loaded)"""
     changed_by = UserSerializer(read_only=True)
     
     class Meta:
         model = BlogPostVersion
         fields = [
-            'id', 'version_number', 'title', 'content', 'excerpt',
+            'id', 'version_number', 'title', 'content_length', 'is_snapshot',
             'changed_by', 'change_summary', 'created_at'
         ]
 
 
+class BlogPostVersionSerializer(BlogPostVersionListSerializer):
+    """Full version with content reconstructed from snapshots and deltas"""
+    content = serializers.SerializerMethodField()
+    excerpt = serializers.SerializerMethodField()
+    
+    class Meta(BlogPostVersionListSerializer.Meta):
+        fields = [
+            'id', 'version_number', 'title', 'content', 'excerpt', 'content_length',
+            'is_snapshot', 'changed_by', 'change_summary', 'created_at'
+        ]
+    
+    def _texts(self, obj):
+        try:
+            return BlogPostVersionService.get_texts(obj.post_id, obj.version_number)
+        except BlogPostVersion.DoesNotExist:
+            # Snapshot/delta chain is broken: metadata is still served, the text is not
+            return {'content': None, 'excerpt': None}
+    
+    def get_content(self, obj):
+        return self._texts(obj)['content']
+    
+    def get_excerpt(self, obj):
+        return self._texts(obj)['excerpt']
+
+
 class BlogPostListSerializer(serializers.ModelSerializer):
     """Serializer for blog post list view (minimal data)"""
     author = UserSerializer(read_only=True)
@@ -163,8 +237,8 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
     og_image = MediaFileSerializer(read_only=True)
     twitter_image = MediaFileSerializer(read_only=True)
     seo_analysis = SEOAnalysisSerializer(read_only=True)
-    comments = BlogCommentSerializer(many=True, read_only=True)
-    versions = BlogPostVersionSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    versions = serializers.SerializerMethodField()
     estimated_reading_time = serializers.ReadOnlyField()
     is_published = serializers.ReadOnlyField()
     
@@ -185,6 +259,13 @@ class BlogPostDetailSerializer(serializers.ModelSerializer):
             'word_count', 'reading_time', 'seo_score', 'readability_score',
             'view_count', 'like_count', 'share_count', 'comment_count'
         ]
+    
+    def get_comments(self, obj):
+        """Approved top-level threads with nested replies"""
+        return CommentThreadService.get_threads(obj.pk)
+    
+    def get_versions(self, obj):
+        return BlogPostVersionListSerializer(BlogPostVersionService.list_versions(obj), many=True).data
 
 
 class BlogPostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -256,15 +337,13 @@ class MediaFileUploadSerializer(serializers.ModelSerializer):
         validated_data['mime_type'] = file.content_type
         validated_data['file_size'] = file.size
         
-        # Handle image dimensions
-        if file.content_type.startswith('image/'):
-            try:
-                from PIL import Image
-                image = Image.open(file)
-                validated_data['width'] = image.width
-                validated_data['height'] = image.height
-            except Exception:
-                pass
+        # Identical content is stored once and shared through the blob
+        blob = MediaBlobService.store(file, mime_type=file.content_type)
+        validated_data['blob'] = blob
+        validated_data['storage_path'] = blob.storage_path
+        validated_data['cdn_url'] = default_storage.url(blob.storage_path)
+        
+        # Dimensions and variants are filled in by the processing task
         
         return super().create(validated_data)
 
@@ -275,10 +354,13 @@ class BlogPostSearchSerializer(serializers.ModelSerializer):
     categories = BlogCategorySerializer(many=True, read_only=True)
     tags = BlogTagSerializer(many=True, read_only=True)
     featured_image = MediaFileSerializer(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    headline = serializers.CharField(read_only=True)
     
     class Meta:
         model = BlogPost
         fields = [
             'id', 'title', 'slug', 'excerpt', 'author', 'categories', 'tags',
-            'featured_image', 'seo_score', 'view_count', 'published_at'
+            'featured_image', 'seo_score', 'view_count', 'published_at',
+            'rank', 'headline'
         ]
\ No newline at end of file
@@ -1,8 +1,20 @@
 import re
 import math
-from typing import Dict, List, Any
-from django.utils.html import strip_tags
+import json
+import hashlib
+import logging
+from typing import Dict, List, Any, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
 from .models import BlogPost, SEOAnalysis, MediaFile
+from .seo import ContentMetrics, count_syllables
+from .images import render_image, run_in_pool, map_in_pool, supported_formats
+from .blobs import MediaBlobService
+
+logger = logging.getLogger(__name__)
 
 
 class SEOAnalysisService:
@@ -41,12 +53,13 @@ class SEOAnalysisService:
     @classmethod
     def analyze_content(cls, content: str, title: str = '', meta_description: str = '', focus_keyword: str = '') -> Dict[str, Any]:
         """Analyze content and return SEO metrics"""
-        clean_content = strip_tags(content)
+        # Single tokenizer pass; unchanged paragraphs come from the cache
+        metrics = ContentMetrics.from_html(content)
         
         # Basic metrics
-        word_count = len(re.findall(r'\w+', clean_content))
-        sentence_count = len(re.findall(r'[.!?]+', clean_content))
-        paragraph_count = len([p for p in content.split('\n\n') if p.strip()])
+        word_count = metrics.word_count
+        sentence_count = metrics.sentence_count
+        paragraph_count = metrics.paragraph_count
         
         # Title analysis
         title_score = cls._analyze_title(title, focus_keyword)
@@ -55,16 +68,16 @@ class SEOAnalysisService:
         description_score = cls._analyze_meta_description(meta_description, focus_keyword)
         
         # Content analysis
-        content_score = cls._analyze_content_quality(clean_content, word_count)
+        content_score = cls._analyze_content_quality(metrics)
         
         # Keyword analysis
-        keyword_score, keyword_density = cls._analyze_keywords(clean_content, focus_keyword)
+        keyword_score, keyword_density = cls._analyze_keywords(metrics, focus_keyword)
         
         # Readability analysis
-        readability_metrics = cls._analyze_readability(clean_content, word_count, sentence_count)
+        readability_metrics = cls._analyze_readability(metrics)
         
         # Technical SEO analysis
-        technical_score, technical_metrics = cls._analyze_technical_seo(content)
+        technical_score, technical_metrics = cls._analyze_technical_seo(metrics)
         
         # Calculate overall score
         overall_score = cls._calculate_overall_score(
@@ -88,8 +101,8 @@ class SEOAnalysisService:
             'readability_score': readability_metrics['flesch_kincaid_score'],
             'technical_score': technical_score,
             'keyword_density': keyword_density,
-            'keyword_distribution': cls._analyze_keyword_distribution(content, focus_keyword),
-            'related_keywords': cls._suggest_related_keywords(clean_content, focus_keyword),
+            'keyword_distribution': cls._analyze_keyword_distribution(metrics, focus_keyword),
+            'related_keywords': cls._suggest_related_keywords(metrics, focus_keyword),
             'flesch_kincaid_score': readability_metrics['flesch_kincaid_score'],
             'gunning_fog_score': readability_metrics['gunning_fog_score'],
             'coleman_liau_score': readability_metrics['coleman_liau_score'],
@@ -168,9 +181,10 @@ class SEOAnalysisService:
         return min(score, 100)
     
     @classmethod
-    def _analyze_content_quality(cls, content: str, word_count: int) -> int:
+    def _analyze_content_quality(cls, metrics: ContentMetrics) -> int:
         """Analyze content quality"""
         score = 0
+        word_count = metrics.word_count
         
         # Word count (300+ words is good, 1000+ is excellent)
         if word_count >= 1000:
@@ -183,7 +197,7 @@ class SEOAnalysisService:
             score += 10
         
         # Content structure
-        paragraphs = content.split('\n\n')
+        paragraphs = metrics.paragraphs
         avg_paragraph_length = word_count / len(paragraphs) if paragraphs else 0
         
         if 50 <= avg_paragraph_length <= 150:
@@ -192,9 +206,8 @@ class SEOAnalysisService:
             score += 10
         
         # Sentence variety
-        sentences = re.findall(r'[.!?]+', content)
-        if len(sentences) > 0:
-            avg_sentence_length = word_count / len(sentences)
+        if metrics.sentence_count > 0:
+            avg_sentence_length = word_count / metrics.sentence_count
             if 15 <= avg_sentence_length <= 25:
                 score += 20
             elif avg_sentence_length < 30:
@@ -203,26 +216,26 @@ class SEOAnalysisService:
         # Content depth indicators
         if word_count > 500:
             # Look for lists, examples, etc.
-            if re.search(r'(for example|such as|including|like)', content, re.IGNORECASE):
+            if metrics.has_examples:
                 score += 10
-            if re.search(r'(\d+\.|•|\*)', content):  # Lists
+            if metrics.has_list:  # Lists
                 score += 10
         
         return min(score, 100)
     
     @classmethod
-    def _analyze_keywords(cls, content: str, focus_keyword: str) -> tuple:
+    def _analyze_keywords(cls, metrics: ContentMetrics, focus_keyword: str) -> tuple:
         """Analyze keyword usage"""
         if not focus_keyword:
             return 0, 0
         
         score = 0
-        words = re.findall(r'\w+', content.lower())
+        content = metrics.lower_text
         keyword_lower = focus_keyword.lower()
         
         # Count keyword occurrences
-        keyword_count = content.lower().count(keyword_lower)
-        keyword_density = (keyword_count / len(words)) * 100 if words else 0
+        keyword_count = content.count(keyword_lower)
+        keyword_density = (keyword_count / metrics.word_count) * 100 if metrics.word_count else 0
         
         # Optimal density is 0.5-2.5%
         if 0.5 <= keyword_density <= 2.5:
@@ -233,26 +246,28 @@ class SEOAnalysisService:
             score += 10
         
         # Keyword in first paragraph
-        first_paragraph = content[:200].lower()
+        first_paragraph = content[:200]
         if keyword_lower in first_paragraph:
             score += 20
         
         # Keyword in last paragraph
-        last_paragraph = content[-200:].lower()
+        last_paragraph = content[-200:]
         if keyword_lower in last_paragraph:
             score += 15
         
         # Keyword variations
         keyword_variations = cls._get_keyword_variations(focus_keyword)
-        variation_count = sum(1 for var in keyword_variations if var in content.lower())
+        variation_count = sum(1 for var in keyword_variations if var in content)
         if variation_count > 0:
             score += min(variation_count * 5, 25)
         
         return min(score, 100), keyword_density
     
     @classmethod
-    def _analyze_readability(cls, content: str, word_count: int, sentence_count: int) -> Dict[str, float]:
+    def _analyze_readability(cls, metrics: ContentMetrics) -> Dict[str, float]:
         """Analyze readability using various metrics"""
+        word_count = metrics.word_count
+        sentence_count = metrics.sentence_count
         if sentence_count == 0 or word_count == 0:
             return {
                 'flesch_kincaid_score': 0,
@@ -260,20 +275,19 @@ class SEOAnalysisService:
                 'coleman_liau_score': 0
             }
         
-        # Count syllables (approximation)
-        syllable_count = cls._count_syllables(content)
+        # Syllables are counted per word during tokenization (approximation)
+        syllable_count = metrics.syllable_count
         
         # Flesch-Kincaid Reading Ease
         flesch_score = 206.835 - (1.015 * (word_count / sentence_count)) - (84.6 * (syllable_count / word_count))
         flesch_score = max(0, min(100, flesch_score))
         
         # Gunning Fog Index
-        complex_words = len([word for word in re.findall(r'\w+', content) if cls._count_syllables(word) >= 3])
+        complex_words = metrics.complex_words
         gunning_fog = 0.4 * ((word_count / sentence_count) + 100 * (complex_words / word_count))
         
         # Coleman-Liau Index
-        avg_sentence_length = word_count / sentence_count
-        avg_letter_per_100_words = (len(re.findall(r'[a-zA-Z]', content)) / word_count) * 100
+        avg_letter_per_100_words = (metrics.letter_count / word_count) * 100
         coleman_liau = 0.0588 * avg_letter_per_100_words - 0.296 * (sentence_count / word_count * 100) - 15.8
         
         return {
@@ -283,34 +297,21 @@ class SEOAnalysisService:
         }
     
     @classmethod
-    def _analyze_technical_seo(cls, content: str) -> tuple:
+    def _analyze_technical_seo(cls, metrics: ContentMetrics) -> tuple:
         """Analyze technical SEO factors"""
         score = 0
         
-        # Count links
-        internal_links = len(re.findall(r'<a[^>]*href=["\'][^"\']*["\'][^>]*>', content))
-        external_links = len(re.findall(r'<a[^>]*href=["\']https?://[^"\']*["\'][^>]*>', content))
-        
-        # Images without alt text
-        images = re.findall(r'<img[^>]*>', content)
-        images_without_alt = len([img for img in images if 'alt=' not in img])
-        
-        # Heading structure
-        headings = {
-            'h1': len(re.findall(r'<h1[^>]*>', content)),
-            'h2': len(re.findall(r'<h2[^>]*>', content)),
-            'h3': len(re.findall(r'<h3[^>]*>', content)),
-            'h4': len(re.findall(r'<h4[^>]*>', content)),
-            'h5': len(re.findall(r'<h5[^>]*>', content)),
-            'h6': len(re.findall(r'<h6[^>]*>', content))
-        }
+        internal_links = metrics.internal_links
+        external_links = metrics.external_links
+        images_without_alt = metrics.images_without_alt
+        headings = metrics.headings
         
         # Scoring
         if internal_links > 0:
             score += 20
         if external_links > 0:
             score += 15
-        if images_without_alt == 0 and len(images) > 0:
+        if images_without_alt == 0 and metrics.images > 0:
             score += 25
         if headings['h2'] > 0:
             score += 20
@@ -428,26 +429,8 @@ class SEOAnalysisService:
     
     @classmethod
     def _count_syllables(cls, word: str) -> int:
-        """Count syllables in a word (approximation)"""
-        word = word.lower()
-        vowels = 'aeiouy'
-        syllable_count = 0
-        prev_was_vowel = False
-        
-        for char in word:
-            if char in vowels:
-                if not prev_was_vowel:
-                    syllable_count += 1
-                prev_was_vowel = True
-            else:
-                prev_was_vowel = False
-        
-        # Handle silent e
-        if word.endswith('e'):
-            syllable_count -= 1
-        
-        # Every word has at least one syllable
-        return max(1, syllable_count)
+        """Count syllables in a word (approximation, memoized)"""
+        return count_syllables(word)
     
     @classmethod
     def _get_keyword_variations(cls, keyword: str) -> List[str]:
@@ -468,7 +451,7 @@ class SEOAnalysisService:
         return variations
     
     @classmethod
-    def _analyze_keyword_distribution(cls, content: str, focus_keyword: str) -> Dict[str, int]:
+    def _analyze_keyword_distribution(cls, metrics: ContentMetrics, focus_keyword: str) -> Dict[str, int]:
         """Analyze keyword distribution throughout content"""
         if not focus_keyword:
             return {}
@@ -484,42 +467,38 @@ class SEOAnalysisService:
         keyword_lower = focus_keyword.lower()
         
         # Check headings
-        headings = re.findall(r'<h[1-6][^>]*>(.*?)</h[1-6]>', content, re.IGNORECASE)
-        sections['headings'] = sum(1 for heading in headings if keyword_lower in heading.lower())
+        sections['headings'] = sum(1 for heading in metrics.heading_texts if keyword_lower in heading)
         
         # Split content into sections
-        paragraphs = content.split('\n\n')
+        paragraphs = metrics.paragraphs
         if paragraphs:
-            if keyword_lower in paragraphs[0].lower():
+            if keyword_lower in paragraphs[0].lower_text:
                 sections['first_paragraph'] = 1
-            if len(paragraphs) > 1 and keyword_lower in paragraphs[-1].lower():
+            if len(paragraphs) > 1 and keyword_lower in paragraphs[-1].lower_text:
                 sections['last_paragraph'] = 1
             if len(paragraphs) > 2:
-                middle_content = '\n\n'.join(paragraphs[1:-1])
-                sections['middle_content'] = middle_content.lower().count(keyword_lower)
+                sections['middle_content'] = sum(
+                    paragraph.lower_text.count(keyword_lower) for paragraph in paragraphs[1:-1]
+                )
         
         return sections
     
     @classmethod
-    def _suggest_related_keywords(cls, content: str, focus_keyword: str) -> List[str]:
+    def _suggest_related_keywords(cls, metrics: ContentMetrics, focus_keyword: str) -> List[str]:
         """Suggest related keywords based on content"""
         # This is a simplified version - in production, you'd use NLP libraries
-        words = re.findall(r'\w+', content.lower())
-        word_freq = {}
-        
-        # Count word frequency
-        for word in words:
-            if len(word) > 3 and word not in ['this', 'that', 'with', 'have', 'will', 'from', 'they', 'been']:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
         # Get top words
-        related = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+        related = metrics.word_frequency.most_common(10)
         return [word for word, freq in related if freq > 2]
 
 
 class MediaProcessingService:
     """Service for media processing and optimization"""
     
+    IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+    IMAGE_FORMATS = ('webp', 'avif', 'jpeg')
+    VARIANTS_PREFIX = MediaBlobService.VARIANTS_PREFIX
+    
     @classmethod
     def process_media_file(cls, media_file: MediaFile):
         """Process uploaded media file"""
@@ -532,10 +511,139 @@ class MediaProcessingService:
     @classmethod
     def _process_image(cls, media_file: MediaFile):
         """Process image file - resize, optimize, generate formats"""
-        # This would integrate with image processing libraries like Pillow
-        # For now, we'll just update the CDN URL
-        media_file.cdn_url = f"https://cdn.example.com/{media_file.filename}"
-        media_file.save()
+        cls.optimize_image(media_file)
+    
+    @classmethod
+    def optimize_image(cls, media_file: MediaFile, formats: List[str] = None):
+        """Optimize image and generate multiple formats"""
+        if media_file.blob_id:
+            # Content seen before: reuse its variants without reading the original
+            widths, spec_formats = cls._pipeline_spec(formats)
+            manifest = cls._load_manifest(media_file.blob.sha256, widths, spec_formats)
+            if manifest is not None:
+                cls._apply_manifest(media_file, manifest)
+                return
+        
+        if not media_file.storage_path or not default_storage.exists(media_file.storage_path):
+            logger.warning("Media file %s has no stored original; skipping", media_file.pk)
+            return
+        
+        with default_storage.open(media_file.storage_path, 'rb') as source:
+            data = source.read()
+        manifest = cls.render_variants(data, formats)
+        cls._apply_manifest(media_file, manifest)
+    
+    @classmethod
+    def render_variants(cls, data: bytes, formats: List[str] = None) -> Dict[str, Any]:
+        """Rendered variants for ``data``, reused when the same bytes were seen before"""
+        widths, formats = cls._pipeline_spec(formats)
+        digest = hashlib.sha256(data).hexdigest()
+        manifest = cls._load_manifest(digest, widths, formats)
+        if manifest is None:
+            rendered = run_in_pool(render_image, data, widths, formats, workers=cls._workers())
+            manifest = cls._store_rendition(digest, widths, formats, rendered)
+        return manifest
+    
+    @classmethod
+    def process_many(cls, media_files, formats: List[str] = None, workers: int = None):
+        """
+        Render many images concurrently in the process pool.
+        
+        Yields ``(media_file, error)`` pairs; ``error`` is None on success.
+        """
+        widths, formats = cls._pipeline_spec(formats)
+        
+        def jobs():
+            for media_file in media_files:
+                if not media_file.storage_path or not default_storage.exists(media_file.storage_path):
+                    continue
+                with default_storage.open(media_file.storage_path, 'rb') as source:
+                    data = source.read()
+                digest = hashlib.sha256(data).hexdigest()
+                manifest = cls._load_manifest(digest, widths, formats)
+                if manifest is not None:
+                    cls._apply_manifest(media_file, manifest)
+                    continue
+                yield (media_file, digest), (data, widths, formats)
+        
+        for (media_file, digest), result in map_in_pool(render_image, jobs(), workers=workers or cls._workers()):
+            if isinstance(result, Exception):
+                yield media_file, result
+                continue
+            cls._apply_manifest(media_file, cls._store_rendition(digest, widths, formats, result))
+            yield media_file, None
+    
+    @classmethod
+    def _pipeline_spec(cls, formats: List[str] = None) -> Tuple[List[int], List[str]]:
+        widths = sorted(getattr(settings, 'MEDIA_IMAGE_WIDTHS', cls.IMAGE_WIDTHS))
+        formats = supported_formats(formats or getattr(settings, 'MEDIA_IMAGE_FORMATS', cls.IMAGE_FORMATS))
+        return widths, formats
+    
+    @classmethod
+    def _workers(cls) -> int:
+        return getattr(settings, 'MEDIA_PROCESSING_WORKERS', 2)
+    
+    @classmethod
+    def _manifest_path(cls, digest: str) -> str:
+        return f"{cls.VARIANTS_PREFIX}/{digest[:2]}/{digest}/manifest.json"
+    
+    @classmethod
+    def _load_manifest(cls, digest: str, widths: List[int], formats: List[str]):
+        path = cls._manifest_path(digest)
+        if not default_storage.exists(path):
+            return None
+        with default_storage.open(path, 'rb') as handle:
+            manifest = json.loads(handle.read())
+        if manifest.get('widths') != widths or manifest.get('formats') != formats:
+            return None
+        return manifest
+    
+    @classmethod
+    def _store_rendition(cls, digest: str, widths: List[int], formats: List[str], rendered) -> Dict[str, Any]:
+        """Write variants and the manifest under the content hash"""
+        directory = f"{cls.VARIANTS_PREFIX}/{digest[:2]}/{digest}"
+        variants = []
+        for variant in rendered.variants:
+            path = f"{directory}/{variant.width}w.{variant.format}"
+            if not default_storage.exists(path):
+                default_storage.save(path, ContentFile(variant.content))
+            variants.append({
+                'width': variant.width,
+                'height': variant.height,
+                'format': variant.format,
+                'mime_type': variant.mime_type,
+                'size': len(variant.content),
+                'path': path,
+                'url': default_storage.url(path),
+            })
+        
+        manifest = {
+            'widths': widths,
+            'formats': formats,
+            'width': rendered.width,
+            'height': rendered.height,
+            'blurhash': rendered.blurhash,
+            'lqip': rendered.lqip,
+            'variants': variants,
+        }
+        manifest_path = cls._manifest_path(digest)
+        if default_storage.exists(manifest_path):
+            default_storage.delete(manifest_path)
+        default_storage.save(manifest_path, ContentFile(json.dumps(manifest).encode('utf-8')))
+        return manifest
+    
+    @classmethod
+    def _apply_manifest(cls, media_file: MediaFile, manifest: Dict[str, Any]):
+        media_file.width = manifest['width']
+        media_file.height = manifest['height']
+        media_file.blurhash = manifest['blurhash']
+        media_file.lqip = manifest['lqip']
+        media_file.variants = manifest['variants']
+        if manifest['variants']:
+            media_file.cdn_url = manifest['variants'][0]['url']
+        media_file.save(update_fields=[
+            'width', 'height', 'blurhash', 'lqip', 'variants', 'cdn_url', 'updated_at'
+        ])
     
     @classmethod
     def _generate_ai_metadata(cls, media_file: MediaFile):
@@ -551,14 +659,4 @@ class MediaProcessingService:
     def generate_alt_text(cls, media_file: MediaFile) -> str:
         """Generate alt text for image using AI"""
         # This would integrate with AI vision services
-        return f"Alt text for {media_file.original_name}"
-    
-    @classmethod
-    def optimize_image(cls, media_file: MediaFile, formats: List[str] = None):
-        """Optimize image and generate multiple formats"""
-        if formats is None:
-            formats = ['webp', 'avif']
-        
-        # This would use image processing libraries
-        # to generate optimized versions
-        pass
\ No newline at end of file
+        return f"Alt text for {media_file.original_name}"
\ No newline at end of file
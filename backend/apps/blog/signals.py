@@ -0,0 +1,208 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import BlogPost, BlogTag, BlogCategory, BlogComment, MediaFile, RelatedPost
+from .search import BlogSearchService
+from .categories import CategoryTreeService
+from .comments import CommentThreadService
+from .blobs import MediaBlobService
+from .scheduler import PublishSchedulerService
+from .response_cache import PUBLISHED_POSTS, TAG_LIST, ResponseCacheService
+
+# Post fields that influence related-post scores
+RELATED_FIELDS = frozenset({'status', 'title', 'excerpt', 'content'})
+# Post fields that decide whether a post appears in public lists
+LISTING_FIELDS = frozenset({'status', 'published_at'})
+
+
+@receiver(post_save, sender=BlogPost)
+def reindex_post(sender, instance, update_fields=None, **kwargs):
+    """Refresh the search vector when indexed post fields change"""
+    if update_fields is not None and not BlogSearchService.INDEXED_FIELDS.intersection(update_fields):
+        return
+    BlogSearchService.schedule_update([instance.pk])
+
+
+def schedule_related_update(post_ids):
+    """Queue one incremental related-posts refresh for the posts once the transaction commits"""
+    from .tasks import update_related_posts
+    post_ids = [str(pk) for pk in post_ids]
+    if post_ids:
+        transaction.on_commit(lambda: update_related_posts.delay(post_ids))
+
+
+def published_post_ids(post_ids):
+    return BlogPost.objects.filter(pk__in=list(post_ids), status='published').values_list('pk', flat=True)
+
+
+@receiver(post_init, sender=BlogPost)
+def remember_post_status(sender, instance, **kwargs):
+    """Status as loaded, to tell whether a save can change related-post lists"""
+    if 'status' in instance.__dict__:  # Not deferred
+        instance._related_status = instance.status
+
+
+@receiver(post_save, sender=BlogPost)
+def notify_publish_scheduler(sender, instance, **kwargs):
+    """Wake running schedulers so they pick up the new publish time"""
+    if instance.status == 'scheduled':
+        transaction.on_commit(PublishSchedulerService.notify)
+
+
+@receiver(post_save, sender=BlogPost)
+def refresh_related_posts(sender, instance, created, update_fields=None, **kwargs):
+    """Publishing, unpublishing or editing a published post changes its neighbourhood"""
+    if update_fields is not None and not RELATED_FIELDS.intersection(update_fields):
+        return
+    # Unknown (deferred) earlier status: the post may have been published
+    previous = None if created else getattr(instance, '_related_status', 'published')
+    instance._related_status = instance.status
+    if instance.status == 'published' or previous == 'published':
+        schedule_related_update([instance.pk])
+
+
+@receiver(pre_delete, sender=BlogPost)
+def refresh_related_posts_on_delete(sender, instance, **kwargs):
+    """Posts listing the deleted one lose a neighbour; refill their lists"""
+    from .tasks import refresh_related_lists
+    affected = [str(pk) for pk in RelatedPost.objects.filter(related=instance).values_list('post_id', flat=True)]
+    removed = [str(instance.pk)]
+    if affected or instance.status == 'published':
+        transaction.on_commit(lambda: refresh_related_lists.delay(affected, removed))
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+@receiver(m2m_changed, sender=BlogPost.categories.through)
+def reindex_post_taxonomy(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh search vectors and related posts when tags or categories change"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            BlogSearchService.schedule_update([instance.pk])
+            if instance.status == 'published':
+                schedule_related_update([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        BlogSearchService.schedule_update(pk_set or [])
+        if pk_set:
+            schedule_related_update(published_post_ids(pk_set))
+    elif action == 'pre_clear':
+        # Collect the posts before the relation rows disappear
+        post_ids = list(instance.posts.values_list('pk', flat=True))
+        BlogSearchService.schedule_update(post_ids)
+        schedule_related_update(published_post_ids(post_ids))
+
+
+@receiver(post_save, sender=BlogTag)
+@receiver(post_save, sender=BlogCategory)
+def reindex_taxonomy_posts(sender, instance, created, update_fields=None, **kwargs):
+    """Renaming a tag or category changes the text of every post using it"""
+    if created:
+        return
+    if update_fields is not None and 'name' not in update_fields:
+        return
+    BlogSearchService.schedule_update(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=BlogTag)
+@receiver(pre_delete, sender=BlogCategory)
+def reindex_before_taxonomy_delete(sender, instance, **kwargs):
+    BlogSearchService.schedule_update(instance.posts.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=BlogCategory)
+@receiver(post_delete, sender=BlogCategory)
+def invalidate_category_tree(sender, **kwargs):
+    """Any category write changes the cached tree"""
+    transaction.on_commit(CategoryTreeService.invalidate)
+
+
+@receiver(post_save, sender=BlogComment)
+@receiver(post_delete, sender=BlogComment)
+def invalidate_comment_threads(sender, instance, **kwargs):
+    """New, edited, moderated or deleted comments change the post's threads"""
+    post_id = instance.post_id
+    transaction.on_commit(lambda: CommentThreadService.invalidate([post_id]))
+
+
+@receiver(post_save, sender=MediaFile)
+def reference_media_blob(sender, instance, created, **kwargs):
+    if created and instance.blob_id:
+        MediaBlobService.adjust_refs(instance.blob_id, 1)
+
+
+@receiver(post_delete, sender=MediaFile)
+def release_media_blob(sender, instance, **kwargs):
+    """Unreferenced blobs are left for gc_media_blobs"""
+    if instance.blob_id:
+        MediaBlobService.adjust_refs(instance.blob_id, -1)
+
+
+def purge_responses(tags):
+    """Invalidate cached public responses once the transaction commits"""
+    tags = list(tags)
+    if tags:
+        transaction.on_commit(lambda: ResponseCacheService.invalidate(tags))
+
+
+def post_taxonomy_tags(post):
+    return (
+        [f'category:{pk}' for pk in post.categories.values_list('pk', flat=True)]
+        + [f'tag:{pk}' for pk in post.tags.values_list('pk', flat=True)]
+    )
+
+
+@receiver(post_save, sender=BlogPost)
+def purge_post_responses(sender, instance, created, update_fields=None, **kwargs):
+    """Edits purge the post's own entries; publishing changes also purge lists"""
+    if created:
+        # A new post has no taxonomy yet; m2m changes purge those pages
+        purge_responses([f'post:{instance.pk}', PUBLISHED_POSTS])
+        return
+    tags = [f'post:{instance.pk}']
+    if update_fields is None or LISTING_FIELDS.intersection(update_fields):
+        tags += [PUBLISHED_POSTS] + post_taxonomy_tags(instance)
+    purge_responses(tags)
+
+
+@receiver(pre_delete, sender=BlogPost)
+def purge_deleted_post_responses(sender, instance, **kwargs):
+    purge_responses([f'post:{instance.pk}', PUBLISHED_POSTS, TAG_LIST] + post_taxonomy_tags(instance))
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+@receiver(m2m_changed, sender=BlogPost.categories.through)
+def purge_taxonomy_responses(sender, instance, action, reverse, pk_set, **kwargs):
+    """Post pages show their taxonomy; taxonomy pages list their posts"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    prefix = 'tag' if sender is BlogPost.tags.through else 'category'
+    extra = [TAG_LIST] if prefix == 'tag' else []
+    if not reverse:
+        if action == 'pre_clear':
+            pk_set = getattr(instance, 'tags' if prefix == 'tag' else 'categories').values_list('pk', flat=True)
+        purge_responses([f'post:{instance.pk}'] + [f'{prefix}:{pk}' for pk in pk_set or []] + extra)
+    else:
+        if action == 'pre_clear':
+            pk_set = instance.posts.values_list('pk', flat=True)
+        purge_responses([f'{prefix}:{instance.pk}'] + [f'post:{pk}' for pk in pk_set or []] + extra)
+
+
+@receiver(post_save, sender=BlogTag)
+@receiver(post_save, sender=BlogCategory)
+@receiver(pre_delete, sender=BlogTag)
+@receiver(pre_delete, sender=BlogCategory)
+def purge_taxonomy_object_responses(sender, instance, created=False, **kwargs):
+    """Renamed or deleted tags/categories change their page and their posts"""
+    prefix = 'tag' if sender is BlogTag else 'category'
+    tags = [f'{prefix}:{instance.pk}']
+    if sender is BlogTag:
+        tags.append(TAG_LIST)
+    if not created:
+        tags += [f'post:{pk}' for pk in instance.posts.values_list('pk', flat=True)]
+    purge_responses(tags)
+
+
+@receiver(post_save, sender=BlogComment)
+@receiver(post_delete, sender=BlogComment)
+def purge_comment_responses(sender, instance, **kwargs):
+    purge_responses([f'post:{instance.post_id}'])
@@ -0,0 +1,40 @@
+from celery import shared_task
+
+from .counters import BlogCounterService
+from .related import RelatedPostService
+from .models import MediaFile
+from .services import MediaProcessingService
+
+
+@shared_task
+def flush_blog_counters():
+    """Write buffered view/like counts to BlogPost and BlogAnalytics"""
+    return BlogCounterService.flush()
+
+
+@shared_task
+def update_related_posts(post_ids):
+    """Incrementally refresh the related-posts index after posts changed"""
+    if isinstance(post_ids, str):
+        post_ids = [post_ids]  # Messages queued before refreshes were batched
+    return RelatedPostService.update_posts(post_ids)
+
+
+@shared_task
+def refresh_related_lists(post_ids, removed_ids=()):
+    """Recompute the neighbour lists of specific posts after others were deleted"""
+    return RelatedPostService.refresh_lists(post_ids, removed_ids)
+
+
+@shared_task
+def rebuild_related_posts():
+    """Recompute every related-posts list (also refreshes IDF weights)"""
+    return RelatedPostService.rebuild_all()
+
+
+@shared_task
+def process_media_file(media_file_id):
+    """Render image variants/placeholders and AI metadata for an upload"""
+    media_file = MediaFile.objects.filter(pk=media_file_id).first()
+    if media_file is not None:
+        MediaProcessingService.process_media_file(media_file)
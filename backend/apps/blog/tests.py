@@ -0,0 +1,764 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+from django.contrib import admin
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import (
+    BlogPost, BlogTag, BlogCategory, BlogComment, BlogAnalytics, BlogAnalyticsRollup, BlogPostVersion,
+    MediaBlob, MediaFile, RelatedPost
+)
+from .search import BlogSearchService
+from .counters import BlogCounterService, LocalCounterBuffer
+from .seo import analyze_paragraph
+from .services import SEOAnalysisService, MediaProcessingService
+from .related import RelatedPostService
+from .categories import CategoryTreeService
+from .comments import CommentThreadService
+from .blobs import MediaBlobService
+from .scheduler import PublishScheduler, PublishSchedulerService
+from .versions import BlogPostVersionService
+from .response_cache import ResponseCacheService
+from .rollups import AnalyticsRollupService, plan_range
+from .serializers import BlogCategorySerializer, BlogCommentSerializer
+from .admin import BlogCommentAdmin
+
+User = get_user_model()
+
+
+class BlogTestMixin:
+    """Shared fixtures for blog tests"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='blogger',
+            email='blogger@example.com',
+            password='testpass123',
+            first_name='Blog',
+            last_name='Author'
+        )
+
+    def create_post(self, title, content='Some body text for the post.', **kwargs):
+        kwargs.setdefault('status', 'published')
+        kwargs.setdefault('published_at', timezone.now())
+        return BlogPost.objects.create(
+            title=title, content=content, author=self.user, **kwargs
+        )
+
+
+class BlogSearchServiceTests(BlogTestMixin, TestCase):
+    """Test cases for blog full-text search (portable fallback)"""
+
+    def test_title_matches_rank_above_content_matches(self):
+        """Title hits (weight A) outrank content-only hits (weight C)"""
+        body_hit = self.create_post('Introduction to sampling', content='<p>Regression basics.</p>')
+        title_hit = self.create_post('Regression analysis guide')
+
+        results = BlogSearchService.search('regression')
+
+        self.assertEqual(results['count'], 2)
+        self.assertEqual([post.pk for post in results['results']], [title_hit.pk, body_hit.pk])
+
+    def test_tag_names_are_searchable(self):
+        """Tag names are part of the indexed text"""
+        post = self.create_post('Structural equation modelling')
+        post.tags.add(BlogTag.objects.create(name='Statistics'))
+
+        results = BlogSearchService.search('statistics')
+
+        self.assertEqual([p.pk for p in results['results']], [post.pk])
+
+    def test_drafts_are_excluded(self):
+        """Only published posts are returned"""
+        self.create_post('Draft about regression', status='draft', published_at=None)
+
+        self.assertEqual(BlogSearchService.search('regression')['count'], 0)
+
+    def test_pagination_reuses_ranking(self):
+        """Later pages are served from the cached ranking"""
+        for index in range(5):
+            self.create_post(f'Regression lesson number {index}')
+
+        first = BlogSearchService.search('regression', page=1, page_size=2)
+        with self.assertNumQueries(3):  # page rows + categories + tags prefetch
+            second = BlogSearchService.search('regression', page=2, page_size=2)
+
+        self.assertEqual(first['count'], 5)
+        self.assertEqual(len(second['results']), 2)
+        self.assertFalse({p.pk for p in first['results']} & {p.pk for p in second['results']})
+
+    def test_unpaged_endpoint_returns_every_match(self):
+        """Without ?page the legacy list shape holds all matches, not the first page"""
+        for index in range(25):
+            self.create_post(f'Regression lesson number {index}')
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        response = client.get('/api/blog/api/posts/search/', {'q': 'regression'})
+
+        self.assertEqual(len(response.json()), 25)
+        paged = client.get('/api/blog/api/posts/search/', {'q': 'regression', 'page': 2}).json()
+        self.assertEqual((paged['count'], len(paged['results'])), (25, 5))
+
+    def test_headline_highlights_terms(self):
+        """Fallback headline wraps matches in <mark>"""
+        self.create_post('Survey design notes', content='<p>Good sampling matters.</p>')
+
+        post = BlogSearchService.search('sampling')['results'][0]
+
+        self.assertIn('<mark>sampling</mark>', post.headline)
+
+
+class BlogCounterServiceTests(BlogTestMixin, TestCase):
+    """Test cases for buffered view/like counters"""
+
+    def setUp(self):
+        super().setUp()
+        BlogCounterService._buffer = LocalCounterBuffer()
+        self.post = self.create_post('Counting views on a busy post')
+
+    def test_views_are_buffered_and_deduplicated(self):
+        """Repeat views by one visitor count once and do not touch the row"""
+        with self.assertNumQueries(0):
+            BlogCounterService.record_view(self.post, 'visitor-a')
+            counts = BlogCounterService.record_view(self.post, 'visitor-a')
+        counts = BlogCounterService.record_view(self.post, 'visitor-b')
+
+        self.assertEqual(counts['view_count'], 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 0)
+
+    def test_flush_writes_totals_and_daily_rows(self):
+        """Flushing applies deltas to BlogPost and today's BlogAnalytics"""
+        BlogCounterService.record_view(self.post, 'visitor-a')
+        BlogCounterService.record_view(self.post, 'visitor-b')
+        BlogCounterService.record_like(self.post, 'visitor-a')
+
+        BlogCounterService.flush()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 2)
+        self.assertEqual(self.post.like_count, 1)
+        daily = BlogAnalytics.objects.get(post=self.post, date=timezone.localdate())
+        self.assertEqual((daily.page_views, daily.unique_visitors, daily.likes), (2, 2, 1))
+        self.assertEqual(BlogCounterService.current_counts(self.post)['view_count'], 2)
+
+    def test_unlike_only_reverts_own_like(self):
+        """Unlike without a previous like is a no-op"""
+        BlogCounterService.record_like(self.post, 'visitor-a', liked=False)
+        BlogCounterService.record_like(self.post, 'visitor-a')
+        counts = BlogCounterService.record_like(self.post, 'visitor-a')
+
+        self.assertEqual(counts['like_count'], 1)
+
+    def test_like_state_survives_a_cache_flush(self):
+        """Likes are stored per visitor: re-liking after a flush does not count twice"""
+        BlogCounterService.record_like(self.post, 'visitor-a')
+        BlogCounterService.flush()
+        cache.clear()
+        BlogCounterService._buffer = LocalCounterBuffer()
+
+        BlogCounterService.record_like(self.post, 'visitor-a')
+        self.post.refresh_from_db()
+        self.assertEqual(BlogCounterService.current_counts(self.post)['like_count'], 1)
+
+        counts = BlogCounterService.record_like(self.post, 'visitor-a', liked=False)
+        self.assertEqual(counts['like_count'], 0)
+
+
+class SEOAnalysisServiceTests(TestCase):
+    """Test cases for the single-pass SEO analysis"""
+
+    CONTENT = (
+        '<h2>Regression basics</h2>\n\n'
+        '<p>Regression explains a variable. See <a href="/blog/">more</a> and '
+        '<a href="https://example.org">a source</a>.</p>\n\n'
+        '<p>An image <img src="/a.png"> and another <img src="/b.png" alt="B">.</p>'
+    )
+
+    def test_technical_metrics_collected_in_one_pass(self):
+        """Links, images and headings come from the tokenizer"""
+        result = SEOAnalysisService.analyze_content(self.CONTENT, focus_keyword='regression')
+
+        self.assertEqual(result['internal_links'], 1)
+        self.assertEqual(result['external_links'], 1)
+        self.assertEqual(result['images_without_alt'], 1)
+        self.assertEqual(result['heading_structure']['h2'], 1)
+        self.assertEqual(result['paragraph_count'], 3)
+        self.assertEqual(result['keyword_distribution']['headings'], 1)
+
+    def test_reanalysis_only_processes_changed_paragraphs(self):
+        """Unchanged paragraphs are served from the paragraph cache"""
+        analyze_paragraph.cache_clear()
+        SEOAnalysisService.analyze_content(self.CONTENT)
+        edited = self.CONTENT + '\n\n<p>A new closing paragraph.</p>'
+
+        SEOAnalysisService.analyze_content(edited)
+
+        info = analyze_paragraph.cache_info()
+        self.assertEqual(info.misses, 4)
+        self.assertEqual(info.hits, 3)
+
+
+class RelatedPostServiceTests(BlogTestMixin, TestCase):
+    """Test cases for the precomputed related-posts index"""
+
+    def setUp(self):
+        super().setUp()
+        self.stats = BlogTag.objects.create(name='Statistics')
+        self.survey = BlogTag.objects.create(name='Survey')
+        self.post = self.create_post('Regression analysis for survey data',
+                                     content='Regression models explain survey responses.')
+        self.close = self.create_post('Regression diagnostics explained',
+                                      content='Residuals of regression models.')
+        self.far = self.create_post('Writing a literature review',
+                                    content='Searching databases for references.')
+        for post in (self.post, self.close):
+            post.tags.add(self.stats, self.survey)
+        self.far.tags.add(self.survey)
+
+    def test_neighbours_are_ranked_by_relevance(self):
+        """Shared tags plus similar text rank first"""
+        RelatedPostService.rebuild_all()
+
+        related = RelatedPostService.get_related(self.post)
+
+        self.assertEqual([p.pk for p in related], [self.close.pk, self.far.pk])
+
+    def test_incremental_update_on_unpublish(self):
+        """Unpublishing a post removes it from other posts' lists"""
+        RelatedPostService.rebuild_all()
+        BlogPost.objects.filter(pk=self.close.pk).update(status='draft')
+
+        RelatedPostService.update_post(self.close.pk)
+
+        self.assertFalse(RelatedPost.objects.filter(related=self.close).exists())
+        self.assertEqual([p.pk for p in RelatedPostService.get_related(self.post)], [self.far.pk])
+
+    def test_incremental_update_reuses_cached_corpus(self):
+        """Only the changed post is re-read; the rest of the corpus comes from the cache"""
+        RelatedPostService.rebuild_all()
+        before = RelatedPost.objects.get(post=self.far, related=self.close).score
+        BlogPost.objects.filter(pk=self.far.pk).update(content='Residuals of regression models.')
+
+        with mock.patch.object(RelatedPostService, 'load_corpus', side_effect=AssertionError('full reload')):
+            RelatedPostService.update_post(self.far.pk)
+
+        self.assertGreater(RelatedPost.objects.get(post=self.far, related=self.close).score, before)
+
+    def test_only_published_changes_are_scheduled(self):
+        """Draft edits queue nothing; re-tagging from the tag side queues one batch"""
+        with mock.patch('apps.blog.tasks.update_related_posts.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                draft = self.create_post('Draft notes', status='draft')
+                draft.title = 'Draft notes, revised'
+                draft.save()
+            delay.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.stats.posts.add(self.far, draft)
+            delay.assert_called_once_with([str(self.far.pk)])
+
+
+class CategoryTreeServiceTests(TestCase):
+    """Test cases for the materialized category tree"""
+
+    def setUp(self):
+        cache.clear()
+        self.root = BlogCategory.objects.create(name='Research')
+        self.child = BlogCategory.objects.create(name='Methods', parent=self.root)
+        self.leaf = BlogCategory.objects.create(name='Sampling', parent=self.child)
+        self.other = BlogCategory.objects.create(name='Ethics')
+
+    def test_paths_follow_parents(self):
+        """Materialized path and depth are derived from the parent"""
+        self.assertEqual(self.leaf.depth, 2)
+        self.assertEqual(self.leaf.get_ancestor_ids(), [self.root.pk, self.child.pk])
+        self.assertEqual(self.leaf.get_hierarchy(), [self.root, self.child, self.leaf])
+
+    def test_moving_a_category_rewrites_the_subtree(self):
+        """Re-parenting updates descendant paths"""
+        self.child.parent = self.other
+        self.child.save()
+
+        self.leaf.refresh_from_db()
+        self.assertTrue(self.leaf.path.startswith(self.other.path))
+        self.assertEqual(list(self.root.get_descendants()), [])
+
+    def test_tree_is_built_with_one_query(self):
+        """The hierarchy is loaded in a single query and then cached"""
+        with self.assertNumQueries(1):
+            tree = CategoryTreeService.get_tree()
+        with self.assertNumQueries(0):
+            data = BlogCategorySerializer([self.root, self.other], many=True).data
+
+        self.assertEqual([node['name'] for node in tree], ['Ethics', 'Research'])
+        self.assertEqual(data[0]['children'][0]['children'][0]['name'], 'Sampling')
+        self.assertEqual([h['name'] for h in tree[1]['children'][0]['hierarchy']], ['Research', 'Methods'])
+
+
+class CommentThreadServiceTests(BlogTestMixin, TestCase):
+    """Test cases for the cached comment thread loader"""
+
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post('A post with a busy discussion')
+        self.threads = []
+        for index in range(3):
+            thread = BlogComment.objects.create(post=self.post, author=self.user, content=f'Thread {index}')
+            reply = BlogComment.objects.create(post=self.post, author=self.user, content='Reply', parent=thread)
+            BlogComment.objects.create(post=self.post, author=self.user, content='Nested', parent=reply)
+            self.threads.append(thread)
+        BlogComment.objects.create(
+            post=self.post, author=self.user, content='Spam', parent=self.threads[0],
+            is_approved=False, is_spam=True
+        )
+
+    def test_threads_are_built_with_one_query(self):
+        """All comments and authors are loaded at once; spam is hidden"""
+        with self.assertNumQueries(1):
+            threads = CommentThreadService.get_threads(self.post.pk)
+        with self.assertNumQueries(0):
+            BlogCommentSerializer(self.threads, many=True).data
+
+        self.assertEqual(len(threads), 3)
+        self.assertEqual(len(threads[0]['replies']), 1)
+        self.assertEqual(threads[0]['replies'][0]['replies'][0]['content'], 'Nested')
+
+    def test_cursor_pagination(self):
+        """Cursors walk top-level threads without overlap"""
+        first = CommentThreadService.get_page(self.post.pk, page_size=2)
+        second = CommentThreadService.get_page(self.post.pk, cursor=first['next_cursor'], page_size=2)
+
+        self.assertEqual([t['content'] for t in first['results']], ['Thread 0', 'Thread 1'])
+        self.assertEqual([t['content'] for t in second['results']], ['Thread 2'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_new_comment_invalidates_cache(self):
+        """Saving a comment refreshes the post's cached threads"""
+        CommentThreadService.get_threads(self.post.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogComment.objects.create(post=self.post, author=self.user, content='Thread 3')
+
+        self.assertEqual(len(CommentThreadService.get_threads(self.post.pk)), 4)
+
+
+class MediaProcessingServiceTests(BlogTestMixin, TestCase):
+    """Test cases for the image variant pipeline"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            MEDIA_IMAGE_WIDTHS=(320, 640),
+            MEDIA_IMAGE_FORMATS=('webp', 'jpeg'),
+            MEDIA_PROCESSING_WORKERS=1,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, image, name='photo.jpg'):
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=self.exif)
+        file = SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+        blob = MediaBlobService.store(file, mime_type='image/jpeg')
+        return MediaFile.objects.create(
+            filename=name, original_name=name, mime_type='image/jpeg', file_size=file.size,
+            storage_path=blob.storage_path, blob=blob, uploaded_by=self.user
+        )
+
+    @property
+    def exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotated 90 degrees: stored landscape, displayed portrait
+        return exif
+
+    def test_variants_respect_orientation(self):
+        """Dimensions are oriented and variants never upscale"""
+        media_file = self.upload(Image.new('RGB', (800, 400), (20, 120, 200)))
+
+        MediaProcessingService.optimize_image(media_file)
+
+        media_file.refresh_from_db()
+        self.assertEqual((media_file.width, media_file.height), (400, 800))
+        self.assertEqual(
+            sorted((v['width'], v['format']) for v in media_file.variants),
+            [(320, 'jpeg'), (320, 'webp'), (400, 'jpeg'), (400, 'webp')]
+        )
+        self.assertEqual(len(media_file.blurhash), 28)
+        self.assertTrue(media_file.lqip.startswith('data:image/webp;base64,'))
+
+    def test_reuploads_reuse_stored_variants(self):
+        """Identical bytes are stored once and not rendered again"""
+        image = Image.new('RGB', (700, 500), (200, 40, 40))
+        first = self.upload(image)
+        MediaProcessingService.optimize_image(first)
+        second = self.upload(image, name='copy.jpg')
+
+        with mock.patch('apps.blog.services.run_in_pool') as run_in_pool:
+            MediaProcessingService.optimize_image(second)
+
+        run_in_pool.assert_not_called()
+        second.refresh_from_db()
+        self.assertEqual(second.storage_path, first.storage_path)
+        self.assertEqual(second.variants, MediaFile.objects.get(pk=first.pk).variants)
+
+
+@override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+class MediaBlobServiceTests(BlogTestMixin, TestCase):
+    """Test cases for content-addressed media deduplication"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, content, name):
+        file = SimpleUploadedFile(name, content, content_type='application/pdf')
+        response = self.client.post('/api/blog/api/media/', {'file': file, 'original_name': name}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+    def test_identical_uploads_share_one_blob(self):
+        """Re-uploads are hashed on receipt and reference the same blob"""
+        self.upload(b'%PDF-1.4 figure', 'figure.pdf')
+        self.upload(b'%PDF-1.4 figure', 'figure-copy.pdf')
+        self.upload(b'%PDF-1.4 other', 'other.pdf')
+
+        blob = MediaBlob.objects.get(sha256=hashlib.sha256(b'%PDF-1.4 figure').hexdigest())
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(MediaBlob.objects.count(), 2)
+        report = MediaBlobService.savings_report()
+        self.assertEqual(report['saved_bytes'], len(b'%PDF-1.4 figure'))
+
+    def test_garbage_collection_removes_orphans_only(self):
+        """Blobs are collected once their last media file is deleted"""
+        self.upload(b'%PDF-1.4 figure', 'figure.pdf')
+        self.upload(b'%PDF-1.4 figure', 'figure-copy.pdf')
+        first, second = MediaFile.objects.all()
+
+        first.delete()
+        self.assertEqual(MediaBlobService.collect_garbage(grace_period=timedelta(0))['blobs'], 0)
+
+        second.delete()
+        blob = MediaBlob.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = MediaBlobService.collect_garbage(grace_period=timedelta(0))
+
+        self.assertEqual(result['blobs'], 1)
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, blob.storage_path)))
+
+
+class PublishSchedulerTests(BlogTestMixin, TestCase):
+    """Test cases for scheduled publishing"""
+
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.now()
+        self.due = self.create_post('Due post', status='scheduled', published_at=None,
+                                    scheduled_at=self.now - timedelta(minutes=1))
+        self.later = self.create_post('Later post', status='scheduled', published_at=None,
+                                      scheduled_at=self.now + timedelta(minutes=10))
+
+    def test_publish_due_only_publishes_due_posts(self):
+        """Due posts go live with their scheduled time as published_at"""
+        published = PublishSchedulerService.publish_due(self.now)
+
+        self.assertEqual(published, [str(self.due.pk)])
+        self.due.refresh_from_db()
+        self.assertEqual(self.due.status, 'published')
+        self.assertEqual(self.due.published_at, self.due.scheduled_at)
+        self.assertEqual(BlogPost.objects.get(pk=self.later.pk).status, 'scheduled')
+
+    def test_related_refresh_is_queued_after_commit(self):
+        """The corpus is not loaded while the claimed rows are locked"""
+        with mock.patch('apps.blog.tasks.update_related_posts.delay') as delay:
+            with self.captureOnCommitCallbacks() as callbacks:
+                PublishSchedulerService.publish_due(self.now)
+            delay.assert_not_called()
+            for callback in callbacks:
+                callback()
+            delay.assert_called_once_with([str(self.due.pk)])
+
+    def test_scheduler_sleeps_until_next_post(self):
+        """The loop wakes for the earliest entry and then waits for the next"""
+        clock = mock.Mock(return_value=self.now)
+        scheduler = PublishScheduler(clock=clock, poll_database=False)
+
+        self.assertEqual(scheduler.run_once(), 0)
+        self.assertEqual(BlogPost.objects.get(pk=self.due.pk).status, 'published')
+
+        with self.assertNumQueries(0):
+            wait = scheduler.run_once()
+        self.assertEqual(wait, PublishScheduler.CHECK_INTERVAL)
+
+        clock.return_value = self.now + timedelta(minutes=10)
+        scheduler.run_once()
+        self.assertEqual(BlogPost.objects.get(pk=self.later.pk).status, 'published')
+
+    def test_local_cache_scheduler_sees_posts_scheduled_elsewhere(self):
+        """Without a shared cache the loop finds new earlier posts in the database"""
+        clock = mock.Mock(return_value=self.now)
+        scheduler = PublishScheduler(clock=clock)
+        self.assertTrue(scheduler.poll_database)  # Tests run on LocMemCache
+        scheduler.run_once()
+
+        # Scheduled by another process: its notify() never reaches this one
+        with mock.patch.object(PublishSchedulerService, 'notify'):
+            sooner = self.create_post('Sooner post', status='scheduled', published_at=None,
+                                      scheduled_at=self.now + timedelta(minutes=2))
+        clock.return_value = self.now + timedelta(minutes=1)
+        self.assertEqual(scheduler.run_once(), PublishScheduler.CHECK_INTERVAL)
+
+        clock.return_value = self.now + timedelta(minutes=2)
+        self.assertEqual(scheduler.run_once(), 0)
+        self.assertEqual(BlogPost.objects.get(pk=sooner.pk).status, 'published')
+
+
+class BlogPostVersionServiceTests(BlogTestMixin, TestCase):
+    """Test cases for delta-compressed version history"""
+
+    def setUp(self):
+        super().setUp()
+        self.paragraph = ' '.join(f'word{index}' for index in range(200))
+        self.post = self.create_post('Versioned post', content=self.paragraph, excerpt='Short excerpt')
+
+    def edit(self, count):
+        for index in range(count):
+            self.post.content = f'{self.paragraph} edit {index}'
+            self.post.save()
+            BlogPostVersionService.record(self.post, self.user)
+
+    def test_versions_between_snapshots_store_deltas(self):
+        """Only every SNAPSHOT_INTERVAL-th version stores full content"""
+        self.edit(BlogPostVersionService.SNAPSHOT_INTERVAL + 1)
+
+        snapshots = BlogPostVersion.objects.filter(post=self.post, is_snapshot=True).order_by('version_number')
+        self.assertEqual(list(snapshots.values_list('version_number', flat=True)), [1, 21])
+        self.assertEqual(BlogPostVersion.objects.get(post=self.post, version_number=2).content, '')
+
+    def test_any_version_can_be_reconstructed(self):
+        """Snapshot plus deltas rebuild the exact text in one query"""
+        self.edit(5)
+        cache.clear()
+
+        with self.assertNumQueries(2):  # snapshot lookup + chain
+            texts = BlogPostVersionService.get_texts(self.post.pk, 4)
+        with self.assertNumQueries(0):
+            BlogPostVersionService.get_texts(self.post.pk, 3)
+
+        self.assertEqual(texts, {'content': f'{self.paragraph} edit 3', 'excerpt': 'Short excerpt'})
+
+    def test_compaction_keeps_content(self):
+        """Existing full-copy history is rewritten without changing any version"""
+        for index in range(4):
+            BlogPostVersion.objects.create(
+                post=self.post, version_number=index + 1, title='Versioned post', changed_by=self.user,
+                content=f'{self.paragraph} edit {index}', excerpt='Short excerpt'
+            )
+
+        result = BlogPostVersionService.compact(self.post.pk)
+
+        self.assertLess(result['after'], result['before'] / 2)
+        self.assertEqual(BlogPostVersion.objects.filter(post=self.post, is_snapshot=True).count(), 1)
+        self.assertEqual(BlogPostVersionService.get_texts(self.post.pk, 4)['content'], f'{self.paragraph} edit 3')
+
+    def test_non_string_change_summary_is_accepted(self):
+        """A numeric or null change_summary is stored as text, not a server error"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/blog/api/posts/{self.post.pk}/'
+        with mock.patch('apps.blog.tasks.update_related_posts.delay'):
+            response = client.patch(url, {'content': 'First rewrite', 'change_summary': 42}, format='json')
+            self.assertEqual(response.status_code, 200)
+            response = client.patch(url, {'content': 'Second rewrite', 'change_summary': None}, format='json')
+            self.assertEqual(response.status_code, 200)
+
+        summaries = BlogPostVersion.objects.filter(post=self.post).order_by('version_number')
+        self.assertEqual(list(summaries.values_list('change_summary', flat=True)), ['42', ''])
+
+
+class ResponseCacheTests(BlogTestMixin, TestCase):
+    """Test cases for the public response cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        # Related-post refreshes are queued on commit; keep them off the broker
+        patcher = mock.patch('apps.blog.tasks.update_related_posts.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.post = self.create_post('Cached post')
+
+    def test_detail_is_served_from_cache_until_post_changes(self):
+        """Repeat reads hit the cache; editing the post makes the entry stale"""
+        url = f'/api/blog/api/public/posts/{self.post.pk}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Renamed post'
+            self.post.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed post')
+
+    def test_stale_entry_is_served_while_another_request_refreshes(self):
+        """Only the request holding the refresh lock recomputes"""
+        url = '/api/blog/api/public/posts/'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_post('Another post')
+
+        with mock.patch.object(cache, 'add', return_value=False):
+            stale = self.client.get(url)
+        self.assertEqual(stale['X-Cache'], 'STALE')
+        self.assertEqual(len(stale.data), 1)
+
+        fresh = self.client.get(url)
+        self.assertEqual(fresh['X-Cache'], 'MISS')
+        self.assertEqual(len(fresh.data), 2)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    def test_concurrent_miss_waits_for_the_entry(self):
+        """A cold miss while another request holds the lock is served what that request stores"""
+        url = f'/api/blog/api/public/posts/{self.post.pk}/'
+        key = ResponseCacheService.key_for(RequestFactory().get(url))
+        cache.add(f'{key}:lock', 1, ResponseCacheService.LOCK_TIMEOUT)
+
+        def other_request_stores(_):
+            ResponseCacheService.set(key, {'id': str(self.post.pk), 'title': 'Stored'}, [f'post:{self.post.pk}'])
+
+        with mock.patch('apps.blog.response_cache.time.sleep', side_effect=other_request_stores):
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['title'], 'Stored')
+
+    def test_counter_flush_purges_cached_posts(self):
+        """Flushed view counts are not hidden behind cached responses"""
+        BlogCounterService._buffer = LocalCounterBuffer()
+        url = f'/api/blog/api/public/posts/{self.post.pk}/'
+        self.client.get(url)
+
+        BlogCounterService.record_view(self.post, 'visitor-a')
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogCounterService.flush()
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['view_count'], 1)
+
+    def test_moderation_actions_purge_cached_posts(self):
+        """Comments marked as spam in the admin leave the cached detail at once"""
+        comment = BlogComment.objects.create(post=self.post, author=self.user, content='Buy now',
+                                             is_approved=True)
+        url = f'/api/blog/api/public/posts/{self.post.pk}/'
+        self.assertEqual(len(self.client.get(url).data['comments']), 1)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        model_admin = BlogCommentAdmin(BlogComment, admin.site)
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.mark_as_spam(RequestFactory().post('/admin/'), BlogComment.objects.filter(pk=comment.pk))
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['comments'], [])
+
+    def test_publishing_scheduled_post_purges_lists_and_reports_hit_ratio(self):
+        """Scheduler publishes bypass signals but still purge the lists"""
+        url = '/api/blog/api/public/posts/'
+        self.create_post('Scheduled', status='scheduled', published_at=None,
+                         scheduled_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(len(self.client.get(url).data), 1)
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PublishSchedulerService.publish_due()
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+        stats = ResponseCacheService.stats()
+        self.assertEqual((stats['hit'], stats['miss']), (1, 2))
+        self.assertEqual(stats['hit_ratio'], round(1 / 3, 4))
+
+
+class AnalyticsRollupServiceTests(BlogTestMixin, TestCase):
+    """Test cases for weekly/monthly analytics rollups"""
+
+    def setUp(self):
+        super().setUp()
+        self.news = BlogCategory.objects.create(name='News', slug='news')
+        self.guides = BlogCategory.objects.create(name='Guides', slug='guides')
+        self.first = self.create_post('First')
+        self.second = self.create_post('Second')
+        self.first.categories.add(self.news, self.guides)
+        self.second.categories.add(self.news)
+
+        rows = []
+        day = date(2024, 1, 1)
+        while day <= date(2024, 3, 31):
+            rows.append(BlogAnalytics(post=self.first, date=day, page_views=day.day, bounce_rate=50))
+            rows.append(BlogAnalytics(post=self.second, date=day, page_views=2, bounce_rate=20))
+            day += timedelta(days=1)
+        BlogAnalytics.objects.bulk_create(rows)
+        AnalyticsRollupService.rebuild()
+
+    def test_plan_prefers_whole_months_then_weeks(self):
+        """A week that would cut into a whole month is split into days"""
+        plan = plan_range(date(2024, 1, 29), date(2024, 3, 10))
+        self.assertEqual(plan['month'], [date(2024, 2, 1)])
+        self.assertEqual(plan['week'], [date(2024, 3, 4)])
+        self.assertEqual(plan['day'], [date(2024, 1, d) for d in (29, 30, 31)] + [date(2024, 3, d) for d in (1, 2, 3)])
+
+    def test_range_totals_match_daily_rows(self):
+        """Post, category and site totals equal the raw daily sums"""
+        start, end = date(2024, 1, 10), date(2024, 3, 20)
+        daily = BlogAnalytics.objects.filter(date__range=(start, end))
+
+        with self.assertNumQueries(2):
+            site = AnalyticsRollupService.totals(start, end)
+        self.assertEqual(site['page_views'], sum(daily.values_list('page_views', flat=True)))
+
+        first_views = sum(daily.filter(post=self.first).values_list('page_views', flat=True))
+        self.assertEqual(AnalyticsRollupService.totals(start, end, post=self.first)['page_views'], first_views)
+        self.assertEqual(AnalyticsRollupService.totals(start, end, category=self.guides)['page_views'], first_views)
+        self.assertEqual(AnalyticsRollupService.totals(start, end, category=self.news)['page_views'], site['page_views'])
+
+        # Bounce rate is weighted by page views
+        second_views = site['page_views'] - first_views
+        expected = (50 * first_views + 20 * second_views) / site['page_views']
+        self.assertEqual(site['bounce_rate'], round(expected, 2))
+
+    def test_refresh_updates_touched_buckets_and_top_posts(self):
+        """Flushing new daily data only recomputes its week and month"""
+        BlogAnalytics.objects.filter(post=self.second, date=date(2024, 2, 14)).update(page_views=1000)
+        self.assertEqual(AnalyticsRollupService.refresh([(self.second.pk, '2024-02-14')]), 2)
+
+        month = BlogAnalyticsRollup.objects.get(scope='site', period='month', period_start=date(2024, 2, 1))
+        self.assertEqual(month.page_views, sum(range(1, 30)) + 2 * 28 + 1000)
+
+        top = AnalyticsRollupService.top_posts('page_views', date(2024, 2, 1), date(2024, 2, 29))
+        self.assertEqual([entry['title'] for entry in top], ['Second', 'First'])
+        with self.assertRaises(ValueError):
+            AnalyticsRollupService.top_posts('bounce_rate', date(2024, 2, 1), date(2024, 2, 29))
@@ -0,0 +1,211 @@
+"""
+Delta-compressed post version history
+
+Full snapshots at intervals with word-level deltas in between, rebuilt from
+the nearest snapshot in one query.
+"""
+import json
+import re
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Union
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .models import BlogPost, BlogPostVersion
+
+TOKEN_RE = re.compile(r'\S+\s*|\s+')
+
+Delta = List[Union[int, str]]
+
+VERSIONED_FIELDS = ('content', 'excerpt')
+HEAVY_FIELDS = ('content', 'excerpt', 'delta')
+
+
+def tokenize(text: str) -> List[str]:
+    """Words with their trailing whitespace; ''.join(tokens) == text"""
+    return TOKEN_RE.findall(text)
+
+
+def diff(old: str, new: str) -> Delta:
+    a, b = tokenize(old), tokenize(new)
+
+    # Most edits are local: match the common prefix/suffix directly
+    prefix = 0
+    limit = min(len(a), len(b))
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+
+    ops = [prefix] if prefix else []
+    middle_a, middle_b = a[prefix:len(a) - suffix], b[prefix:len(b) - suffix]
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, middle_a, middle_b).get_opcodes():
+        if tag == 'equal':
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(''.join(middle_b[j1:j2]))
+    if suffix:
+        ops.append(suffix)
+    return ops
+
+
+def patch(old: str, ops: Delta) -> str:
+    tokens = tokenize(old)
+    out = []
+    position = 0
+    for op in ops:
+        if isinstance(op, str):
+            out.append(op)
+        elif op >= 0:
+            out.extend(tokens[position:position + op])
+            position += op
+        else:
+            position -= op
+    return ''.join(out)
+
+
+class BlogPostVersionService:
+    """Service for recording and reconstructing post versions"""
+
+    SNAPSHOT_INTERVAL = 20
+    MAX_DELTA_RATIO = 0.5  # Store a snapshot when the delta is not much smaller
+    CACHE_PREFIX = 'blog:post-version:'
+    CACHE_TIMEOUT = 24 * 60 * 60
+
+    @classmethod
+    def cache_key(cls, post_id, version_number: int) -> str:
+        return f'{cls.CACHE_PREFIX}{post_id}:{version_number}'
+
+    @classmethod
+    def list_versions(cls, post):
+        """Version metadata only; content, excerpt and deltas are not loaded"""
+        return (
+            BlogPostVersion.objects.filter(post=post)
+            .defer(*HEAVY_FIELDS)
+            .select_related('changed_by')
+            .order_by('-version_number')
+        )
+
+    @classmethod
+    def make_delta(cls, previous: Dict[str, str], texts: Dict[str, str]) -> Optional[Dict[str, Delta]]:
+        """Delta between two versions, or None if a snapshot is cheaper"""
+        delta = {field: diff(previous[field], texts[field]) for field in VERSIONED_FIELDS}
+        full_size = sum(len(texts[field]) for field in VERSIONED_FIELDS)
+        if len(json.dumps(delta)) > full_size * cls.MAX_DELTA_RATIO:
+            return None
+        return delta
+
+    @classmethod
+    def record(cls, post: BlogPost, user, change_summary: str = '') -> BlogPostVersion:
+        """Store the post's current title/content/excerpt as a new version"""
+        texts = {'content': post.content or '', 'excerpt': post.excerpt or ''}
+
+        with transaction.atomic():
+            # Serialize version numbering per post
+            BlogPost.objects.select_for_update().filter(pk=post.pk).exists()
+            stats = BlogPostVersion.objects.filter(post=post).aggregate(
+                latest=Max('version_number'), snapshot=Max('version_number', filter=Q(is_snapshot=True))
+            )
+            latest, snapshot = stats['latest'], stats['snapshot']
+            number = (latest or 0) + 1
+
+            version = BlogPostVersion(
+                post=post, version_number=number, title=post.title, changed_by=user,
+                change_summary=change_summary, content_length=len(texts['content']),
+            )
+            delta = None
+            if latest is not None and snapshot is not None and number - snapshot < cls.SNAPSHOT_INTERVAL:
+                delta = cls.make_delta(cls.get_texts(post.pk, latest), texts)
+            if delta is None:
+                version.content, version.excerpt = texts['content'], texts['excerpt']
+            else:
+                version.is_snapshot, version.delta = False, delta
+            version.save()
+
+            key = cls.cache_key(post.pk, number)
+            transaction.on_commit(lambda: cache.set(key, texts, cls.CACHE_TIMEOUT))
+        return version
+
+    @classmethod
+    def get_texts(cls, post_id, version_number: int) -> Dict[str, str]:
+        """Reconstructed content/excerpt of one version"""
+        texts = cache.get(cls.cache_key(post_id, version_number))
+        if texts is not None:
+            return texts
+
+        versions = BlogPostVersion.objects.filter(post_id=post_id)
+        snapshot = versions.filter(
+            version_number__lte=version_number, is_snapshot=True
+        ).aggregate(number=Max('version_number'))['number']
+        if snapshot is None:
+            raise BlogPostVersion.DoesNotExist(f'No snapshot for version {version_number}')
+
+        # Snapshot plus the deltas after it, in one query
+        chain = versions.filter(
+            version_number__gte=snapshot, version_number__lte=version_number
+        ).only('version_number', 'is_snapshot', *HEAVY_FIELDS).order_by('version_number')
+
+        rebuilt = {}
+        for version in chain:
+            if version.is_snapshot:
+                texts = {'content': version.content, 'excerpt': version.excerpt}
+            else:
+                texts = {field: patch(texts[field], version.delta[field]) for field in VERSIONED_FIELDS}
+            rebuilt[cls.cache_key(post_id, version.version_number)] = texts
+        if version.version_number != version_number:
+            raise BlogPostVersion.DoesNotExist(f'Version {version_number} does not exist')
+
+        cache.set_many(rebuilt, cls.CACHE_TIMEOUT)
+        return texts
+
+    @classmethod
+    def compact(cls, post_id, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Rewrite a post's history into snapshots plus deltas.
+
+        Returns stored sizes (characters of content/excerpt/delta) before and
+        after compaction.
+        """
+        versions = list(BlogPostVersion.objects.filter(post_id=post_id).order_by('version_number'))
+        before = sum(cls._stored_size(version) for version in versions)
+
+        previous = None
+        last_snapshot = None
+        for version in versions:
+            if version.is_snapshot:
+                texts = {'content': version.content, 'excerpt': version.excerpt}
+            else:
+                texts = {field: patch(previous[field], version.delta[field]) for field in VERSIONED_FIELDS}
+
+            delta = None
+            if previous is not None and version.version_number - last_snapshot < cls.SNAPSHOT_INTERVAL:
+                delta = cls.make_delta(previous, texts)
+            if delta is None:
+                version.is_snapshot, version.delta = True, None
+                version.content, version.excerpt = texts['content'], texts['excerpt']
+                last_snapshot = version.version_number
+            else:
+                version.is_snapshot, version.delta = False, delta
+                version.content = version.excerpt = ''
+            version.content_length = len(texts['content'])
+            previous = texts
+
+        after = sum(cls._stored_size(version) for version in versions)
+        if not dry_run and versions:
+            with transaction.atomic():
+                BlogPostVersion.objects.bulk_update(
+                    versions, ['is_snapshot', 'delta', 'content', 'excerpt', 'content_length'], batch_size=200
+                )
+            cache.delete_many([cls.cache_key(post_id, version.version_number) for version in versions])
+        return {'versions': len(versions), 'before': before, 'after': after}
+
+    @staticmethod
+    def _stored_size(version: BlogPostVersion) -> int:
+        delta_size = len(json.dumps(version.delta)) if version.delta else 0
+        return len(version.content) + len(version.excerpt) + delta_size
@@ -1,22 +1,39 @@
+import uuid
+from datetime import timedelta
+
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q, F
+from rest_framework.utils.urls import replace_query_param
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from .models import (
     BlogPost, BlogCategory, BlogTag, MediaFile, MediaFolder, MediaTag,
-    SEOAnalysis, BlogAnalytics, BlogComment
+    SEOAnalysis, BlogAnalytics, BlogComment, BlogPostVersion
 )
 from .serializers import (
     BlogPostListSerializer, BlogPostDetailSerializer, BlogPostCreateUpdateSerializer,
     BlogCategorySerializer, BlogTagSerializer, MediaFileSerializer, MediaFileUploadSerializer,
     SEOAnalysisSerializer, SEOAnalysisCreateSerializer, BlogAnalyticsSerializer,
-    BlogCommentSerializer, BlogPostSearchSerializer
+    BlogCommentSerializer, BlogPostSearchSerializer, BlogPostVersionSerializer,
+    BlogPostVersionListSerializer
 )
 from .services import SEOAnalysisService, MediaProcessingService
+from .search import BlogSearchService
+from .counters import BlogCounterService
+from .related import RelatedPostService
+from .categories import CategoryTreeService
+from .comments import CommentThreadService
+from .blobs import hashing_upload_handlers
+from .versions import BlogPostVersionService
+from .rollups import AnalyticsRollupService
+from .response_cache import PUBLISHED_POSTS, TAG_LIST, cache_public_response
+from .tasks import process_media_file
 from .filters import BlogPostFilter
 from .permissions import BlogPostPermission
 
@@ -44,12 +61,11 @@ class BlogCategoryViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def hierarchy(self, request):
-        """Get category hierarchy"""
-        categories = self.get_queryset().filter(parent__isnull=True)
-        serializer = self.get_serializer(categories, many=True)
-        return Response(serializer.data)
+        """Get category hierarchy (whole tree, served from cache)"""
+        return Response(CategoryTreeService.get_tree())
     
     @action(detail=True, methods=['get'])
+    @cache_public_response(tags=['category:{pk}'], item_tag='post')
     def posts(self, request, pk=None):
         """Get posts in this category"""
         category = self.get_object()
@@ -69,6 +85,7 @@ class BlogTagViewSet(viewsets.ModelViewSet):
     ordering = ['name']
     
     @action(detail=False, methods=['get'])
+    @cache_public_response(tags=[TAG_LIST])
     def popular(self, request):
         """Get popular tags"""
         tags = self.get_queryset().filter(post_count__gt=0).order_by('-post_count')[:20]
@@ -76,6 +93,7 @@ class BlogTagViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
+    @cache_public_response(tags=['tag:{pk}'], item_tag='post')
     def posts(self, request, pk=None):
         """Get posts with this tag"""
         tag = self.get_object()
@@ -94,6 +112,11 @@ class MediaFileViewSet(viewsets.ModelViewSet):
     ordering_fields = ['original_name', 'file_size', 'created_at']
     ordering = ['-created_at']
     
+    def initialize_request(self, request, *args, **kwargs):
+        # Hash uploads while they are received (content-addressed storage)
+        request.upload_handlers = hashing_upload_handlers(request)
+        return super().initialize_request(request, *args, **kwargs)
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return MediaFileUploadSerializer
@@ -103,8 +126,8 @@ class MediaFileViewSet(viewsets.ModelViewSet):
         serializer.save(uploaded_by=self.request.user)
         
         # Process media file asynchronously
-        media_file = serializer.instance
-        MediaProcessingService.process_media_file(media_file)
+        media_file_id = str(serializer.instance.pk)
+        transaction.on_commit(lambda: process_media_file.delay(media_file_id))
     
     @action(detail=False, methods=['get'])
     def images(self, request):
@@ -151,7 +174,10 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         
         # Filter by status for non-authors
-        if not self.request.user.is_staff:
+        if not self.request.user.is_authenticated:
+            if self.action in ('list', 'retrieve'):
+                queryset = queryset.filter(status='published')
+        elif not self.request.user.is_staff:
             if self.action == 'list':
                 queryset = queryset.filter(
                     Q(status='published') | Q(author=self.request.user)
@@ -168,9 +194,22 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         )
     
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        BlogPostVersionService.record(post, self.request.user, 'Created')
+    
+    def perform_update(self, serializer):
+        previous = (serializer.instance.title, serializer.instance.content, serializer.instance.excerpt)
+        post = serializer.save()
+        if (post.title, post.content, post.excerpt) != previous:
+            summary = self.request.data.get('change_summary') or ''
+            BlogPostVersionService.record(post, self.request.user, str(summary)[:255])
+    
+    @cache_public_response(tags=['post:{pk}'])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
+    @cache_public_response(tags=[PUBLISHED_POSTS], item_tag='post')
     def published(self, request):
         """Get published posts"""
         posts = self.get_queryset().filter(
@@ -220,8 +259,17 @@ class BlogPostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        parsed = parse_datetime(str(scheduled_at))
+        if parsed is None:
+            return Response(
+                {'error': 'scheduled_at must be an ISO 8601 datetime'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        
         post.status = 'scheduled'
-        post.scheduled_at = scheduled_at
+        post.scheduled_at = parsed
         post.save()
         
         serializer = self.get_serializer(post)
@@ -237,21 +285,60 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         serializer = SEOAnalysisSerializer(analysis)
         return Response(serializer.data)
     
+    def _analytics_range(self, request):
+        """(start, end) from ?start=&end= (ISO dates), defaulting to the last 30 days"""
+        end = parse_date(request.query_params.get('end', '')) or timezone.localdate()
+        start = parse_date(request.query_params.get('start', '')) or end - timedelta(days=29)
+        if start > end:
+            raise ValueError('start must not be after end')
+        return start, end
+    
     @action(detail=True, methods=['get'])
     def analytics(self, request, pk=None):
-        """Get analytics for a post"""
+        """Get analytics for a post (daily rows, or range totals with ?start=&end=)"""
         post = self.get_object()
-        analytics = BlogAnalytics.objects.filter(post=post).order_by('-date')[:30]
-        serializer = BlogAnalyticsSerializer(analytics, many=True)
-        return Response(serializer.data)
+        if 'start' not in request.query_params and 'end' not in request.query_params:
+            analytics = BlogAnalytics.objects.filter(post=post).order_by('-date')[:30]
+            serializer = BlogAnalyticsSerializer(analytics, many=True)
+            return Response(serializer.data)
+        
+        try:
+            start, end = self._analytics_range(request)
+            period = request.query_params.get('period', 'week')
+            return Response({
+                'start': start,
+                'end': end,
+                'totals': AnalyticsRollupService.totals(start, end, post=post),
+                'series': AnalyticsRollupService.series(start, end, period, post=post),
+            })
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def analytics_overview(self, request):
+        """Site-wide (or ?category=) totals and top posts by ?metric= for a date range"""
+        category = request.query_params.get('category') or None
+        metric = request.query_params.get('metric', 'page_views')
+        try:
+            if category is not None:
+                category = uuid.UUID(category)
+            start, end = self._analytics_range(request)
+            limit = min(int(request.query_params.get('limit', 10)), 100)
+            return Response({
+                'start': start,
+                'end': end,
+                'totals': AnalyticsRollupService.totals(start, end, category=category),
+                'top_posts': AnalyticsRollupService.top_posts(metric, start, end, limit, category=category),
+            })
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
     def increment_view(self, request, pk=None):
-        """Increment view count"""
+        """Increment view count (buffered, deduplicated per visitor)"""
         post = self.get_object()
-        post.view_count = F('view_count') + 1
-        post.save(update_fields=['view_count'])
-        return Response({'view_count': post.view_count})
+        counts = BlogCounterService.record_view(post, BlogCounterService.visitor_id(request))
+        return Response({'view_count': counts['view_count']})
     
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
@@ -259,46 +346,67 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         post = self.get_object()
         action_type = request.data.get('action', 'like')
         
-        if action_type == 'like':
-            post.like_count = F('like_count') + 1
-        else:
-            post.like_count = F('like_count') - 1
-        
-        post.save(update_fields=['like_count'])
-        return Response({'like_count': post.like_count})
+        counts = BlogCounterService.record_like(
+            post, BlogCounterService.visitor_id(request), liked=(action_type == 'like')
+        )
+        return Response({'like_count': counts['like_count']})
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Advanced search for posts"""
+        """Full-text search over published posts, ranked by relevance"""
         query = request.query_params.get('q', '')
         
         if not query:
             return Response([])
         
-        posts = self.get_queryset().filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(excerpt__icontains=query) |
-            Q(tags__name__icontains=query) |
-            Q(categories__name__icontains=query)
-        ).distinct()
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            page_size = min(100, max(1, int(request.query_params.get('page_size', 20))))
+        except ValueError:
+            return Response(
+                {'error': 'page and page_size must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        serializer = BlogPostSearchSerializer(posts, many=True)
-        return Response(serializer.data)
+        # Keep the plain list of every match unless the client asks for a page
+        if 'page' not in request.query_params:
+            results = BlogSearchService.search(query, page_size=None)
+            return Response(BlogPostSearchSerializer(results['results'], many=True).data)
+        
+        results = BlogSearchService.search(query, page=page, page_size=page_size)
+        serializer = BlogPostSearchSerializer(results['results'], many=True)
+        
+        return Response({
+            'count': results['count'],
+            'page': page,
+            'page_size': page_size,
+            'results': serializer.data
+        })
     
     @action(detail=True, methods=['get'])
     def related(self, request, pk=None):
-        """Get related posts"""
+        """Get related posts, ranked by precomputed relevance"""
         post = self.get_object()
-        
-        # Find posts with similar tags or categories
-        related_posts = BlogPost.objects.filter(
-            Q(tags__in=post.tags.all()) | Q(categories__in=post.categories.all()),
-            status='published'
-        ).exclude(id=post.id).distinct()[:5]
-        
+        related_posts = RelatedPostService.get_related(post, limit=5)
         serializer = BlogPostListSerializer(related_posts, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def versions(self, request, pk=None):
+        """List version metadata (without content)"""
+        post = self.get_object()
+        serializer = BlogPostVersionListSerializer(BlogPostVersionService.list_versions(post), many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path=r'versions/(?P<version_number>\d+)')
+    def version(self, request, pk=None, version_number=None):
+        """Get one version with its reconstructed content"""
+        post = self.get_object()
+        try:
+            version = BlogPostVersionService.list_versions(post).get(version_number=version_number)
+        except BlogPostVersion.DoesNotExist:
+            return Response({'error': 'Version not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(BlogPostVersionSerializer(version).data)
 
 
 class SEOAnalysisViewSet(viewsets.ModelViewSet):
@@ -337,7 +445,31 @@ class BlogCommentViewSet(viewsets.ModelViewSet):
         post_id = self.request.query_params.get('post')
         if post_id:
             return super().get_queryset().filter(post_id=post_id, parent__isnull=True)
-        return super().get_queryset()
+        return super().get_queryset().select_related('author')
+    
+    def list(self, request, *args, **kwargs):
+        """Threads of one post are served from the cached thread tree"""
+        post_id = request.query_params.get('post')
+        if not post_id:
+            return super().list(request, *args, **kwargs)
+        
+        try:
+            uuid.UUID(str(post_id))
+            page_size = int(request.query_params.get('page_size', CommentThreadService.PAGE_SIZE))
+            page = CommentThreadService.get_page(
+                post_id, cursor=request.query_params.get('cursor'), page_size=page_size
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Invalid post, cursor or page_size'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        next_cursor = page.pop('next_cursor')
+        page['next'] = replace_query_param(
+            request.build_absolute_uri(), 'cursor', next_cursor
+        ) if next_cursor else None
+        return Response(page)
     
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
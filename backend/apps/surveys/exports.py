@@ -0,0 +1,70 @@
+"""
+Campaign response exports (see ``apps.admin_management.exports``).
+"""
+import json
+
+from apps.admin_management.exports import TableExport
+
+from .models import CampaignParticipant, SurveyCampaign
+
+PARTICIPANT_HEADER = ['Participant ID', 'Email', 'Status', 'Joined At', 'Started At', 'Completed At']
+PARTICIPANT_FIELDS = [
+    'participant_id', 'participant__email', 'status', 'joined_at', 'started_at', 'completed_at',
+    'survey_responses',
+]
+
+
+def question_ids(campaign: SurveyCampaign, participants) -> list:
+    """Question ids from the survey config, else every key found in the responses"""
+    configured = [
+        str(question['id'])
+        for section in campaign.survey_config.get('sections', [])
+        for question in section.get('questions', [])
+        if question.get('id') is not None
+    ]
+    if configured:
+        return configured
+
+    found = {}
+    for responses in participants.values_list('survey_responses', flat=True).iterator(chunk_size=2000):
+        for key in responses or {}:
+            found.setdefault(str(key), None)
+    return list(found)
+
+
+def _answer(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def campaign_responses_export(campaign_id, status=None) -> TableExport:
+    """One row per participant, one column per question"""
+    campaign = SurveyCampaign.objects.get(pk=campaign_id)
+    participants = CampaignParticipant.objects.filter(campaign=campaign)
+    if status:
+        participants = participants.filter(status=status)
+    questions = question_ids(campaign, participants)
+
+    def format_row(values):
+        participant_id, email, state, joined_at, started_at, completed_at, responses = values
+        responses = responses or {}
+        return [
+            str(participant_id),
+            email,
+            state,
+            joined_at.isoformat(),
+            started_at.isoformat() if started_at else '',
+            completed_at.isoformat() if completed_at else '',
+        ] + [_answer(responses.get(question)) for question in questions]
+
+    return TableExport(
+        PARTICIPANT_HEADER + [f'q_{question}' for question in questions],
+        queryset=participants.order_by(),
+        fields=PARTICIPANT_FIELDS,
+        format_row=format_row,
+    )
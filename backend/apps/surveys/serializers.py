@@ -132,6 +132,8 @@ class CampaignStatsSerializer(serializers.Serializer):
     total_rewards_distributed = serializers.DecimalField(max_digits=12, decimal_places=2)
     total_admin_fees = serializers.DecimalField(max_digits=12, decimal_places=2)
     average_completion_rate = serializers.FloatField()
+    computed_at = serializers.DateTimeField(required=False)
+    age_seconds = serializers.FloatField(required=False)
 
 
 class RevenueCalculationSerializer(serializers.Serializer):
@@ -1,9 +1,12 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Avg, Count
+from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from decimal import Decimal
+from apps.admin_management.dashboard import DashboardMetricsService, campaign_overview
+from apps.admin_management.exports import streaming_csv_response
+from .exports import campaign_responses_export
 from .models import SurveyCampaign, CampaignParticipant, CampaignReward, AdminFeeConfiguration
 from .serializers import (
     SurveyCampaignSerializer, SurveyCampaignCreateSerializer,
@@ -143,6 +146,18 @@ class SurveyCampaignViewSet(viewsets.ModelViewSet):
         
         return Response(stats)
     
+    @action(detail=True, methods=['get'])
+    def export_responses(self, request, pk=None):
+        """Stream participant responses as CSV (?participant_status=, ?gzip=1)"""
+        campaign = self.get_object()
+        export = campaign_responses_export(
+            campaign.pk, status=request.query_params.get('participant_status')
+        )
+        return streaming_csv_response(
+            export, f'campaign_{campaign.pk}_responses.csv',
+            compress=request.query_params.get('gzip') in ('1', 'true')
+        )
+    
     def _process_campaign_rewards(self, campaign):
         """Process rewards for completed campaign participants"""
         completed_participants = campaign.participants.filter(status='completed')
@@ -399,26 +414,13 @@ class SurveyCampaignStatsViewSet(viewsets.ViewSet):
     
     @action(detail=False, methods=['get'])
     def overview(self, request):
-        """Get overall campaign statistics"""
-        queryset = SurveyCampaign.objects.all()
-        
-        # Filter by creator if not admin
-        if not request.user.is_staff:
-            queryset = queryset.filter(creator=request.user)
-        
-        stats = queryset.aggregate(
-            total_campaigns=Count('id'),
-            active_campaigns=Count('id', filter=Q(status='active')),
-            total_participants=Sum('participant_count'),
-            total_rewards_distributed=Sum('total_tokens_awarded'),
-            total_admin_fees=Sum('admin_fee_collected'),
-            average_completion_rate=Avg('completed_responses') * 100 / Avg('participant_count')
-        )
-        
-        # Handle None values
-        for key, value in stats.items():
-            if value is None:
-                stats[key] = 0
+        """Get overall campaign statistics (staff: from the dashboard snapshot)"""
+        if request.user.is_staff:
+            refresh = request.query_params.get('refresh', '').lower() in ('1', 'true', 'yes')
+            snapshot = DashboardMetricsService.get('campaigns', refresh=refresh)
+            stats = {**snapshot['data'], **DashboardMetricsService.freshness(snapshot)}
+        else:
+            stats = campaign_overview(SurveyCampaign.objects.filter(creator=request.user))
         
         serializer = CampaignStatsSerializer(data=stats)
         serializer.is_valid(raise_exception=True)
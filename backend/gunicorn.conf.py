@@ -2,16 +2,36 @@
 Gunicorn configuration for production deployment
 """
 
+import glob
 import multiprocessing
 import os
 
+# Prometheus multiprocess mode: every worker writes its metrics to files in this
+# directory and /metrics aggregates them. It must be set before the app is loaded
+# (preload_app) and is emptied at startup so counters do not carry over restarts.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/ncskit_metrics')
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+for stale in glob.glob(os.path.join(os.environ['PROMETHEUS_MULTIPROC_DIR'], '*.db')):
+    os.remove(stale)
+
 # Server socket
 bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
 backlog = 2048
 
 # Worker processes
+# SERVER_MODE=asgi serves ncskit_backend.asgi through uvicorn workers: each
+# worker runs an event loop, so the async views (R analyses, result long-polls)
+# no longer hold a worker while they wait. Sync views keep running on a thread
+# per request through Django's sync_to_async.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
 workers = multiprocessing.cpu_count() * 2 + 1
-worker_class = 'sync'
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'ncskit_backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = multiprocessing.cpu_count() + 1
+else:
+    wsgi_app = 'ncskit_backend.wsgi:application'
+    worker_class = 'sync'
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -57,4 +77,9 @@ def post_worker_init(worker):
     worker.log.info("Worker initialized (pid: %s)", worker.pid)
 
 def worker_abort(worker):
-    worker.log.info("Worker aborted (pid: %s)", worker.pid)
\ No newline at end of file
+    worker.log.info("Worker aborted (pid: %s)", worker.pid)
+
+def child_exit(server, worker):
+    # Keep the exited worker's counters but drop its live gauges
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
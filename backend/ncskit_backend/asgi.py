@@ -2,6 +2,8 @@
 ASGI config for ncskit_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served in production by gunicorn with uvicorn workers (``SERVER_MODE=asgi``,
+see gunicorn.conf.py); ``ncskit_backend.wsgi`` remains the sync deployment.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -0,0 +1,16 @@
+"""
+Celery application for background and periodic tasks.
+
+Workers and beat are started with ``celery -A ncskit_backend worker|beat``
+(see config/docker-compose.production.yml). Periodic tasks are declared in
+``CELERY_BEAT_SCHEDULE`` in settings.
+"""
+
+import os
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ncskit_backend.settings')
+
+app = Celery('ncskit_backend')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
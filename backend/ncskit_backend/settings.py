@@ -52,6 +52,9 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.admin_management.instrumentation.MetricsMiddleware',
+    'apps.admin_management.profiling.QueryProfilerMiddleware',
+    'apps.admin_management.sampling.SamplingProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -122,6 +125,10 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Image pipeline (apps/blog/images.py)
+MEDIA_IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+MEDIA_PROCESSING_WORKERS = config('MEDIA_PROCESSING_WORKERS', default=2, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -131,7 +138,8 @@ AUTH_USER_MODEL = 'authentication.User'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication with users served from the principal cache
+        'apps.authentication.principals.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -212,6 +220,69 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Without a worker (local development) run tasks inline
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=DEBUG, cast=bool)
+CELERY_BEAT_SCHEDULE = {
+    'flush-blog-counters': {
+        'task': 'apps.blog.tasks.flush_blog_counters',
+        'schedule': 60.0,
+    },
+    'rebuild-related-posts': {
+        'task': 'apps.blog.tasks.rebuild_related_posts',
+        'schedule': 24 * 60 * 60.0,
+    },
+    'flush-admin-activity': {
+        'task': 'apps.admin_management.tasks.flush_admin_activity',
+        'schedule': 5.0,
+    },
+    'maintain-audit-partitions': {
+        'task': 'apps.admin_management.tasks.maintain_audit_partitions',
+        'schedule': 24 * 60 * 60.0,
+    },
+    'refresh-dashboard-metrics': {
+        'task': 'apps.admin_management.tasks.refresh_dashboard_metrics',
+        'schedule': 60.0,
+    },
+}
+
+# Audit log retention (see apps/admin_management/retention.py)
+AUDIT_RETENTION_MONTHS = config('AUDIT_RETENTION_MONTHS', default=12, cast=int)
+AUDIT_ARCHIVE_DIR = config('AUDIT_ARCHIVE_DIR', default=str(BASE_DIR / 'archives' / 'audit'))
+
+# Background CSV exports (job files and output)
+EXPORT_DIR = config('EXPORT_DIR', default=str(BASE_DIR / 'exports'))
+
+# R analysis server (apps/analytics/services/r_client.py)
+R_ANALYSIS_URL = config('R_ANALYSIS_URL', default='http://localhost:8000')
+R_ANALYSIS_TIMEOUT = config('R_ANALYSIS_TIMEOUT', default=300, cast=int)
+
+# Cache (local memory in development; Redis in production, see settings_production.py).
+# The instrumented backends count hits and misses for /metrics.
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.admin_management.instrumentation.InstrumentedLocMemCache',
+    }
+}
+
+# SQL profiler for development/staging (see apps/admin_management/profiling.py):
+# per-endpoint reports of repeated (N+1) and slow statements
+QUERY_PROFILER_ENABLED = config('QUERY_PROFILER_ENABLED', default=DEBUG, cast=bool)
+QUERY_PROFILER_DIR = config('QUERY_PROFILER_DIR', default=str(BASE_DIR / 'logs' / 'queries'))
+QUERY_PROFILER_SLOW_MS = config('QUERY_PROFILER_SLOW_MS', default=100, cast=float)
+QUERY_PROFILER_REPEAT_THRESHOLD = config('QUERY_PROFILER_REPEAT_THRESHOLD', default=3, cast=int)
+
+# Request sampling profiler (see apps/admin_management/sampling.py). Requests opt in with
+# "X-Profile: <token>" / ?_profile=<token> or are sampled at SAMPLING_PROFILER_RATE
+SAMPLING_PROFILER_ENABLED = config('SAMPLING_PROFILER_ENABLED', default=False, cast=bool)
+SAMPLING_PROFILER_TOKEN = config('SAMPLING_PROFILER_TOKEN', default='')
+SAMPLING_PROFILER_RATE = config('SAMPLING_PROFILER_RATE', default=0.0, cast=float)
+SAMPLING_PROFILER_INTERVAL = config('SAMPLING_PROFILER_INTERVAL', default=0.005, cast=float)
+SAMPLING_PROFILER_DIR = config('SAMPLING_PROFILER_DIR', default=str(BASE_DIR / 'logs' / 'profiles'))
+SAMPLING_PROFILER_KEEP = config('SAMPLING_PROFILER_KEEP', default=20, cast=int)
+
+# Prometheus scrape endpoint (/metrics); scrapers must send "Authorization: Bearer <token>".
+# Without a token the endpoint is served only with DEBUG and answers 404 otherwise
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
 
 # Supabase Configuration
 SUPABASE_URL = config('SUPABASE_URL')
@@ -19,6 +19,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.admin_management.instrumentation import metrics_view
 from .health import health_check, readiness_check, liveness_check
 
 urlpatterns = [
@@ -29,11 +30,15 @@ urlpatterns = [
     path("api/question-bank/", include("apps.question_bank.urls")),
     path("api/admin/", include("apps.admin_management.urls")),
     path("api/blog/", include("apps.blog.urls")),
+    path("api/analytics/", include("apps.analytics.async_urls")),
     
     # Health check endpoints
     path('health/', health_check, name='health_check'),
     path('ready/', readiness_check, name='readiness_check'),
     path('alive/', liveness_check, name='liveness_check'),
+    
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development